@@ -3,15 +3,35 @@ Application Flask - Détecteur de Fausses Informations
 TESE935 - Gaël Roustan, Argonaultes 2026
 """
 
-from flask import Flask, request, render_template, redirect, url_for, flash
+import time
+
+# Début du chargement du module : sert à mesurer le temps de démarrage
+_IMPORT_STARTED = time.perf_counter()
+
+from flask import (Flask, request, render_template, redirect, url_for, flash,
+                   make_response, session, g, abort)
 import sqlite3
 import os
 import threading
-import time
 import pickle
 import logging
+import gzip
+import hashlib
+import hmac
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
 
-from ml.trainer import train_model, predict_news
+from werkzeug.exceptions import InternalServerError
+
+from ml.predictor import (predict_proba_batch, model_fingerprint, load_model,
+                          get_streaming_scorer, LONG_TEXT_CHARS)
+from ml.trainer import train_model, count_labels
+from ml import shadow, text_cache
+from migrations import migrate, touch_data_version
+import prediction_log
+import profiling
+import sharding
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -20,108 +40,742 @@ app = Flask(__name__)
 app.secret_key = "tese935_secret"
 
 # Chemin absolu du dossier contenant app.py — robuste peu importe le CWD
+# (surchargeable par variable d'environnement, ex. base jetable pour les tests de charge)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH    = os.path.join(BASE_DIR, "news.db")
-MODEL_PATH = os.path.join(BASE_DIR, "model", "model.pkl")
+DB_PATH    = os.environ.get("FAKENEWS_DB_PATH", os.path.join(BASE_DIR, "news.db"))
+MODEL_PATH = os.environ.get("FAKENEWS_MODEL_PATH", os.path.join(BASE_DIR, "model", "model.pkl"))
+
+# Threads dédiés aux prédictions (calcul CPU sklearn) et attente max sur le verrou SQLite
+PREDICT_WORKERS = int(os.environ.get("FAKENEWS_PREDICT_WORKERS", "2"))
+SQLITE_TIMEOUT  = float(os.environ.get("FAKENEWS_SQLITE_TIMEOUT", "10"))
+
+# Évaluation du modèle par le thread d'entraînement : mode ("full", "sample",
+# "skip"), un cycle évalué sur EVAL_EVERY, taille d'échantillon et budget (s)
+EVAL_MODE        = os.environ.get("FAKENEWS_EVAL_MODE", "sample")
+EVAL_EVERY       = int(os.environ.get("FAKENEWS_EVAL_EVERY", "10"))
+EVAL_SAMPLE_SIZE = int(os.environ.get("FAKENEWS_EVAL_SAMPLE_SIZE", "500"))
+EVAL_TIME_BUDGET = float(os.environ.get("FAKENEWS_EVAL_TIME_BUDGET", "5"))
+
+# Journal d'audit des prédictions (prediction_log) et durée de rétention (jours)
+PREDICTION_LOG_ENABLED   = os.environ.get("FAKENEWS_PREDICTION_LOG", "1") == "1"
+PREDICTION_LOG_RETENTION = float(os.environ.get("FAKENEWS_PREDICTION_LOG_RETENTION_DAYS", "30"))
+PREDICTION_LOG_FLUSH_INTERVAL = float(os.environ.get("FAKENEWS_PREDICTION_LOG_FLUSH_SECONDS",
+                                                     str(prediction_log.FLUSH_INTERVAL)))
+
+# Évaluation en ombre de l'ancien modèle après chaque ré-entraînement :
+# fraction des prédictions re-scorées, nb d'exemples annotés avant décision,
+# perte d'exactitude tolérée avant rollback
+SHADOW_ENABLED      = os.environ.get("FAKENEWS_SHADOW", "0") == "1"
+SHADOW_SAMPLE_RATE  = float(os.environ.get("FAKENEWS_SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_MIN_LABELLED = int(os.environ.get("FAKENEWS_SHADOW_MIN_LABELLED", "50"))
+SHADOW_TOLERANCE    = float(os.environ.get("FAKENEWS_SHADOW_TOLERANCE", "0.02"))
+
+# Planification adaptative des ré-entraînements (secondes / nb de news annotées) :
+# au plus un entraînement automatique par TRAIN_MIN_INTERVAL, dès TRAIN_MIN_NEW_ROWS
+# nouvelles news annotées, ou après TRAIN_MAX_INTERVAL s'il y en a au moins une.
+# Au-delà de TRAIN_BUSY_INFLIGHT requêtes en cours ou TRAIN_BUSY_RPS req/s, on attend.
+TRAIN_MIN_INTERVAL   = float(os.environ.get("FAKENEWS_TRAIN_MIN_INTERVAL", "30"))
+TRAIN_MAX_INTERVAL   = float(os.environ.get("FAKENEWS_TRAIN_MAX_INTERVAL", "600"))
+TRAIN_MIN_NEW_ROWS   = int(os.environ.get("FAKENEWS_TRAIN_MIN_NEW_ROWS", "20"))
+TRAIN_CHECK_INTERVAL = float(os.environ.get("FAKENEWS_TRAIN_CHECK_INTERVAL", "5"))
+TRAIN_BUSY_INFLIGHT  = int(os.environ.get("FAKENEWS_TRAIN_BUSY_INFLIGHT", "4"))
+TRAIN_BUSY_RPS       = float(os.environ.get("FAKENEWS_TRAIN_BUSY_RPS", "20"))
+
+# Jeton exigé par les routes /admin et l'en-tête X-Profile. Sans jeton, elles
+# sont refusées, sauf appels locaux si FAKENEWS_ADMIN_ALLOW_LOCAL=1 (à ne pas
+# activer derrière un reverse proxy : toutes les requêtes y paraissent locales).
+ADMIN_TOKEN = os.environ.get("FAKENEWS_ADMIN_TOKEN")
+ADMIN_ALLOW_LOCAL = os.environ.get("FAKENEWS_ADMIN_ALLOW_LOCAL", "0") == "1"
+
+# Entraînement à mémoire bornée (Mo, 0 = désactivé) et élagage du vocabulaire
+TRAIN_MEMORY_LIMIT_MB = float(os.environ.get("FAKENEWS_TRAIN_MEMORY_LIMIT_MB", "0"))
+TRAIN_MIN_DF = int(os.environ.get("FAKENEWS_TRAIN_MIN_DF", "1"))
+TRAIN_MAX_DF = float(os.environ.get("FAKENEWS_TRAIN_MAX_DF", "1.0"))
+
+# Cache des tokens partagé par l'entraînement et la prédiction (Mo, 0 = désactivé)
+TOKEN_CACHE_MB = float(os.environ.get("FAKENEWS_TOKEN_CACHE_MB", "64"))
+text_cache.configure(int(TOKEN_CACHE_MB * 1024 * 1024))
+
+# POST /api/news/bulk : nombre maximal d'articles par requête, et taille
+# maximale d'un corps application/json (lu en entier, contrairement au NDJSON)
+BULK_MAX_ITEMS = int(os.environ.get("FAKENEWS_BULK_MAX_ITEMS", "10000"))
+BULK_JSON_MAX_BYTES = int(float(os.environ.get("FAKENEWS_BULK_JSON_MAX_MB", "16")) * 1024 * 1024)
+
+# Profilage des requêtes (profiling.py) : toutes les requêtes si FAKENEWS_PROFILE=1,
+# sinon à la demande (en-tête X-Profile: 1, administrateurs uniquement)
+PROFILE_ENABLED      = os.environ.get("FAKENEWS_PROFILE", "0") == "1"
+PROFILE_THRESHOLD_MS = float(os.environ.get("FAKENEWS_PROFILE_THRESHOLD_MS", "200"))
+PROFILE_DIR          = os.environ.get("FAKENEWS_PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+
+# Articles longs : scorés en flux (ml/streaming.py) au-delà de STREAM_MIN_CHARS
+# caractères ; tronqués à MAX_ARTICLE_CHARS caractères pour le score (0 = jamais)
+STREAM_MIN_CHARS  = int(os.environ.get("FAKENEWS_STREAM_MIN_CHARS", str(LONG_TEXT_CHARS)))
+MAX_ARTICLE_CHARS = int(os.environ.get("FAKENEWS_MAX_ARTICLE_CHARS", "0"))
+
+# Bundle portable (ml/bundle.py) réécrit après chaque entraînement, si défini
+BUNDLE_PATH = os.environ.get("FAKENEWS_BUNDLE_PATH")
+
+# Table news répartie sur N fichiers SQLite (0 ou 1 = news.db seul, voir sharding.py)
+SHARD_COUNT    = int(os.environ.get("FAKENEWS_SHARDS", "0"))
+SHARD_STRATEGY = os.environ.get("FAKENEWS_SHARD_BY", "hash")
+SHARD_WINDOW   = float(os.environ.get("FAKENEWS_SHARD_WINDOW", str(sharding.DEFAULT_WINDOW)))
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
+# ---------------------------------------------------------------------------
+# Version des données et cache de la page d'accueil
+# ---------------------------------------------------------------------------
+
+# Rendus de la page d'accueil, indexés par la version des données (table
+# data_version, incrémentée par touch_data_version dans chaque transaction
+# d'écriture de news, quel que soit le processus qui écrit) : une entrée d'une
+# version antérieure est périmée.
+_data_version_lock = threading.Lock()
+_index_cache = {}
+INDEX_CACHE_MAX_ENTRIES = 32
+
+# Tris proposés sur la page d'accueil : valeur du paramètre ?sort= -> ORDER BY
+INDEX_SORTS = {
+    "created":     "created DESC",
+    "confidence":  "confidence ASC",    # les moins sûres d'abord (relecture humaine)
+    "-confidence": "confidence DESC",
+}
+
+
+def bump_data_version():
+    """
+    Vide le cache de rendu après une écriture de ce processus. La version
+    partagée est incrémentée dans la transaction d'écriture elle-même
+    (migrations.touch_data_version).
+    """
+    with _data_version_lock:
+        _index_cache.clear()
+
+
+def read_data_version() -> tuple:
+    """Version partagée des données : une valeur par fichier de la table news (shards)."""
+    def read(db_path):
+        conn = get_connection(db_path)
+        row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+        conn.close()
+        return row[0] if row else 0
+    return tuple(read(path) for path in news_db_paths())
+
+
+def get_index_page(sort="created", min_confidence=None, max_confidence=None):
+    """
+    Retourne le rendu de la page d'accueil pour la version courante des données :
+    dict {etag, last_modified, html, html_gzip}. Rendu une seule fois par version
+    et par combinaison tri / filtres.
+    """
+    model_ready = os.path.exists(MODEL_PATH)
+    version = read_data_version()
+    with _data_version_lock:
+        key = (DB_PATH, version, model_ready, sort, min_confidence, max_confidence)
+        entry = _index_cache.get(key)
+    if entry is not None:
+        return entry
+
+    html = render_index(model_ready, sort, min_confidence, max_confidence).encode("utf-8")
+    entry = {
+        "etag":          hashlib.sha1(html).hexdigest(),
+        "last_modified": time.time(),
+        "html":          html,
+        "html_gzip":     gzip.compress(html, compresslevel=6),
+    }
+    # Une écriture a pu survenir pendant le rendu : on ne cache pas un état périmé
+    if read_data_version() == version:
+        with _data_version_lock:
+            if len(_index_cache) >= INDEX_CACHE_MAX_ENTRIES:
+                _index_cache.clear()
+            _index_cache[key] = entry
+    return entry
+
+
+def render_index(model_ready, sort="created", min_confidence=None, max_confidence=None):
+    """Rendu HTML de la liste des news (sans cache)."""
+    news_list = get_all_news(sort, min_confidence, max_confidence)
+    return render_template(
+        "index.html", news_list=news_list, model_ready=model_ready,
+        sort=sort, min_confidence=min_confidence, max_confidence=max_confidence,
+    )
+
+# ---------------------------------------------------------------------------
+# Pool de prédiction
+# ---------------------------------------------------------------------------
+
+# Pool borné : au plus PREDICT_WORKERS prédictions en parallèle, quel que soit
+# le nombre de threads du serveur web.
+_predict_executor = ThreadPoolExecutor(
+    max_workers=PREDICT_WORKERS, thread_name_prefix="predict"
+)
+
+
+def run_prediction(fn, *args):
+    """Exécute une fonction de prédiction dans le pool et retourne son résultat."""
+    return _predict_executor.submit(profiling.wrap(fn), *args).result()
+
 # ---------------------------------------------------------------------------
 # Base de données
 # ---------------------------------------------------------------------------
 
-def init_db():
-    """Crée la table si elle n'existe pas et insère quelques exemples."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS news (
-            id        INTEGER PRIMARY KEY AUTOINCREMENT,
-            title     TEXT NOT NULL,
-            content   TEXT NOT NULL,
-            source    TEXT,
-            label     TEXT NOT NULL DEFAULT 'unknown',
-            predicted TEXT DEFAULT NULL,
-            created   DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    # Données de démonstration si la table est vide
-    c.execute("SELECT COUNT(*) FROM news")
-    if c.fetchone()[0] == 0:
-        samples = [
-            ("Scientists discover water on Mars",
-             "NASA researchers confirm the presence of liquid water beneath the Martian surface.",
-             "https://nasa.gov", "real"),
-            ("Aliens landed in Paris last night",
-             "Thousands of extraterrestrials reportedly held a concert at the Eiffel Tower.",
-             "https://fake-news-example.com", "fake"),
-            ("New vaccine approved by WHO",
-             "The World Health Organization has approved a new vaccine for widespread distribution.",
-             "https://who.int", "real"),
-            ("Chocolate cures cancer, doctors say",
-             "Eating 10 bars of chocolate daily eliminates all forms of cancer, claim anonymous sources.",
-             "https://tabloid-example.com", "fake"),
-        ]
-        c.executemany(
-            "INSERT INTO news (title, content, source, label) VALUES (?, ?, ?, ?)",
-            samples
-        )
-    conn.commit()
+def get_connection(db_path=None):
+    """
+    Ouvre une connexion SQLite en mode WAL : les lectures ne sont pas bloquées
+    par l'écriture en cours, et les écrivains attendent SQLITE_TIMEOUT secondes
+    le verrou au lieu d'échouer immédiatement.
+    Sans `db_path`, ouvre la base principale (DB_PATH).
+    """
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=SQLITE_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+# Requêtes ayant échoué faute d'obtenir le verrou SQLite (contention d'écriture)
+_sqlite_lock_errors = 0
+_sqlite_lock_errors_lock = threading.Lock()
+
+
+def _is_lock_error(exc: sqlite3.OperationalError) -> bool:
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+def news_db_paths() -> list:
+    """Fichiers contenant la table news : les shards en mode shardé, sinon DB_PATH."""
+    if SHARD_COUNT > 1:
+        return sharding.shard_paths(DB_PATH, SHARD_COUNT)
+    return [DB_PATH]
+
+
+def news_db_for_id(news_id: int) -> str:
+    """Fichier contenant la news `news_id`."""
+    paths = news_db_paths()
+    return paths[sharding.shard_of_id(news_id, len(paths))]
+
+
+def _migrate_path(db_path):
+    """Applique les migrations à un fichier (base principale ou shard)."""
+    conn = get_connection(db_path)
+    migrate(conn)
     conn.close()
 
 
-def get_all_news():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    rows = conn.execute("SELECT * FROM news ORDER BY created DESC").fetchall()
+def _analyze_path(db_path):
+    """
+    Rafraîchit les statistiques du planificateur pour news (quelques dizaines
+    de ms pour 150 000 lignes) : la lecture du jeu d'entraînement reste un
+    parcours de table, count_labels garde l'index couvrant idx_news_label.
+    """
+    conn = get_connection(db_path)
+    conn.execute("ANALYZE news")
+    conn.commit()
     conn.close()
-    return rows
+
+
+def count_news() -> int:
+    """Nombre de news, tous shards confondus."""
+    def count(db_path):
+        conn = get_connection(db_path)
+        n = conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
+        conn.close()
+        return n
+    return sum(sharding.fan_out(count, news_db_paths()))
+
+
+# Exemples insérés par init_db dans une base vide
+DEMO_NEWS = [
+    ("Scientists discover water on Mars",
+     "NASA researchers confirm the presence of liquid water beneath the Martian surface.",
+     "https://nasa.gov", "real"),
+    ("Aliens landed in Paris last night",
+     "Thousands of extraterrestrials reportedly held a concert at the Eiffel Tower.",
+     "https://fake-news-example.com", "fake"),
+    ("New vaccine approved by WHO",
+     "The World Health Organization has approved a new vaccine for widespread distribution.",
+     "https://who.int", "real"),
+    ("Chocolate cures cancer, doctors say",
+     "Eating 10 bars of chocolate daily eliminates all forms of cancer, claim anonymous sources.",
+     "https://tabloid-example.com", "fake"),
+]
+
+
+def init_db():
+    """
+    Amène le schéma à la dernière version (voir migrations.py) et insère
+    quelques exemples si la table est vide. En mode shardé, la base principale
+    et chaque shard sont migrés. Sûr si plusieurs processus démarrent en même
+    temps (workers gunicorn) : le test « table vide » et l'insertion se font
+    sous le même verrou d'écriture (BEGIN IMMEDIATE sur la base principale).
+    """
+    _migrate_path(DB_PATH)
+    if SHARD_COUNT > 1:
+        sharding.fan_out(_migrate_path, news_db_paths())
+
+    # Verrou d'écriture de la base principale pris avant de compter : des
+    # workers qui démarrent ensemble n'insèrent les exemples qu'une fois
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        empty = count_news() == 0
+        if empty and SHARD_COUNT > 1:
+            # Base existante pas encore découpée : ne pas la masquer par des exemples
+            if conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]:
+                logger.warning("Shards vides mais %s contient des news : "
+                               "python sharding.py --shards %d", DB_PATH, SHARD_COUNT)
+                empty = False
+
+        # Données de démonstration si la table est vide
+        if empty and SHARD_COUNT > 1:
+            insert_rows(DEMO_NEWS)      # fichiers shards, hors du verrou tenu ici
+        elif empty:
+            conn.executemany(
+                "INSERT INTO news (title, content, source, label) VALUES (?, ?, ?, ?)", DEMO_NEWS
+            )
+            touch_data_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    bump_data_version()
+
+
+def get_all_news(sort="created", min_confidence=None, max_confidence=None):
+    """
+    Liste les news triées selon `sort` (clé de INDEX_SORTS).
+    Les bornes de confiance filtrent via l'index idx_news_confidence.
+    """
+    query = "SELECT * FROM news"
+    clauses, params = [], []
+    if min_confidence is not None:
+        clauses.append("confidence >= ?")
+        params.append(min_confidence)
+    if max_confidence is not None:
+        clauses.append("confidence <= ?")
+        params.append(max_confidence)
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    order_by = INDEX_SORTS.get(sort, INDEX_SORTS["created"])
+    query += " ORDER BY " + order_by
+
+    def fetch(db_path):
+        conn = get_connection(db_path)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+        return rows
+
+    # Une requête par shard en parallèle, puis fusion des listes déjà triées
+    return sharding.merge_sorted(sharding.fan_out(fetch, news_db_paths()), order_by)
+
+
+def insert_rows(rows) -> list:
+    """
+    Insère des (title, content, source, label) en une transaction et retourne
+    les ids créés, dans l'ordre de `rows`. En mode shardé, chaque ligne va
+    dans le shard choisi par SHARD_STRATEGY, une transaction par shard, les
+    shards étant écrits en parallèle.
+    """
+    if SHARD_COUNT <= 1:
+        conn = get_connection()
+        with conn:
+            ids = [conn.execute(
+                "INSERT INTO news (title, content, source, label) VALUES (?, ?, ?, ?)", row
+            ).lastrowid for row in rows]
+            touch_data_version(conn)
+        conn.close()
+        return ids
+
+    paths = news_db_paths()
+    groups = sharding.group_by_shard(list(enumerate(rows)), lambda item: sharding.pick_shard(
+        item[1][0], item[1][1], SHARD_COUNT, SHARD_STRATEGY, SHARD_WINDOW))
+
+    def write(group_item):
+        shard, group = group_item
+        conn = get_connection(paths[shard])
+        with conn:
+            ids = sharding.insert_rows(conn, shard, SHARD_COUNT, [row for _, row in group])
+            touch_data_version(conn)
+        conn.close()
+        return [(index, news_id) for (index, _), news_id in zip(group, ids)]
+
+    ids = [None] * len(rows)
+    for written in sharding.fan_out(write, list(groups.items())):
+        for index, news_id in written:
+            ids[index] = news_id
+    return ids
 
 
 def insert_news(title, content, source, label):
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute(
-        "INSERT INTO news (title, content, source, label) VALUES (?, ?, ?, ?)",
-        (title, content, source, label)
+    insert_rows([(title, content, source, label)])
+    bump_data_version()
+
+
+def score_texts(news_ids, texts, served=True):
+    """
+    Prédit [(label, confiance), ...] pour un lot de textes dans le pool de
+    prédiction, et ajoute le résultat au journal d'audit (prediction_log).
+    Seules les prédictions servies (`served`) sont échantillonnées pour
+    l'essai shadow, pas le re-scoring en masse de la base.
+    """
+    start = time.perf_counter()
+    preds = run_prediction(predict_proba_batch, texts, MODEL_PATH,
+                           STREAM_MIN_CHARS, MAX_ARTICLE_CHARS)
+    latency = time.perf_counter() - start
+    if PREDICTION_LOG_ENABLED and news_ids and os.path.exists(MODEL_PATH):
+        version = prediction_log.get_model_version(DB_PATH, model_fingerprint(MODEL_PATH))
+        prediction_log.record(DB_PATH, version, news_ids, preds, latency)
+    if SHADOW_ENABLED and served:
+        shadow.submit(news_ids, texts, preds)
+    return preds
+
+
+def _rescore(db_path):
+    conn = get_connection(db_path)
+    rows = conn.execute("SELECT id, title, content FROM news").fetchall()
+    texts = [text_cache.article_text(row[1], row[2]) for row in rows]
+    preds = score_texts([row[0] for row in rows], texts, served=False)
+    conn.executemany(
+        "UPDATE news SET predicted=?, confidence=? WHERE id=?",
+        [(pred, conf, row[0]) for (pred, conf), row in zip(preds, rows)]
     )
+    touch_data_version(conn)
     conn.commit()
     conn.close()
 
 
 def update_predictions():
-    """Met à jour la colonne predicted pour toutes les news via le modèle."""
+    """
+    Met à jour les colonnes predicted / confidence de toutes les news via le
+    modèle (les shards sont re-scorés en parallèle).
+    """
     if not os.path.exists(MODEL_PATH):
         return
-    conn = sqlite3.connect(DB_PATH)
-    rows = conn.execute("SELECT id, title, content FROM news").fetchall()
-    for row in rows:
-        text = row[1] + " " + row[2]
-        pred = predict_news(text, MODEL_PATH)
-        conn.execute("UPDATE news SET predicted=? WHERE id=?", (pred, row[0]))
-    conn.commit()
-    conn.close()
+    sharding.fan_out(_rescore, news_db_paths())
+    bump_data_version()
+
+
+def score_news(news_ids, texts):
+    """
+    Prédit un lot de news déjà insérées, en un seul appel vectorisé, et
+    enregistre predicted / confidence pour ces lignes uniquement.
+    Retourne [(label, confiance), ...].
+    """
+    if not news_ids or not os.path.exists(MODEL_PATH):
+        return [(None, None)] * len(news_ids)
+    preds = score_texts(news_ids, texts)
+    by_path = sharding.group_by_shard(list(zip(news_ids, preds)),
+                                      lambda item: news_db_for_id(item[0]))
+    for db_path, items in by_path.items():
+        conn = get_connection(db_path)
+        with conn:
+            conn.executemany(
+                "UPDATE news SET predicted=?, confidence=? WHERE id=?",
+                [(pred, conf, news_id) for news_id, (pred, conf) in items]
+            )
+            touch_data_version(conn)
+        conn.close()
+    return preds
+
+# ---------------------------------------------------------------------------
+# Ingestion en masse (POST /api/news/bulk)
+# ---------------------------------------------------------------------------
+
+NEWS_LABELS = ("real", "fake", "unknown")
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class BulkPayloadError(ValueError):
+    """Corps de requête illisible ou trop volumineux (erreur globale, pas par article)."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def iter_bulk_items(stream, mimetype):
+    """
+    Génère (index, objet, erreur) pour chaque article du corps de requête.
+    NDJSON est lu ligne par ligne sur le flux, sans charger le corps entier ;
+    une ligne invalide donne une erreur pour cet article seulement. En JSON,
+    le corps est un tableau d'articles ou {"items": [...]}, chargé en entier :
+    il est refusé (413) au-delà de BULK_JSON_MAX_BYTES.
+    """
+    if mimetype in NDJSON_MIMETYPES:
+        index = 0
+        # Flux brut de Werkzeug : sans tampon, readline() lit octet par octet
+        for line in io.BufferedReader(stream, buffer_size=64 * 1024):
+            if not line.strip():
+                continue
+            try:
+                yield index, json.loads(line), None
+            except ValueError as exc:
+                yield index, None, f"JSON invalide : {exc}"
+            index += 1
+        return
+    if mimetype != "application/json":
+        raise BulkPayloadError("Content-Type attendu : application/json ou application/x-ndjson", 415)
+    body = stream.read(BULK_JSON_MAX_BYTES + 1)
+    if len(body) > BULK_JSON_MAX_BYTES:
+        raise BulkPayloadError(
+            f"Corps JSON limité à {BULK_JSON_MAX_BYTES} octets (utiliser NDJSON)", 413)
+    try:
+        payload = json.loads(body)
+    except ValueError as exc:
+        raise BulkPayloadError(f"JSON invalide : {exc}")
+    if isinstance(payload, dict):
+        payload = payload.get("items")
+    if not isinstance(payload, list):
+        raise BulkPayloadError("Le corps doit être un tableau d'articles ou {\"items\": [...]}")
+    for index, item in enumerate(payload):
+        yield index, item, None
+
+
+def validate_bulk_item(item):
+    """Retourne ((title, content, source, label), None) ou (None, message d'erreur)."""
+    if not isinstance(item, dict):
+        return None, "un article doit être un objet JSON"
+    fields = {}
+    for name in ("title", "content", "source"):
+        value = item.get(name, "")
+        if value is None:
+            value = ""
+        if not isinstance(value, str):
+            return None, f"{name} doit être une chaîne"
+        try:
+            value.encode("utf-8")
+        except UnicodeEncodeError:
+            # JSON valide ("\ud800") mais non stockable dans SQLite
+            return None, f"{name} contient un caractère invalide (surrogate isolé)"
+        fields[name] = value.strip()
+    if not fields["title"] or not fields["content"]:
+        return None, "title et content sont obligatoires"
+    label = item.get("label", "unknown")
+    if label not in NEWS_LABELS:
+        return None, f"label doit être parmi {NEWS_LABELS}"
+    return (fields["title"], fields["content"], fields["source"], label), None
 
 # ---------------------------------------------------------------------------
 # Thread d'entraînement périodique
 # ---------------------------------------------------------------------------
 
-def training_thread(interval_seconds: int = 60):
+# Charge du serveur web, mise à jour par les hooks before/teardown_request
+_inflight_requests = 0
+_total_requests = 0
+_load_lock = threading.Lock()
+
+# Demande explicite de ré-entraînement (POST /admin/retrain)
+_retrain_requested = threading.Event()
+
+# Dernière décision du planificateur, exposée par /status
+_scheduler_state = {"last_reason": None, "last_trained_at": None}
+
+
+@app.before_request
+def _track_request_start():
+    global _inflight_requests, _total_requests
+    with _load_lock:
+        _inflight_requests += 1
+        _total_requests += 1
+
+
+@app.teardown_request
+def _track_request_end(exc=None):
+    global _inflight_requests
+    with _load_lock:
+        _inflight_requests -= 1
+
+
+def decide_retrain(elapsed, new_rows, inflight, rps, has_model, forced=False,
+                   min_interval=None):
+    """
+    Décide s'il faut ré-entraîner maintenant. Retourne la raison ("admin",
+    "initial", "max_interval", "new_rows") ou None pour attendre.
+    `elapsed` : secondes depuis le dernier entraînement, `new_rows` : news
+    annotées ajoutées depuis, `inflight` / `rps` : charge du serveur web.
+    """
+    min_interval = TRAIN_MIN_INTERVAL if min_interval is None else min_interval
+    if forced:
+        return "admin"
+    if new_rows <= 0:
+        return None
+    if not has_model:
+        return "initial"
+    if elapsed < min_interval:
+        return None
+    if elapsed >= TRAIN_MAX_INTERVAL:
+        return "max_interval"
+    if inflight >= TRAIN_BUSY_INFLIGHT or rps >= TRAIN_BUSY_RPS:
+        return None
+    if new_rows >= TRAIN_MIN_NEW_ROWS:
+        return "new_rows"
+    return None
+
+
+def export_model_bundle():
+    """Exporte model.pkl vers BUNDLE_PATH (scoreurs sans scikit-learn), si configuré."""
+    if not BUNDLE_PATH:
+        return
+    from ml.bundle import export_bundle
+    export_bundle(MODEL_PATH, BUNDLE_PATH)
+    logger.info("Bundle exported → %s", BUNDLE_PATH)
+
+
+def restore_after_rollback():
     """
-    Thread daemon qui ré-entraîne le modèle toutes les `interval_seconds` secondes
-    et met à jour les prédictions en base.
+    Après un rollback shadow (ancien model.pkl restauré) : le bundle et les
+    prédictions en base repassent eux aussi à l'ancien modèle.
     """
-    logger.info("Training thread started (interval=%ds)", interval_seconds)
+    export_model_bundle()
+    update_predictions()
+
+
+def run_training_cycle(evaluation: str = "skip"):
+    """
+    Un cycle complet : entraînement (avec essai shadow si activé), contrôle
+    du nouveau modèle pour /readyz, mise à jour des prédictions en base,
+    écriture du journal des prédictions (la purge est faite par le thread de
+    maintenance du journal, voir start_up).
+    """
+    has_shadow = SHADOW_ENABLED and shadow.snapshot(MODEL_PATH)
+    logger.info("Starting model training (evaluation=%s)…", evaluation)
+    shards = news_db_paths() if SHARD_COUNT > 1 else None
+    run = train_model(
+        DB_PATH, MODEL_PATH,
+        shards=shards,
+        evaluation=evaluation,
+        eval_sample_size=EVAL_SAMPLE_SIZE,
+        eval_time_budget=EVAL_TIME_BUDGET,
+        memory_limit_mb=TRAIN_MEMORY_LIMIT_MB or None,
+        min_df=TRAIN_MIN_DF,
+        max_df=TRAIN_MAX_DF,
+    )
+    if has_shadow and run is not None:
+        # Après un rollback, bundle, base et page d'accueil repassent à l'ancien modèle
+        shadow.start_trial(MODEL_PATH, DB_PATH, SHADOW_SAMPLE_RATE,
+                           SHADOW_MIN_LABELLED, SHADOW_TOLERANCE, shards=shards,
+                           on_rollback=restore_after_rollback)
+    elif has_shadow:
+        shadow.cancel(MODEL_PATH)
+    logger.info("Model saved → %s", MODEL_PATH)
+    if run is not None:
+        export_model_bundle()
+        # Proportion de news annotées changée : statistiques pour la prochaine lecture
+        sharding.fan_out(_analyze_path, news_db_paths())
+    # Nouveau modèle : validé et chauffé, /readyz suit (y compris après un échec)
+    refresh_readiness()
+    update_predictions()
+    logger.info("Predictions updated in DB")
+    if PREDICTION_LOG_ENABLED:
+        prediction_log.flush(DB_PATH)
+    return run
+
+
+def training_thread(interval_seconds: float = TRAIN_MIN_INTERVAL):
+    """
+    Thread daemon qui ré-entraîne le modèle quand c'est utile plutôt qu'à
+    intervalle fixe : toutes les TRAIN_CHECK_INTERVAL secondes (ou dès un
+    POST /admin/retrain), `decide_retrain` compare le nombre de nouvelles
+    news annotées, le temps écoulé (au moins `interval_seconds` entre deux
+    entraînements automatiques) et la charge du serveur web.
+    Le modèle n'est évalué (EVAL_MODE) qu'un entraînement sur EVAL_EVERY ;
+    chaque entraînement est enregistré dans la table training_runs.
+    """
+    logger.info("Training thread started (min interval=%ds)", interval_seconds)
+    cycle = 0
+    last_trained = None
+    labelled_at_last = 0
+    last_check, requests_at_check = time.monotonic(), _total_requests
     while True:
+        forced = _retrain_requested.wait(TRAIN_CHECK_INTERVAL)
+        _retrain_requested.clear()
         try:
-            logger.info("Starting model training…")
-            train_model(DB_PATH, MODEL_PATH)
-            logger.info("Model saved → %s", MODEL_PATH)
-            update_predictions()
-            logger.info("Predictions updated in DB")
+            now = time.monotonic()
+            with _load_lock:
+                inflight, total = _inflight_requests, _total_requests
+            rps = (total - requests_at_check) / max(now - last_check, 1e-6)
+            last_check, requests_at_check = now, total
+
+            labelled = sum(count_labels(news_db_paths()).values())
+            reason = decide_retrain(
+                elapsed=float("inf") if last_trained is None else now - last_trained,
+                new_rows=labelled - labelled_at_last,
+                inflight=inflight, rps=rps,
+                has_model=os.path.exists(MODEL_PATH),
+                forced=forced, min_interval=interval_seconds,
+            )
+            if reason is None:
+                continue
+
+            logger.info("Retrain triggered (%s, %d new labelled rows)",
+                        reason, labelled - labelled_at_last)
+            evaluation = EVAL_MODE if EVAL_EVERY > 0 and cycle % EVAL_EVERY == 0 else "skip"
+            cycle += 1
+            # Même en cas d'échec, nouvel essai au plus tôt après min_interval…
+            last_trained = now
+            run_training_cycle(evaluation)
+            # …mais les news annotées ne sont consommées que par un cycle réussi
+            labelled_at_last = labelled
+            _scheduler_state.update(last_reason=reason, last_trained_at=time.time())
         except Exception as exc:
             logger.error("Training failed: %s", exc)
-        time.sleep(interval_seconds)
+
+# ---------------------------------------------------------------------------
+# Profilage des requêtes lentes
+# ---------------------------------------------------------------------------
+
+def _is_admin_request() -> bool:
+    """
+    En-tête X-Admin-Token valide si FAKENEWS_ADMIN_TOKEN est défini ; sinon
+    refusé, sauf appel local avec FAKENEWS_ADMIN_ALLOW_LOCAL=1.
+    """
+    if ADMIN_TOKEN:
+        return hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+    return ADMIN_ALLOW_LOCAL and request.remote_addr in ("127.0.0.1", "::1")
+
+
+@app.before_request
+def _start_profiling():
+    forced = request.headers.get("X-Profile") == "1" and _is_admin_request()
+    if PROFILE_ENABLED or forced:
+        g.profile = profiling.start()
+        g.profile_forced = forced
+
+
+@app.after_request
+def _save_profile(response):
+    """
+    Enregistre le profil si la requête a dépassé PROFILE_THRESHOLD_MS (ou si
+    le profil a été demandé par en-tête) et renvoie son id dans X-Profile-Id.
+    """
+    capture = g.pop("profile", None)
+    if capture is None:
+        return response
+    duration_ms = profiling.stop(capture) * 1000
+    if duration_ms >= PROFILE_THRESHOLD_MS or g.get("profile_forced"):
+        profile_id = profiling.save(capture, PROFILE_DIR, {
+            "route":       request.endpoint,
+            "method":      request.method,
+            "path":        request.full_path.rstrip("?"),
+            "status":      response.status_code,
+            "duration_ms": round(duration_ms, 2),
+            "started_at":  time.time() - duration_ms / 1000,
+            "reason":      "header" if g.get("profile_forced") else "threshold",
+        })
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+@app.teardown_request
+def _stop_profiling(exc=None):
+    # Requête interrompue par une exception : after_request n'a pas tourné
+    capture = g.pop("profile", None)
+    if capture is not None:
+        profiling.stop(capture)
 
 # ---------------------------------------------------------------------------
 # Routes Flask
@@ -129,10 +783,32 @@ def training_thread(interval_seconds: int = 60):
 
 @app.route("/")
 def index():
-    """Page d'accueil : liste toutes les news."""
-    news_list = get_all_news()
-    model_ready = os.path.exists(MODEL_PATH)
-    return render_template("index.html", news_list=news_list, model_ready=model_ready)
+    """
+    Page d'accueil : liste toutes les news.
+    Le rendu est mis en cache par version des données et servi avec
+    ETag / Last-Modified (réponse 304 si le client est à jour) et gzip.
+    """
+    sort = request.args.get("sort", "created")
+    if sort not in INDEX_SORTS:
+        sort = "created"
+    min_confidence = request.args.get("min_confidence", type=float)
+    max_confidence = request.args.get("max_confidence", type=float)
+
+    # Les messages flash sont propres à la session : rendu direct, sans cache
+    if session.get("_flashes"):
+        return render_index(os.path.exists(MODEL_PATH), sort, min_confidence, max_confidence)
+
+    page = get_index_page(sort, min_confidence, max_confidence)
+    use_gzip = "gzip" in request.accept_encodings
+    response = make_response(page["html_gzip"] if use_gzip else page["html"])
+    response.content_type = "text/html; charset=utf-8"
+    response.vary.add("Accept-Encoding")
+    if use_gzip:
+        response.content_encoding = "gzip"
+    response.set_etag(page["etag"] + ("-gz" if use_gzip else ""))
+    response.last_modified = page["last_modified"]
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @app.route("/add", methods=["GET", "POST"])
@@ -167,14 +843,21 @@ def predict_single(news_id):
         flash("Le modèle n'est pas encore disponible. Patientez…", "warning")
         return redirect(url_for("index"))
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection(news_db_for_id(news_id))
     row = conn.execute("SELECT title, content FROM news WHERE id=?", (news_id,)).fetchone()
     if row:
-        text = row[0] + " " + row[1]
-        pred = predict_news(text, MODEL_PATH)
-        conn.execute("UPDATE news SET predicted=? WHERE id=?", (pred, news_id))
+        text = text_cache.article_text(row[0], row[1])
+        [(pred, conf)] = score_texts([news_id], [text])
+        conn.execute(
+            "UPDATE news SET predicted=?, confidence=? WHERE id=?", (pred, conf, news_id)
+        )
+        touch_data_version(conn)
         conn.commit()
-        flash(f"Prédiction ML : {pred.upper()}", "info")
+        bump_data_version()
+        if conf is not None:
+            flash(f"Prédiction ML : {pred.upper()} (confiance {conf:.0%})", "info")
+        else:
+            flash(f"Prédiction ML : {pred.upper()}", "info")
     conn.close()
     return redirect(url_for("index"))
 
@@ -190,14 +873,332 @@ def predict_all():
     return redirect(url_for("index"))
 
 
+@app.route("/api/news/bulk", methods=["POST"])
+def bulk_add_news():
+    """
+    Ajoute un lot d'articles (JSON ou NDJSON) : validation article par
+    article, insertion des articles valides en une transaction, puis scoring
+    des seules nouvelles lignes en un lot. Répond avec le résultat de chaque
+    article et la durée de chaque étape.
+    """
+    started = time.perf_counter()
+    rows, row_indexes, results = [], [], []
+    try:
+        for index, item, error in iter_bulk_items(request.stream, request.mimetype):
+            if index >= BULK_MAX_ITEMS:
+                raise BulkPayloadError(f"Plus de {BULK_MAX_ITEMS} articles par requête", 413)
+            if error is None:
+                row, error = validate_bulk_item(item)
+            if error is not None:
+                results.append({"index": index, "status": "error", "error": error})
+                continue
+            results.append({"index": index, "status": "created"})
+            row_indexes.append(len(results) - 1)
+            rows.append(row)
+    except BulkPayloadError as exc:
+        return {"status": "error", "error": str(exc)}, exc.status
+    validated = time.perf_counter()
+
+    ids = insert_rows(rows) if rows else []
+    inserted = time.perf_counter()
+    texts = [text_cache.article_text(row[0], row[1]) for row in rows]
+    preds = score_news(ids, texts)
+    scored = time.perf_counter()
+    if rows:
+        bump_data_version()
+
+    for position, news_id, (pred, conf) in zip(row_indexes, ids, preds):
+        results[position].update(id=news_id, predicted=pred, confidence=conf)
+    return {
+        "status":   "ok" if rows else "error",
+        "created":  len(rows),
+        "rejected": len(results) - len(rows),
+        "items":    results,
+        "timing_ms": {
+            "validate": round((validated - started) * 1000, 2),
+            "insert":   round((inserted - validated) * 1000, 2),
+            "score":    round((scored - inserted) * 1000, 2),
+            "total":    round((scored - started) * 1000, 2),
+        },
+    }, 201 if rows else 400
+
+
+@app.route("/admin/retrain", methods=["POST"])
+def admin_retrain():
+    """
+    Demande un ré-entraînement immédiat au thread d'entraînement (202).
+    Exige l'en-tête X-Admin-Token (voir _is_admin_request).
+    """
+    if not _is_admin_request():
+        return {"status": "forbidden"}, 403
+    _retrain_requested.set()
+    return {"status": "scheduled"}, 202
+
+
+PROFILE_SORTS = ("cumulative", "tottime", "calls")
+
+
+@app.route("/admin/profiles")
+def admin_profiles():
+    """Liste des requêtes profilées récentes, de la plus lente à la plus rapide."""
+    if not _is_admin_request():
+        return {"status": "forbidden"}, 403
+    profiles = profiling.list_profiles(PROFILE_DIR)
+    if request.args.get("format") == "json":
+        return {"profiles": profiles, "threshold_ms": PROFILE_THRESHOLD_MS}
+    return render_template("profiles.html", profiles=profiles,
+                           threshold_ms=PROFILE_THRESHOLD_MS, enabled=PROFILE_ENABLED)
+
+
+@app.route("/admin/profiles/<profile_id>")
+def admin_profile_detail(profile_id):
+    """Fonctions les plus coûteuses d'un profil (texte pstats) ; ?download=1 pour le .prof."""
+    if not _is_admin_request():
+        return {"status": "forbidden"}, 403
+    path = profiling.profile_path(PROFILE_DIR, profile_id)
+    if path is None:
+        abort(404)
+    if request.args.get("download"):
+        with open(path, "rb") as f:
+            data = f.read()
+        return data, 200, {"Content-Type": "application/octet-stream",
+                           "Content-Disposition": f"attachment; filename={profile_id}.prof"}
+    sort = request.args.get("sort", "cumulative")
+    if sort not in PROFILE_SORTS:
+        sort = "cumulative"
+    return profiling.report(path, sort), 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+
+@app.errorhandler(sqlite3.OperationalError)
+def handle_sqlite_error(exc):
+    """
+    Verrou SQLite non obtenu après SQLITE_TIMEOUT : 503 + Retry-After plutôt
+    qu'une erreur 500, et comptage exposé par /status.
+    """
+    global _sqlite_lock_errors
+    if not _is_lock_error(exc):
+        logger.exception("SQLite error: %s", exc)
+        return InternalServerError()
+    with _sqlite_lock_errors_lock:
+        _sqlite_lock_errors += 1
+    logger.warning("SQLite verrouillée sur %s : %s", request.path, exc)
+    return {"status": "busy", "error": "database is locked"}, 503, {"Retry-After": "1"}
+
+
+# ---------------------------------------------------------------------------
+# Démarrage : préchargement du modèle et sondes liveness / readiness
+# ---------------------------------------------------------------------------
+
+# Texte de la prédiction factice qui chauffe le pipeline au démarrage
+WARM_UP_TEXT = "Scientists confirm the results of the annual warm up survey"
+
+# Étapes de warm_up ; /readyz ne répond 200 qu'une fois "ready" atteint.
+# "model" : empreinte du dernier model.pkl contrôlé (valide ou non).
+_startup_state = {"phase": "starting", "ready": False, "error": None,
+                  "failed_step": None, "model": None, "timings_ms": {}}
+_startup_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+# Positionné par start_up(background=True) : les routes autres que les sondes
+# répondent 503 tant que l'application n'est pas prête (base pas encore migrée)
+_require_ready = threading.Event()
+
+
+def _set_startup(**fields):
+    with _startup_lock:
+        _startup_state.update(fields)
+
+
+def validate_model(pipeline):
+    """Lève ValueError si `pipeline` n'est pas un pipeline vectoriseur → classifieur real / fake entraîné."""
+    steps = getattr(pipeline, "named_steps", None) or {}
+    for name in ("vectorizer", "classifier"):
+        if name not in steps:
+            raise ValueError(f"Étape '{name}' absente du pipeline")
+    if not hasattr(steps["vectorizer"], "vocabulary_"):
+        raise ValueError("Vectoriseur non entraîné")
+    classes = {str(c) for c in getattr(steps["classifier"], "classes_", ())}
+    if len(classes) < 2 or not classes <= {"real", "fake"}:
+        raise ValueError(f"Classes inattendues : {sorted(classes)}")
+
+
+def _check_connection(db_path):
+    """Ouvre un fichier de la base (mode WAL, schéma lu) et vérifie la table news."""
+    conn = get_connection(db_path)
+    conn.execute("SELECT id FROM news LIMIT 1").fetchall()
+    conn.close()
+
+
+def _current_model():
+    """Empreinte de model.pkl, ou None s'il n'existe pas (encore)."""
+    try:
+        return model_fingerprint(MODEL_PATH)
+    except FileNotFoundError:
+        return None
+
+
+def _warm_model():
+    """
+    Charge et valide le modèle, puis fait une prédiction factice dans le pool
+    de prédiction : imports scikit-learn, dépickling et premier appel du
+    vectoriseur sont payés ici plutôt que par la première requête.
+    """
+    validate_model(load_model(MODEL_PATH))
+    [(label, confidence)] = run_prediction(predict_proba_batch, [WARM_UP_TEXT], MODEL_PATH)
+    if label not in ("real", "fake") or not 0.0 <= confidence <= 1.0:
+        raise ValueError(f"Prédiction de chauffe invalide : {label!r}, {confidence!r}")
+    # Scoreur des articles longs (ml/streaming.py), construit à la demande sinon
+    run_prediction(get_streaming_scorer, MODEL_PATH)
+
+
+def warm_up() -> bool:
+    """
+    Séquence de démarrage, dans l'ordre : migrations et données d'exemple,
+    ouverture de chaque fichier de la base (shards compris), chargement,
+    validation et chauffe du modèle s'il existe. Sans modèle, l'application
+    est prête et prédit 'unknown' jusqu'au premier entraînement.
+    Retourne True si l'application est prête ; en cas d'échec, /readyz
+    répond 503 avec l'erreur.
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    def step(phase, fn):
+        _set_startup(phase=phase)
+        t0 = time.perf_counter()
+        fn()
+        timings[phase] = round((time.perf_counter() - t0) * 1000, 1)
+
+    model = None
+    try:
+        os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+        step("database", init_db)
+        step("connections", lambda: sharding.fan_out(_check_connection, news_db_paths()))
+        model = _current_model()
+        if model is not None:
+            step("model", _warm_model)
+        else:
+            logger.info("Pas encore de modèle (%s) : prédictions 'unknown' "
+                        "jusqu'au premier entraînement", MODEL_PATH)
+    except Exception as exc:
+        logger.exception("Échec du démarrage")
+        _set_startup(phase="failed", ready=False, error=str(exc),
+                     failed_step=_startup_state["phase"], model=model, timings_ms=timings)
+        return False
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    _set_startup(phase="ready", ready=True, error=None, failed_step=None,
+                 model=model, timings_ms=timings)
+    logger.info("Application prête en %.0f ms (%s)", timings["total"], timings)
+    return True
+
+
+def start_up(start_training: bool = True, interval_seconds: float = TRAIN_MIN_INTERVAL,
+             background: bool = False):
+    """
+    Exécute warm_up, puis lance le thread de maintenance du journal des
+    prédictions (écriture périodique et purge, même sans entraînement, ex.
+    workers gunicorn) et le thread d'entraînement : le premier entraînement
+    ne peut plus démarrer avant la fin des migrations et des données
+    d'exemple. Avec `background`, la séquence tourne dans un thread
+    daemon : le serveur écoute aussitôt, /healthz répond, /readyz et les
+    autres routes répondent 503 jusqu'à la fin du préchargement.
+    """
+    def run():
+        warm_up()
+        if PREDICTION_LOG_ENABLED:
+            prediction_log.start_maintenance(DB_PATH, PREDICTION_LOG_RETENTION,
+                                             PREDICTION_LOG_FLUSH_INTERVAL)
+        if start_training:
+            threading.Thread(target=training_thread, args=(interval_seconds,),
+                             daemon=True).start()
+
+    if background:
+        _require_ready.set()
+        threading.Thread(target=run, name="startup", daemon=True).start()
+    else:
+        run()
+
+
+def refresh_readiness() -> bool:
+    """
+    Re-valide et chauffe le modèle si model.pkl a changé depuis le dernier
+    contrôle (ré-entraînement, rollback shadow, fichier remplacé à la main) :
+    /readyz repasse à 200 avec un modèle corrigé, ou à 503 si le nouveau
+    fichier est invalide. Sans effet pendant warm_up ou après un échec de la
+    base. Retourne l'état "ready".
+    """
+    if not _refresh_lock.acquire(blocking=False):
+        return _startup_state["ready"]     # contrôle déjà en cours
+    try:
+        with _startup_lock:
+            state = dict(_startup_state)
+        settled = state["phase"] == "ready" or state["failed_step"] == "model"
+        current = _current_model()
+        if not settled or current == state["model"]:
+            return state["ready"]
+        try:
+            if current is not None:
+                _warm_model()
+        except Exception as exc:
+            logger.exception("Modèle invalide : %s", MODEL_PATH)
+            _set_startup(phase="failed", ready=False, error=str(exc),
+                         failed_step="model", model=current)
+            return False
+        _set_startup(phase="ready", ready=True, error=None, failed_step=None, model=current)
+        logger.info("Modèle re-validé : %s", current)
+        return True
+    finally:
+        _refresh_lock.release()
+
+
+@app.before_request
+def _reject_until_ready():
+    """503 sur les routes hors sondes pendant un démarrage en arrière-plan."""
+    if (_require_ready.is_set() and not _startup_state["ready"]
+            and request.endpoint not in ("healthz", "readyz", "static")):
+        return {"status": "starting", "phase": _startup_state["phase"]}, 503, {"Retry-After": "1"}
+
+
+@app.route("/healthz")
+def healthz():
+    """Sonde de vivacité : le processus répond, même pendant le préchargement."""
+    return {"status": "alive"}
+
+
+@app.route("/readyz")
+def readyz():
+    """
+    Sonde de disponibilité : 200 une fois warm_up terminé, 503 avant ou en
+    cas d'échec. Un model.pkl modifié depuis est re-validé au passage.
+    """
+    refresh_readiness()
+    with _startup_lock:
+        state = dict(_startup_state)
+    if state["ready"]:
+        return state
+    return state, 503, {"Retry-After": "1"}
+
+
 @app.route("/status")
 def status():
     """Endpoint JSON simple pour les tests de charge/navigation."""
     model_ready = os.path.exists(MODEL_PATH)
-    conn = sqlite3.connect(DB_PATH)
-    count = conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
-    conn.close()
-    return {"status": "ok", "news_count": count, "model_ready": model_ready}
+    return {
+        "status":      "ok",
+        "news_count":  count_news(),
+        "shards":      SHARD_COUNT if SHARD_COUNT > 1 else None,
+        "model_ready": model_ready,
+        "ready":       _startup_state["ready"],
+        "startup_ms":  round(STARTUP_SECONDS * 1000, 1),
+        "sqlite_lock_errors": _sqlite_lock_errors,
+        "shadow":      shadow.status() if SHADOW_ENABLED else None,
+        "scheduler":   dict(_scheduler_state, inflight_requests=_inflight_requests),
+        "token_cache": text_cache.stats(),
+    }
+
+# Temps de chargement du module app (imports + définition des routes)
+STARTUP_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 
 # ---------------------------------------------------------------------------
@@ -205,11 +1206,8 @@ def status():
 # ---------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    os.makedirs("model", exist_ok=True)
-    init_db()
-
-    # Lancer le thread d'entraînement
-    t = threading.Thread(target=training_thread, args=(30,), daemon=True)
-    t.start()
+    # Préchargement puis thread d'entraînement, pendant que le serveur démarre
+    # (503 hors sondes jusqu'à la fin du préchargement)
+    start_up(background=True)
 
     app.run(debug=False, port=5000)
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+benchmarks/fuzz_load.py
+=======================
+Charge + fuzz concurrents contre un serveur local – TESE935
+
+Rejoue ou génère un trafic mixte depuis plusieurs threads :
+  - GET  /               (liste des news)
+  - GET  /status
+  - POST /add            (news normales, XSS, injections SQL, unicode, chaînes longues, vides)
+  - GET  /predict/<id>   (ids existants et inexistants)
+  - GET  /predict_all    (re-scoring complet, en concurrence avec les écritures)
+  - POST /api/news/bulk  (lots NDJSON mêlant articles valides et invalides)
+
+et rapporte débit, latences p50 / p99 et taux d'erreur par route, ainsi que
+la contention SQLite (réponses 503 et compteur `sqlite_lock_errors` de /status).
+
+Avec --spawn, le script démarre lui-même `serve.py` sur une copie jetable de
+la base, avec le thread d'entraînement actif (--train-interval), pour mesurer
+le service pendant les ré-entraînements.
+
+Lancement :
+    python benchmarks/fuzz_load.py --spawn --concurrency 16 --duration 20
+    python benchmarks/fuzz_load.py --url http://127.0.0.1:5000 --record traffic.jsonl
+    python benchmarks/fuzz_load.py --url http://127.0.0.1:5000 --replay traffic.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import percentile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Poids relatifs des routes dans le trafic généré
+TRAFFIC_MIX = {
+    "index":       40,
+    "status":      20,
+    "add":         20,
+    "predict":     15,
+    "predict_all":  5,
+    "bulk":         2,
+}
+
+FUZZ_PAYLOADS = [
+    "<script>alert('xss')</script>",
+    "'; DROP TABLE news; --",
+    "\" OR 1=1 --",
+    "🔥🚀💉🦠🤖 Titre bizarre 中文 العربية",
+    str(10**100),
+    "",
+]
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Mesure la route elle-même : les 302 ne sont pas suivis."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+# ──────────────────────────────────────────────────────────────
+# Génération du trafic
+# ──────────────────────────────────────────────────────────────
+
+def random_text(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(string.printable) for _ in range(length))
+
+
+def make_add_form(rng: random.Random) -> dict:
+    """Formulaire /add : news plausible ou donnée de fuzz."""
+    kind = rng.random()
+    if kind < 0.5:
+        title = "Load test news " + random_text(rng, 12)
+        content = " ".join(rng.choice(["vaccine", "NASA", "secret", "microchips", "study",
+                                       "government", "research", "aliens"])
+                           for _ in range(rng.randint(10, 60)))
+    elif kind < 0.8:
+        title, content = rng.choice(FUZZ_PAYLOADS), rng.choice(FUZZ_PAYLOADS)
+    else:
+        title, content = random_text(rng, rng.randint(1, 1000)), random_text(rng, rng.randint(1, 5000))
+    label = rng.choice(["real", "fake", "real", "fake", "INVALID_LABEL"])
+    return {"title": title, "content": content, "source": "https://fuzz.test", "label": label}
+
+
+def generate_traffic(n: int, seed: int = 42, max_id: int = 100) -> list:
+    """Liste de `n` requêtes {route, method, path, form} tirées selon TRAFFIC_MIX."""
+    rng = random.Random(seed)
+    routes, weights = zip(*TRAFFIC_MIX.items())
+    traffic = []
+    for route in rng.choices(routes, weights=weights, k=n):
+        if route == "index":
+            req = {"method": "GET", "path": "/"}
+        elif route == "status":
+            req = {"method": "GET", "path": "/status"}
+        elif route == "add":
+            req = {"method": "POST", "path": "/add", "form": make_add_form(rng)}
+        elif route == "predict":
+            # ~10 % d'ids inexistants
+            news_id = rng.randint(1, max_id) if rng.random() < 0.9 else rng.randint(10**6, 10**7)
+            req = {"method": "GET", "path": f"/predict/{news_id}"}
+        elif route == "bulk":
+            lines = [json.dumps(make_add_form(rng)) for _ in range(rng.randint(1, 200))]
+            if rng.random() < 0.3:
+                lines.append(rng.choice(FUZZ_PAYLOADS))      # ligne non JSON
+            req = {"method": "POST", "path": "/api/news/bulk",
+                   "body": "\n".join(lines), "content_type": "application/x-ndjson"}
+        else:
+            req = {"method": "GET", "path": "/predict_all"}
+        req["route"] = route
+        traffic.append(req)
+    return traffic
+
+
+# ──────────────────────────────────────────────────────────────
+# Exécution
+# ──────────────────────────────────────────────────────────────
+
+def send(base_url: str, req: dict) -> int:
+    """Envoie une requête et retourne le code HTTP (0 si erreur réseau)."""
+    data, headers = None, {}
+    if req.get("form") is not None:
+        data = urllib.parse.urlencode(req["form"]).encode("utf-8")
+    elif req.get("body") is not None:
+        data = req["body"].encode("utf-8", "surrogatepass")
+        headers["Content-Type"] = req["content_type"]
+    request = urllib.request.Request(base_url + req["path"], data=data,
+                                     headers=headers, method=req["method"])
+    try:
+        with _opener.open(request, timeout=60) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except (urllib.error.URLError, OSError):
+        return 0
+
+
+def get_status(base_url: str) -> dict:
+    try:
+        with urllib.request.urlopen(base_url + "/status", timeout=10) as resp:
+            return json.loads(resp.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return {}
+
+
+def is_ready(base_url: str) -> bool:
+    """True quand /readyz répond 200 (modèle préchargé, base initialisée)."""
+    try:
+        with urllib.request.urlopen(base_url + "/readyz", timeout=10) as resp:
+            return resp.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def run(base_url: str, traffic: list, concurrency: int, duration: float) -> dict:
+    """
+    Rejoue `traffic` en boucle depuis `concurrency` threads pendant `duration`
+    secondes. Retourne {route: [(latence_s, code), ...]} et la durée réelle.
+    """
+    samples = {route: [] for route in TRAFFIC_MIX}
+    lock = threading.Lock()
+    cursor = {"next": 0}
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        local = []
+        while time.perf_counter() < deadline:
+            with lock:
+                req = traffic[cursor["next"] % len(traffic)]
+                cursor["next"] += 1
+            start = time.perf_counter()
+            code = send(base_url, req)
+            local.append((req["route"], time.perf_counter() - start, code))
+        with lock:
+            for route, latency, code in local:
+                samples.setdefault(route, []).append((latency, code))
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - start
+
+
+def report(samples: dict, elapsed: float, lock_errors: int) -> None:
+    total = sum(len(v) for v in samples.values())
+    print(f"\n=== FUZZ + CHARGE — {total} requêtes en {elapsed:.1f}s "
+          f"({total / elapsed if elapsed else 0:.1f} req/s) ===")
+    print(f"  {'route':<12} {'n':>7} {'p50 ms':>9} {'p99 ms':>9} {'5xx':>6} {'503':>6} {'réseau':>7}")
+    for route, values in samples.items():
+        if not values:
+            continue
+        latencies = sorted(lat for lat, _ in values)
+        codes = [code for _, code in values]
+        print(f"  {route:<12} {len(values):>7} "
+              f"{percentile(latencies, 50) * 1000:>9.1f} {percentile(latencies, 99) * 1000:>9.1f} "
+              f"{sum(1 for c in codes if c >= 500):>6} {codes.count(503):>6} {codes.count(0):>7}")
+    errors = sum(1 for v in samples.values() for _, c in v if c >= 500 or c == 0)
+    print(f"  taux d'erreur : {errors / total * 100 if total else 0:.2f}%")
+    print(f"  contention SQLite (sqlite_lock_errors côté serveur) : {lock_errors}")
+
+
+def spawn_server(port: int, train_interval: int):
+    """Démarre serve.py sur une copie jetable de news.db ; retourne (process, tmpdir)."""
+    tmpdir = tempfile.mkdtemp(prefix="fakenews_load_")
+    db_path = os.path.join(tmpdir, "news.db")
+    src_db = os.path.join(ROOT_DIR, "news.db")
+    if os.path.exists(src_db):
+        shutil.copy(src_db, db_path)
+    env = dict(os.environ,
+               FAKENEWS_DB_PATH=db_path,
+               FAKENEWS_MODEL_PATH=os.path.join(tmpdir, "model", "model.pkl"))
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT_DIR, "serve.py"), "--port", str(port),
+         "--train-interval", str(train_interval)],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        if is_ready(base_url):
+            break
+        time.sleep(0.1)
+    return proc, tmpdir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charge + fuzz concurrents")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="Taille du trafic généré (rejoué en boucle)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--replay", default=None, help="Fichier JSONL de requêtes à rejouer")
+    parser.add_argument("--record", default=None, help="Enregistrer le trafic généré en JSONL")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Démarrer serve.py sur une base jetable (entraînement actif)")
+    parser.add_argument("--port", type=int, default=5055, help="Port utilisé avec --spawn")
+    parser.add_argument("--train-interval", type=int, default=5)
+    args = parser.parse_args()
+
+    proc = tmpdir = None
+    base_url = args.url.rstrip("/")
+    if args.spawn:
+        proc, tmpdir = spawn_server(args.port, args.train_interval)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        before = get_status(base_url)
+        if args.replay:
+            with open(args.replay, encoding="utf-8") as f:
+                traffic = [json.loads(line) for line in f if line.strip()]
+        else:
+            max_id = max(1, before.get("news_count", 100))
+            traffic = generate_traffic(args.requests, seed=args.seed, max_id=max_id)
+        if args.record:
+            with open(args.record, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(req, ensure_ascii=False) + "\n" for req in traffic)
+
+        samples, elapsed = run(base_url, traffic, args.concurrency, args.duration)
+        after = get_status(base_url)
+        lock_errors = after.get("sqlite_lock_errors", 0) - before.get("sqlite_lock_errors", 0)
+        report(samples, elapsed, lock_errors)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
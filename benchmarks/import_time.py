@@ -0,0 +1,91 @@
+"""
+benchmarks/import_time.py
+=========================
+Profil du temps d'import / démarrage – TESE935
+
+Lance `python -X importtime -c "import <module>"` dans un sous-processus
+propre (plusieurs répétitions), puis affiche :
+  - le temps de démarrage médian (wall-clock, interpréteur compris),
+  - le temps cumulé d'import du module,
+  - les modules les plus coûteux,
+  - si scikit-learn a été importé (il ne doit pas l'être pour `app`).
+
+Avec --output, chaque mesure est ajoutée en JSON (une ligne) au fichier
+indiqué pour suivre l'évolution du temps de démarrage.
+
+Lancement :
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module ml.predictor --repeat 5 --output startup.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_import(module: str) -> dict:
+    """Importe `module` dans un interpréteur neuf et retourne les mesures."""
+    code = f"import sys, {module}; print('sklearn' in sys.modules)"
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+
+    # Lignes : "import time: self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, _, cum_us, name = [part.strip() for part in line.replace(":", "|", 1).split("|")]
+        cumulative[name] = int(cum_us)
+
+    return {
+        "wall_s":         wall,
+        "import_us":      cumulative.get(module, 0),
+        "sklearn_loaded": proc.stdout.strip() == "True",
+        "top":            sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil du temps d'import")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None,
+                        help="Fichier JSONL où ajouter la mesure")
+    args = parser.parse_args()
+
+    runs = [profile_import(args.module) for _ in range(args.repeat)]
+    wall = statistics.median(r["wall_s"] for r in runs)
+    import_us = statistics.median(r["import_us"] for r in runs)
+    last = runs[-1]
+
+    print(f"=== import {args.module} ({args.repeat} runs) ===")
+    print(f"  démarrage médian : {wall * 1000:.1f} ms (interpréteur compris)")
+    print(f"  import du module : {import_us / 1000:.1f} ms")
+    print(f"  sklearn chargé   : {'oui' if last['sklearn_loaded'] else 'non'}")
+    print("  modules les plus coûteux (cumulé) :")
+    for name, us in last["top"]:
+        print(f"    {us / 1000:8.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "timestamp":      time.time(),
+                "module":         args.module,
+                "startup_ms":     round(wall * 1000, 1),
+                "import_ms":      round(import_us / 1000, 1),
+                "sklearn_loaded": last["sklearn_loaded"],
+            }) + "\n")
+
+
+if __name__ == "__main__":
+    main()
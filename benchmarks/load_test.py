@@ -0,0 +1,90 @@
+"""
+benchmarks/load_test.py
+=======================
+Test de charge HTTP minimal (bibliothèque standard uniquement) – TESE935
+
+Envoie des requêtes GET en parallèle pendant une durée fixe et affiche
+le débit (req/s) et les latences p50 / p99. Permet de comparer le serveur
+de développement (`python app.py`) au mode production (`python serve.py`).
+
+Lancement :
+    python app.py                       # ou : python serve.py --threads 8
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --concurrency 16 --duration 10
+"""
+
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def percentile(values: list, pct: float) -> float:
+    """Percentile par rang le plus proche (values doit être trié)."""
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))
+    return values[k]
+
+
+def worker(base_url: str, paths: list, deadline: float, results: list, lock: threading.Lock):
+    """Boucle de requêtes d'un client jusqu'à `deadline`."""
+    latencies, errors, i = [], 0, 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + path, timeout=30) as resp:
+                resp.read()
+        except (urllib.error.URLError, OSError):
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    with lock:
+        results.append((latencies, errors))
+
+
+def run(base_url: str, paths: list, concurrency: int, duration: float) -> dict:
+    """Lance `concurrency` clients pendant `duration` secondes et agrège les mesures."""
+    results, lock = [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, paths, deadline, results, lock))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(lat for lats, _ in results for lat in lats)
+    errors = sum(err for _, err in results)
+    return {
+        "requests":  len(latencies),
+        "errors":    errors,
+        "rps":       len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms":    percentile(latencies, 50) * 1000,
+        "p99_ms":    percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge HTTP")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--paths", default="/,/status",
+                        help="Routes séparées par des virgules, jouées en tourniquet")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    stats = run(args.url.rstrip("/"), args.paths.split(","), args.concurrency, args.duration)
+    print(f"=== {args.url} — {args.concurrency} clients, {args.duration:.0f}s ===")
+    print(f"  requêtes : {stats['requests']}  (erreurs : {stats['errors']})")
+    print(f"  débit    : {stats['rps']:.1f} req/s")
+    print(f"  latence  : p50 {stats['p50_ms']:.1f} ms — p99 {stats['p99_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+benchmarks/long_articles.py
+===========================
+Scoring des articles longs : pipeline vs scoring en flux – TESE935
+
+Entraîne un modèle sur une base synthétique jetable, puis score des articles
+de plus en plus longs avec pipeline.predict_proba et avec StreamingScorer
+(ml/streaming.py). Affiche la durée, le pic d'allocation mesuré par
+tracemalloc et l'écart maximal entre les probabilités.
+
+Lancement :
+    python benchmarks/long_articles.py
+    python benchmarks/long_articles.py --chars 5000 100000 2000000
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+
+from migrations import migrate
+from ml.predictor import load_model
+from ml.streaming import StreamingScorer
+from ml.trainer import train_model
+from seed_data import write_synthetic_sqlite
+
+
+def measure(fn):
+    """(durée en secondes, pic d'allocation en octets) d'un appel."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du scoring des articles longs")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--chars", type=int, nargs="+", default=[5000, 100000, 1000000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="fakenews_long_")
+    db_path = os.path.join(tmpdir, "news.db")
+    model_path = os.path.join(tmpdir, "model.pkl")
+    try:
+        conn = sqlite3.connect(db_path)
+        migrate(conn)
+        conn.close()
+        write_synthetic_sqlite(db_path, args.rows, seed=args.seed)
+        train_model(db_path, model_path, evaluation="skip", record_run=False)
+        pipeline = load_model(model_path)
+        scorer = StreamingScorer.from_pipeline(pipeline)
+
+        # Articles longs : concaténation des articles de la base
+        conn = sqlite3.connect(db_path)
+        corpus = " ".join(row[0] for row in conn.execute("SELECT title || ' ' || content FROM news"))
+        conn.close()
+
+        print(f"{'caractères':>12} {'mode':>9} {'durée':>10} {'pic mémoire':>12}")
+        for n_chars in args.chars:
+            text = (corpus * (n_chars // len(corpus) + 1))[:n_chars]
+            expected, pipe_s, pipe_peak = measure(lambda: pipeline.predict_proba([text])[0])
+            got, stream_s, stream_peak = measure(lambda: scorer.predict_proba_one(text))
+            print(f"{n_chars:>12} {'pipeline':>9} {pipe_s * 1000:>8.1f}ms {pipe_peak / 1024 ** 2:>9.2f} Mo")
+            print(f"{n_chars:>12} {'flux':>9} {stream_s * 1000:>8.1f}ms {stream_peak / 1024 ** 2:>9.2f} Mo"
+                  f"   écart max {np.abs(expected - got).max():.1e}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+benchmarks/shard_ingest.py
+==========================
+Débit d'ingestion : un seul fichier SQLite contre N shards – TESE935
+
+Plusieurs threads insèrent des news synthétiques par petites transactions
+(comme des appels concurrents à /add), d'abord dans une seule base, puis
+réparties sur N shards (voir sharding.py). Affiche le débit (lignes/s) et
+le nombre de transactions ayant dû attendre le verrou d'écriture.
+
+Lancement :
+    python benchmarks/shard_ingest.py --rows 50000 --writers 8 --shards 1,2,4,8
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import sharding
+from migrations import migrate, touch_data_version
+from seed_data import generate_synthetic_batches
+
+
+def open_db(path: str):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def ingest(db_path: str, n_shards: int, rows: list, writers: int, txn_size: int) -> dict:
+    """Insère `rows` depuis `writers` threads ; retourne débit et attentes de verrou."""
+    paths = sharding.shard_paths(db_path, n_shards) if n_shards > 1 else [db_path]
+    for path in paths:
+        conn = open_db(path)
+        migrate(conn)
+        conn.close()
+
+    waits = [0]
+    lock = threading.Lock()
+
+    def writer(part):
+        conns = [open_db(path) for path in paths]
+        local_waits = 0
+        for i in range(0, len(part), txn_size):
+            batch = part[i:i + txn_size]
+            groups = ({0: batch} if n_shards <= 1 else sharding.group_by_shard(
+                batch, lambda row: sharding.pick_shard(row[0], row[1], n_shards)))
+            for shard, group in groups.items():
+                conn = conns[shard]
+                start = time.perf_counter()
+                conn.execute("BEGIN IMMEDIATE")
+                local_waits += time.perf_counter() - start > 0.001
+                if n_shards > 1:
+                    sharding.insert_rows(conn, shard, n_shards, group)
+                else:
+                    conn.executemany(
+                        "INSERT INTO news (title, content, source, label) VALUES (?, ?, ?, ?)",
+                        group)
+                touch_data_version(conn)
+                conn.commit()
+        for conn in conns:
+            conn.close()
+        with lock:
+            waits[0] += local_waits
+
+    parts = [rows[k::writers] for k in range(writers)]
+    threads = [threading.Thread(target=writer, args=(part,)) for part in parts]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {"rows_per_s": len(rows) / elapsed, "elapsed": elapsed, "lock_waits": waits[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion concurrente : 1 base contre N shards")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--txn-size", type=int, default=20, help="Lignes par transaction")
+    parser.add_argument("--shards", default="1,2,4,8", help="Nombres de shards à comparer")
+    args = parser.parse_args()
+
+    rows = [row for batch in generate_synthetic_batches(args.rows) for row in batch]
+    print(f"{len(rows)} news, {args.writers} écrivains, {args.txn_size} lignes par transaction")
+    print(f"  {'shards':>6} {'lignes/s':>10} {'durée s':>8} {'attentes verrou':>16}")
+    for n_shards in (int(x) for x in args.shards.split(",")):
+        tmpdir = tempfile.mkdtemp(prefix="fakenews_shards_")
+        try:
+            result = ingest(os.path.join(tmpdir, "news.db"), n_shards, rows,
+                            args.writers, args.txn_size)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        print(f"  {n_shards:>6} {result['rows_per_s']:>10.0f} {result['elapsed']:>8.2f}"
+              f" {result['lock_waits']:>16}")
+
+
+if __name__ == "__main__":
+    main()
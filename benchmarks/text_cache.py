@@ -0,0 +1,92 @@
+"""
+benchmarks/text_cache.py
+========================
+Effet du cache de tokenisation sur le ré-entraînement et le re-scoring – TESE935
+
+Sur une base synthétique jetable, enchaîne le cycle du thread d'entraînement
+(train_model puis re-scoring de toutes les news) plusieurs fois, avec le
+cache désactivé puis activé, et affiche les durées ainsi que le taux de
+succès et le volume de texte non re-tokenisé.
+
+Lancement :
+    python benchmarks/text_cache.py --rows 20000 --cycles 3
+    python benchmarks/text_cache.py --rows 20000 --cache-mb 16
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from migrations import migrate
+from ml import text_cache
+from ml.predictor import predict_proba_batch
+from ml.trainer import train_model
+from seed_data import write_synthetic_sqlite
+
+
+def load_texts(db_path: str) -> list:
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT title, content FROM news").fetchall()
+    conn.close()
+    return [text_cache.article_text(title, content) for title, content in rows]
+
+
+def run_cycles(db_path: str, model_path: str, cycles: int, max_bytes: int) -> list:
+    """Retourne [(durée entraînement, durée re-scoring), ...] pour un réglage du cache."""
+    text_cache.configure(max_bytes)
+    text_cache.clear()
+    timings = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        train_model(db_path, model_path, evaluation="skip", record_run=False)
+        trained = time.perf_counter()
+        predict_proba_batch(load_texts(db_path), model_path)
+        timings.append((trained - start, time.perf_counter() - trained))
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    stats = text_cache.stats()
+    print(f"\n=== {name} ===")
+    for i, (train_s, score_s) in enumerate(timings, 1):
+        print(f"  cycle {i} : entraînement {train_s:6.2f}s   re-scoring {score_s:6.2f}s")
+    hit_rate = f"{stats['hit_rate'] * 100:.1f}%" if stats["hit_rate"] is not None else "-"
+    print(f"  succès {stats['hits']}  échecs {stats['misses']}  taux {hit_rate}")
+    print(f"  texte non re-tokenisé : {stats['bytes_saved'] / 1024 ** 2:.1f} Mo"
+          f"   taille du cache : {stats['cached_bytes'] / 1024 ** 2:.1f} Mo ({stats['entries']} entrées)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du cache de tokenisation")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--cache-mb", type=float, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="fakenews_textcache_")
+    db_path = os.path.join(tmpdir, "news.db")
+    model_path = os.path.join(tmpdir, "model.pkl")
+    try:
+        conn = sqlite3.connect(db_path)
+        migrate(conn)
+        conn.close()
+        write_synthetic_sqlite(db_path, args.rows, seed=args.seed)
+        print(f"Base synthétique : {args.rows} news ({db_path})")
+
+        report("sans cache", run_cycles(db_path, model_path, args.cycles, 0))
+        report(f"cache {args.cache_mb:.0f} Mo", run_cycles(
+            db_path, model_path, args.cycles, int(args.cache_mb * 1024 * 1024)))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+migrations.py
+=============
+Migrations versionnées du schéma SQLite – TESE935
+
+La version du schéma est stockée dans `PRAGMA user_version`. Chaque migration
+est appliquée une seule fois, dans sa propre transaction (BEGIN IMMEDIATE),
+avec la mise à jour de user_version : une base existante (news.db) est donc
+amenée à jour sans perte, et une migration interrompue est annulée en entier.
+
+Pour faire évoluer le schéma : ajouter une fonction `_vN_...(conn)` et
+l'enregistrer à la fin de MIGRATIONS. Ne jamais modifier une migration publiée.
+"""
+
+import sqlite3
+
+
+def _v1_create_news(conn):
+    """Table news d'origine."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS news (
+            id        INTEGER PRIMARY KEY AUTOINCREMENT,
+            title     TEXT NOT NULL,
+            content   TEXT NOT NULL,
+            source    TEXT,
+            label     TEXT NOT NULL DEFAULT 'unknown',
+            predicted TEXT DEFAULT NULL,
+            created   DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _v2_add_confidence(conn):
+    """Colonne confidence (probabilité de la prédiction) et son index."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(news)")]
+    if "confidence" not in columns:
+        conn.execute("ALTER TABLE news ADD COLUMN confidence REAL DEFAULT NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_news_confidence ON news(confidence)")
+
+
+def _v3_create_training_runs(conn):
+    """Historique des entraînements (schéma de la version 3, figé)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS training_runs (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at  DATETIME DEFAULT CURRENT_TIMESTAMP,
+            duration_s  REAL NOT NULL,
+            n_samples   INTEGER NOT NULL,
+            evaluation  TEXT NOT NULL,
+            n_eval      INTEGER NOT NULL DEFAULT 0,
+            accuracy    REAL,
+            precision   REAL,
+            recall      REAL,
+            model_bytes INTEGER
+        )
+    """)
+
+
+def _v4_add_news_indexes(conn):
+    """
+    Index des requêtes fréquentes :
+      - label   : chargement du jeu d'entraînement (label IN ('real', 'fake')),
+      - created : liste de la page d'accueil (ORDER BY created DESC, sans tri),
+      - partiel sur predicted IS NULL : news pas encore prédites.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_news_label ON news(label)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_news_created ON news(created)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_news_unscored ON news(id) WHERE predicted IS NULL"
+    )
+
+
+def _v5_add_training_peak_rss(conn):
+    """Colonne peak_rss_bytes de training_runs (pic mémoire par entraînement)."""
+    # Les bases migrées avant que la v3 soit figée ont déjà la colonne
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(training_runs)")]
+    if "peak_rss_bytes" not in columns:
+        conn.execute("ALTER TABLE training_runs ADD COLUMN peak_rss_bytes INTEGER")
+
+
+def _v6_create_prediction_log(conn):
+    """Journal d'audit des prédictions en ajout seul (voir prediction_log.py)."""
+    import prediction_log
+    prediction_log.create_tables(conn)
+
+
+def _v7_create_data_version(conn):
+    """
+    Compteur de modifications de la table news, incrémenté par trigger dans
+    la transaction de chaque écriture : tous les processus (workers gunicorn,
+    entraînement, scripts) voient la même version (cache de la page d'accueil).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            id      INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS news_data_version_{event.lower()}
+            AFTER {event} ON news
+            BEGIN
+                UPDATE data_version SET version = version + 1 WHERE id = 1;
+            END
+        """)
+
+
+def _v8_drop_data_version_triggers(conn):
+    """
+    Supprime les triggers de la v7 : exécutés une fois par ligne, ils
+    doublaient le coût d'un re-scoring complet. La version est désormais
+    incrémentée une fois par transaction d'écriture (touch_data_version).
+    """
+    for event in ("insert", "update", "delete"):
+        conn.execute(f"DROP TRIGGER IF EXISTS news_data_version_{event}")
+
+
+def _v9_analyze_news(conn):
+    """
+    Statistiques du planificateur (sqlite_stat1) pour news. Sans elles,
+    idx_news_label (peu sélectif, non couvrant) est préféré à un parcours de
+    table pour lire le jeu d'entraînement, plus lentement. Rafraîchies
+    ensuite après chaque entraînement (app.run_training_cycle).
+    """
+    conn.execute("ANALYZE news")
+
+
+# (version, description, fonction) — versions strictement croissantes
+MIGRATIONS = [
+    (1, "table news", _v1_create_news),
+    (2, "colonne confidence", _v2_add_confidence),
+    (3, "table training_runs", _v3_create_training_runs),
+    (4, "index label / created / predicted IS NULL", _v4_add_news_indexes),
+    (5, "colonne training_runs.peak_rss_bytes", _v5_add_training_peak_rss),
+    (6, "tables model_versions / prediction_log", _v6_create_prediction_log),
+    (7, "table data_version + triggers sur news", _v7_create_data_version),
+    (8, "suppression des triggers data_version", _v8_drop_data_version_triggers),
+    (9, "statistiques ANALYZE de news", _v9_analyze_news),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Version du schéma de la base ouverte par `conn` (0 si jamais migrée)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def touch_data_version(conn: sqlite3.Connection) -> None:
+    """
+    Incrémente la version partagée des données (cache de la page d'accueil de
+    tous les processus). À appeler dans la transaction de chaque écriture de
+    la table news, une fois par transaction et non par ligne.
+    """
+    conn.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+
+
+def migrate(conn: sqlite3.Connection) -> list:
+    """
+    Applique les migrations manquantes, dans l'ordre.
+    Retourne la liste des versions appliquées.
+    """
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if get_schema_version(conn) >= version:
+            continue
+        # Verrou d'écriture pris avant de relire la version : deux processus
+        # qui démarrent en même temps n'appliquent pas deux fois la migration.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
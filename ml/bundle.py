@@ -0,0 +1,212 @@
+"""
+Module ML – Export du modèle en bundle portable
+TESE935
+
+`model.pkl` dépend des versions exactes de Python et de scikit-learn, et son
+chargement importe toute la pile sklearn. `export_bundle` écrit à la place
+un zip versionné, lisible partout :
+
+    manifest.json          format, version, configuration de l'analyseur,
+                           classes, empreinte du modèle source
+    vocabulary.json        termes dans l'ordre des colonnes du vectoriseur
+    stop_words.json        liste des mots vides (résolue, ex. "english")
+    class_log_prior.npy    MultinomialNB.class_log_prior_   (n_classes,)
+    feature_log_prob.npy   MultinomialNB.feature_log_prob_  (n_classes, n_features)
+
+`load_bundle` ne dépend que de la bibliothèque standard et de NumPy : il
+refait la tokenisation de CountVectorizer (minuscules, token_pattern, mots
+vides, n-grammes) et le calcul de MultinomialNB, pour des petits services
+de scoring sans scikit-learn.
+
+Export / scoring en ligne de commande :
+    python -m ml.bundle export model/model.pkl model/model.bundle.zip
+    echo "Aliens landed in Paris" | python -m ml.bundle score model/model.bundle.zip
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+
+import numpy as np
+
+BUNDLE_FORMAT  = "fakenews-nb-bundle"
+BUNDLE_VERSION = 1
+
+
+def _analyzer_config(vectorizer) -> dict:
+    """Configuration de tokenisation d'un CountVectorizer (analyseur intégré ou CachedAnalyzer)."""
+    analyzer = vectorizer.analyzer
+    if callable(analyzer):
+        ngram_range, stop_words = analyzer.ngram_range, analyzer.stop_words
+    elif analyzer == "word":
+        ngram_range, stop_words = vectorizer.ngram_range, vectorizer.stop_words
+    else:
+        raise ValueError(f"Analyseur non exportable : {analyzer!r}")
+    if vectorizer.preprocessor is not None or vectorizer.tokenizer is not None \
+            or vectorizer.strip_accents is not None:
+        raise ValueError("preprocessor / tokenizer / strip_accents personnalisés non exportables")
+
+    if stop_words == "english":
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        stop_words = ENGLISH_STOP_WORDS
+    return {
+        "lowercase":     bool(vectorizer.lowercase),
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range":   list(ngram_range),
+        "stop_words":    sorted(stop_words or ()),
+    }
+
+
+def _npy_bytes(array) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array, dtype=np.float64), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def export_bundle(model_path: str, bundle_path: str) -> dict:
+    """
+    Écrit le bundle du pipeline `model_path` dans `bundle_path` (écriture
+    atomique). Retourne le manifeste.
+    """
+    from ml.predictor import load_model, model_fingerprint
+
+    pipeline = load_model(model_path)
+    vectorizer = pipeline.named_steps["vectorizer"]
+    classifier = pipeline.named_steps["classifier"]
+    if not hasattr(classifier, "feature_log_prob_"):
+        raise ValueError(f"Classifieur non exportable : {type(classifier).__name__}")
+
+    config = _analyzer_config(vectorizer)
+    vocabulary = [None] * len(vectorizer.vocabulary_)
+    for term, index in vectorizer.vocabulary_.items():
+        vocabulary[index] = term
+
+    manifest = {
+        "format":       BUNDLE_FORMAT,
+        "version":      BUNDLE_VERSION,
+        "created_at":   int(time.time()),
+        "source_model": model_fingerprint(model_path),
+        "classes":      [str(c) for c in classifier.classes_],
+        "n_features":   len(vocabulary),
+        "lowercase":    config["lowercase"],
+        "token_pattern": config["token_pattern"],
+        "ngram_range":  config["ngram_range"],
+    }
+
+    os.makedirs(os.path.dirname(bundle_path) or ".", exist_ok=True)
+    tmp_path = bundle_path + ".tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+        zf.writestr("vocabulary.json", json.dumps(vocabulary, ensure_ascii=False))
+        zf.writestr("stop_words.json", json.dumps(config["stop_words"]))
+        zf.writestr("class_log_prior.npy", _npy_bytes(classifier.class_log_prior_))
+        zf.writestr("feature_log_prob.npy", _npy_bytes(classifier.feature_log_prob_))
+    os.replace(tmp_path, bundle_path)
+    return manifest
+
+
+class BundleScorer:
+    """
+    Scoreur MultinomialNB chargé depuis un bundle : mêmes tokens que
+    CountVectorizer, mêmes probabilités que pipeline.predict_proba.
+    """
+
+    def __init__(self, manifest, vocabulary, stop_words, class_log_prior, feature_log_prob):
+        self.manifest = manifest
+        self.classes = manifest["classes"]
+        self.lowercase = manifest["lowercase"]
+        self.ngram_range = tuple(manifest["ngram_range"])
+        self.stop_words = frozenset(stop_words)
+        self.vocabulary = {term: i for i, term in enumerate(vocabulary)}
+        self.class_log_prior = class_log_prior
+        # (n_features, n_classes) : les lignes d'un document sont contiguës
+        self.feature_log_prob_t = np.ascontiguousarray(feature_log_prob.T)
+        self._token_re = re.compile(manifest["token_pattern"])
+
+    def analyze(self, text: str) -> list:
+        """Tokens et n-grammes d'un texte, comme CountVectorizer.build_analyzer()."""
+        if self.lowercase:
+            text = text.lower()
+        tokens = [t for t in self._token_re.findall(text) if t not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        ngrams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            ngrams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return ngrams
+
+    def joint_log_likelihood(self, texts: list):
+        """Log-vraisemblance jointe (n_textes, n_classes), comme MultinomialNB."""
+        jll = np.tile(self.class_log_prior, (len(texts), 1))
+        vocabulary = self.vocabulary
+        for row, text in enumerate(texts):
+            indices = [vocabulary[t] for t in self.analyze(text) if t in vocabulary]
+            if indices:
+                jll[row] += self.feature_log_prob_t[indices].sum(axis=0)
+        return jll
+
+    def predict_proba(self, texts: list):
+        jll = self.joint_log_likelihood(texts)
+        jll -= jll.max(axis=1, keepdims=True)
+        probas = np.exp(jll)
+        probas /= probas.sum(axis=1, keepdims=True)
+        return probas
+
+    def predict(self, texts: list) -> list:
+        best = self.joint_log_likelihood(texts).argmax(axis=1)
+        return [self.classes[k] for k in best]
+
+    def predict_proba_batch(self, texts: list) -> list:
+        """[(label, confiance), ...], même format que ml.predictor.predict_proba_batch."""
+        if not texts:
+            return []
+        probas = self.predict_proba(texts)
+        best = probas.argmax(axis=1)
+        return [(self.classes[k], float(probas[i, k])) for i, k in enumerate(best)]
+
+
+def load_bundle(bundle_path: str) -> BundleScorer:
+    """Charge un bundle (bibliothèque standard + NumPy uniquement)."""
+    with zipfile.ZipFile(bundle_path) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"{bundle_path} n'est pas un bundle {BUNDLE_FORMAT}")
+        if manifest.get("version", 0) > BUNDLE_VERSION:
+            raise ValueError(f"Version de bundle {manifest['version']} non supportée "
+                             f"(max {BUNDLE_VERSION})")
+        vocabulary = json.loads(zf.read("vocabulary.json"))
+        stop_words = json.loads(zf.read("stop_words.json"))
+        class_log_prior = np.load(io.BytesIO(zf.read("class_log_prior.npy")), allow_pickle=False)
+        feature_log_prob = np.load(io.BytesIO(zf.read("feature_log_prob.npy")), allow_pickle=False)
+    if feature_log_prob.shape != (len(manifest["classes"]), len(vocabulary)):
+        raise ValueError(f"Bundle incohérent : feature_log_prob {feature_log_prob.shape}")
+    return BundleScorer(manifest, vocabulary, stop_words, class_log_prior, feature_log_prob)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle portable du modèle")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="model.pkl → bundle zip")
+    export.add_argument("model_path")
+    export.add_argument("bundle_path")
+    score = sub.add_parser("score", help="Score les lignes de l'entrée standard")
+    score.add_argument("bundle_path")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        manifest = export_bundle(args.model_path, args.bundle_path)
+        print(f"{args.bundle_path} : {manifest['n_features']} termes, "
+              f"{os.path.getsize(args.bundle_path)} octets")
+    else:
+        scorer = load_bundle(args.bundle_path)
+        texts = [line.rstrip("\n") for line in sys.stdin if line.strip()]
+        for label, confidence in scorer.predict_proba_batch(texts):
+            print(f"{label}\t{confidence:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Module ML – Prédiction
+Chemin d'import léger pour l'inférence : bibliothèque standard uniquement.
+scikit-learn n'est chargé qu'au dépickling du premier modèle.
+TESE935
+"""
+
+import hashlib
+import pickle
+import os
+import threading
+
+# Modèles déjà chargés : model_path -> (signature du fichier, pipeline)
+_model_cache = {}
+_model_cache_lock = threading.Lock()
+
+# Empreintes déjà calculées : model_path -> (signature du fichier, sha1)
+_fingerprint_cache = {}
+
+# Scoreurs en flux : model_path -> (pipeline d'origine, StreamingScorer)
+_streaming_cache = {}
+
+# Au-delà de cette longueur (caractères), un texte est scoré en flux
+# (ml.streaming) : mémoire constante au lieu des listes de tokens du pipeline.
+LONG_TEXT_CHARS = 20000
+
+
+def load_model(model_path: str):
+    """
+    Retourne le pipeline sauvegardé dans `model_path`.
+    Le pickle n'est relu que si le fichier a changé depuis le dernier chargement.
+    """
+    stat = os.stat(model_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _model_cache_lock:
+        cached = _model_cache.get(model_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with open(model_path, "rb") as f:
+        pipeline = pickle.load(f)
+    with _model_cache_lock:
+        _model_cache[model_path] = (signature, pipeline)
+    return pipeline
+
+
+def predict_news(text: str, model_path: str) -> str:
+    """
+    Charge le modèle depuis le disque et retourne 'real' ou 'fake'.
+    """
+    if not os.path.exists(model_path):
+        return "unknown"
+
+    pipeline = load_model(model_path)
+    prediction = pipeline.predict([text])[0]
+    return prediction
+
+
+def predict_batch(texts: list, model_path: str) -> list:
+    """
+    Prédit un lot de textes en un seul appel vectorisé.
+    Retourne une liste de 'real' / 'fake' ('unknown' partout sans modèle).
+    """
+    if not os.path.exists(model_path):
+        return ["unknown"] * len(texts)
+    if not texts:
+        return []
+
+    pipeline = load_model(model_path)
+    return [str(pred) for pred in pipeline.predict(texts)]
+
+
+def get_streaming_scorer(model_path: str):
+    """StreamingScorer du modèle `model_path`, reconstruit quand le modèle change."""
+    pipeline = load_model(model_path)
+    with _model_cache_lock:
+        cached = _streaming_cache.get(model_path)
+    if cached is not None and cached[0] is pipeline:
+        return cached[1]
+
+    from ml.streaming import StreamingScorer
+    scorer = StreamingScorer.from_pipeline(pipeline)
+    with _model_cache_lock:
+        _streaming_cache[model_path] = (pipeline, scorer)
+    return scorer
+
+
+def predict_proba_batch(texts: list, model_path: str,
+                        long_text_chars: int = LONG_TEXT_CHARS, max_chars: int = 0) -> list:
+    """
+    Prédit un lot de textes et retourne [(label, confiance), ...], où la
+    confiance est la probabilité de la classe prédite (entre 0.5 et 1 pour
+    deux classes). Sans modèle : ('unknown', None) pour chaque texte.
+
+    Les textes de plus de `long_text_chars` caractères sont scorés en flux
+    (même résultat, mémoire constante). Si `max_chars` > 0, seuls les
+    `max_chars` premiers caractères de chaque texte sont pris en compte.
+    """
+    if not os.path.exists(model_path):
+        return [("unknown", None)] * len(texts)
+    if not texts:
+        return []
+
+    limit = max_chars if max_chars > 0 else None
+    threshold = min(long_text_chars, max_chars) if limit else long_text_chars
+    short = [i for i, text in enumerate(texts) if len(text) <= threshold]
+    results = [None] * len(texts)
+
+    if short:
+        pipeline = load_model(model_path)
+        probas = pipeline.predict_proba([texts[i] for i in short])
+        classes = pipeline.classes_
+        for row, k in enumerate(probas.argmax(axis=1)):
+            results[short[row]] = (str(classes[k]), float(probas[row, k]))
+    if len(short) < len(texts):
+        scorer = get_streaming_scorer(model_path)
+        for i, text in enumerate(texts):
+            if results[i] is None:
+                probas = scorer.predict_proba_one(text, limit)
+                k = int(probas.argmax())
+                results[i] = (scorer.classes[k], float(probas[k]))
+    return results
+
+
+def model_fingerprint(model_path: str) -> str:
+    """
+    Empreinte SHA-1 du fichier modèle, identifiant stable d'une version.
+    Recalculée seulement si le fichier a changé.
+    """
+    stat = os.stat(model_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _model_cache_lock:
+        cached = _fingerprint_cache.get(model_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha1()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    fingerprint = digest.hexdigest()
+    with _model_cache_lock:
+        _fingerprint_cache[model_path] = (signature, fingerprint)
+    return fingerprint
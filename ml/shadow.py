@@ -0,0 +1,249 @@
+"""
+Module ML – Évaluation en ombre (shadow) d'un nouveau modèle
+TESE935
+
+Quand le thread d'entraînement remplace le modèle, l'ancien est conservé à
+côté (`<model>.shadow`). Pendant l'essai, une fraction `sample_rate` des
+prédictions servies est re-scorée par l'ancien modèle, en arrière-plan
+(un thread dédié, file bornée : rien n'est ajouté au chemin de la requête).
+On mesure l'accord entre les deux modèles et leur exactitude sur les news
+annotées par un humain et créées après l'ouverture de l'essai (aucun des
+deux modèles ne les a vues à l'entraînement) ; après `min_labelled` de ces
+exemples :
+  - le nouveau modèle est promu (l'ombre est supprimée),
+  - ou, s'il est moins exact que l'ancien de plus de `tolerance`, l'ancien
+    fichier est restauré (rollback) et `on_rollback` est appelé (re-scoring
+    de la base par le modèle restauré).
+
+Seules les prédictions servies doivent être soumises : le re-scoring en
+masse qui suit un entraînement porte sur le jeu d'entraînement.
+
+Cycle d'utilisation (voir app.training_thread) :
+    snapshot(model_path)        # avant l'entraînement : copie de l'ancien modèle
+    train_model(...)
+    start_trial(model_path, db_path, on_rollback=...)   # ou cancel(model_path)
+    submit(news_ids, texts, preds)     # à chaque prédiction servie
+"""
+
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ml.predictor import load_model
+
+logger = logging.getLogger(__name__)
+
+SHADOW_SUFFIX = ".shadow"
+MAX_PENDING   = 32     # lots en attente au-delà desquels les échantillons sont ignorés
+
+_lock = threading.Lock()
+_trial = None          # essai en cours (dict) ou None
+_trial_counter = 0
+_last_decision = None
+_pending = 0
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+_rng = random.Random()
+
+
+def shadow_path(model_path: str) -> str:
+    return model_path + SHADOW_SUFFIX
+
+
+def snapshot(model_path: str) -> bool:
+    """
+    Termine l'essai en cours puis copie le modèle actuel comme ombre.
+    Retourne False s'il n'y a pas encore de modèle.
+    """
+    conclude(force=True)
+    if not os.path.exists(model_path):
+        return False
+    shutil.copy2(model_path, shadow_path(model_path))
+    return True
+
+
+def cancel(model_path: str) -> None:
+    """Abandonne l'ombre (aucun nouveau modèle n'a été produit)."""
+    global _trial
+    with _lock:
+        _trial = None
+    if os.path.exists(shadow_path(model_path)):
+        os.unlink(shadow_path(model_path))
+
+
+def start_trial(model_path: str, db_path: str, sample_rate: float = 0.1,
+                min_labelled: int = 50, tolerance: float = 0.02,
+                shards: list = None, on_rollback=None) -> None:
+    """
+    Ouvre un essai : le modèle en service est comparé à l'ombre sauvegardée.
+    Les labels humains sont lus dans `db_path`, ou dans `shards` si fourni ;
+    seules les news d'id supérieur au maximum actuel de chaque fichier
+    comptent pour la décision. `on_rollback()` est appelé après un rollback.
+    """
+    global _trial, _trial_counter
+    news_paths = list(shards) if shards else [db_path]
+    watermarks = {}
+    for news_path in news_paths:
+        conn = sqlite3.connect(news_path, timeout=10)
+        watermarks[news_path] = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM news"
+        ).fetchone()[0]
+        conn.close()
+    with _lock:
+        _trial_counter += 1
+        _trial = {
+            "id":           _trial_counter,
+            "model_path":   model_path,
+            "news_paths":   news_paths,
+            "watermarks":   watermarks,
+            "on_rollback":  on_rollback,
+            "sample_rate":  sample_rate,
+            "min_labelled": min_labelled,
+            "tolerance":    tolerance,
+            "sampled":      0,
+            "agree":        0,
+            "labelled":     0,
+            "live_correct": 0,
+            "shadow_correct": 0,
+        }
+    logger.info("Essai shadow #%d ouvert (échantillonnage %.0f%%)",
+                _trial_counter, sample_rate * 100)
+
+
+def submit(news_ids: list, texts: list, live_preds: list) -> None:
+    """
+    Envoie en arrière-plan un échantillon des prédictions servies pour
+    comparaison avec l'ombre. Ne bloque jamais l'appelant.
+    """
+    global _pending
+    with _lock:
+        trial = _trial
+        if trial is None or not news_ids or _pending >= MAX_PENDING:
+            return
+        # Arrondi aléatoire : en moyenne n × sample_rate lignes, en O(1)
+        expected = len(news_ids) * trial["sample_rate"]
+        k = min(len(news_ids), int(expected) + (_rng.random() < expected % 1))
+        if k == 0:
+            return
+        picked = _rng.sample(range(len(news_ids)), k)
+        _pending += 1
+
+    sample = [(news_ids[i], texts[i], live_preds[i][0]) for i in picked]
+    _executor.submit(_evaluate, trial["id"], sample)
+
+
+def _evaluate(trial_id: int, sample: list) -> None:
+    """Tâche de fond : score l'échantillon avec l'ombre et met à jour l'essai."""
+    global _pending
+    try:
+        with _lock:
+            trial = _trial if _trial is not None and _trial["id"] == trial_id else None
+        if trial is None:
+            return
+        path = shadow_path(trial["model_path"])
+        if not os.path.exists(path):
+            return
+
+        ids, texts, live = zip(*sample)
+        shadow_preds = [str(p) for p in load_model(path).predict(list(texts))]
+
+        placeholders = ",".join("?" * len(ids))
+        human = {}
+        for news_path in trial["news_paths"]:
+            conn = sqlite3.connect(news_path, timeout=10)
+            human.update(conn.execute(
+                f"SELECT id, label FROM news WHERE id IN ({placeholders})"
+                " AND label IN ('real', 'fake') AND id > ?",
+                (*ids, trial["watermarks"][news_path])
+            ).fetchall())
+            conn.close()
+
+        with _lock:
+            if _trial is None or _trial["id"] != trial_id:
+                return
+            for news_id, live_label, shadow_label in zip(ids, live, shadow_preds):
+                _trial["sampled"] += 1
+                _trial["agree"] += live_label == shadow_label
+                if news_id in human:
+                    _trial["labelled"] += 1
+                    _trial["live_correct"] += live_label == human[news_id]
+                    _trial["shadow_correct"] += shadow_label == human[news_id]
+            ready = _trial["labelled"] >= _trial["min_labelled"]
+        if ready:
+            conclude()
+    except Exception as exc:
+        logger.error("Évaluation shadow échouée : %s", exc)
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def conclude(force: bool = False):
+    """
+    Décide de l'essai en cours : "promote", "rollback", ou None s'il n'y a
+    pas d'essai (ou pas assez d'exemples annotés et `force` faux).
+    Sans preuve suffisante (`force`), le nouveau modèle est promu.
+    """
+    global _trial, _last_decision
+    with _lock:
+        trial = _trial
+        if trial is None:
+            return None
+        enough = trial["labelled"] >= trial["min_labelled"]
+        if not enough and not force:
+            return None
+        _trial = None
+
+    decision = "promote"
+    if enough:
+        live_acc = trial["live_correct"] / trial["labelled"]
+        shadow_acc = trial["shadow_correct"] / trial["labelled"]
+        if live_acc + trial["tolerance"] < shadow_acc:
+            decision = "rollback"
+
+    path = shadow_path(trial["model_path"])
+    rolled_back = decision == "rollback" and os.path.exists(path)
+    if rolled_back:
+        os.replace(path, trial["model_path"])
+    elif os.path.exists(path):
+        os.unlink(path)
+
+    summary = summarize(trial)
+    summary["decision"] = decision
+    with _lock:
+        _last_decision = summary
+    logger.info("Essai shadow #%d : %s (%s)", trial["id"], decision, summary)
+    if rolled_back and trial["on_rollback"] is not None:
+        trial["on_rollback"]()
+    return decision
+
+
+def summarize(trial: dict) -> dict:
+    """Mesures lisibles d'un essai (accord, exactitudes)."""
+    labelled = trial["labelled"]
+    return {
+        "trial":         trial["id"],
+        "sampled":       trial["sampled"],
+        "labelled":      labelled,
+        "agreement":     trial["agree"] / trial["sampled"] if trial["sampled"] else None,
+        "live_accuracy": trial["live_correct"] / labelled if labelled else None,
+        "shadow_accuracy": trial["shadow_correct"] / labelled if labelled else None,
+    }
+
+
+def status() -> dict:
+    """État courant pour /status : essai en cours et dernière décision."""
+    with _lock:
+        return {
+            "active":        summarize(_trial) if _trial is not None else None,
+            "last_decision": _last_decision,
+            "pending":       _pending,
+        }
+
+
+def drain(timeout: float = 10.0) -> None:
+    """Attend la fin des évaluations en file (tests, arrêt)."""
+    _executor.submit(lambda: None).result(timeout=timeout)
@@ -0,0 +1,109 @@
+"""
+Module ML – Scoring en flux des articles longs
+TESE935
+
+Pour un article de N caractères, CountVectorizer construit la liste de tous
+ses tokens, puis celle de tous ses bigrammes (chaînes jointes), avant de
+compter : la mémoire de chaque prédiction croît avec N. `StreamingScorer`
+parcourt le texte une seule fois, par tranches de CHUNK_CHARS caractères,
+en reportant d'une tranche à l'autre les (max_n - 1) derniers tokens pour
+former les n-grammes à cheval. Les termes de chaque tranche trouvés dans le
+vocabulaire sont ajoutés aussitôt aux log-vraisemblances par classe de
+MultinomialNB, puis la tranche est oubliée. La mémoire reste constante quelle que soit la longueur,
+et le résultat est celui du pipeline.
+
+`max_chars` tronque les textes trop longs sans les copier (seuls les
+`max_chars` premiers caractères sont lus).
+"""
+
+import re
+import numpy as np
+
+CHUNK_CHARS = 32 * 1024     # caractères tokenisés à la fois
+_WHITESPACE = re.compile(r"\s")
+
+
+class StreamingScorer:
+    """MultinomialNB + tokenisation de CountVectorizer, en un passage sur le texte."""
+
+    def __init__(self, vocabulary: dict, stop_words, ngram_range, lowercase: bool,
+                 token_pattern: str, classes: list, class_log_prior, feature_log_prob):
+        self.vocabulary = vocabulary
+        self.stop_words = frozenset(stop_words)
+        self.min_n, self.max_n = ngram_range
+        self.lowercase = lowercase
+        self.token_re = re.compile(token_pattern)
+        self.classes = list(classes)
+        self.class_log_prior = np.asarray(class_log_prior, dtype=np.float64)
+        # (n_features, n_classes) : une ligne contiguë par terme
+        self.feature_log_prob_t = np.ascontiguousarray(np.asarray(feature_log_prob).T)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Construit le scoreur à partir d'un pipeline CountVectorizer → MultinomialNB."""
+        from ml.bundle import _analyzer_config
+
+        vectorizer = pipeline.named_steps["vectorizer"]
+        classifier = pipeline.named_steps["classifier"]
+        config = _analyzer_config(vectorizer)
+        return cls(vectorizer.vocabulary_, config["stop_words"], config["ngram_range"],
+                   config["lowercase"], config["token_pattern"],
+                   [str(c) for c in classifier.classes_],
+                   classifier.class_log_prior_, classifier.feature_log_prob_)
+
+    @classmethod
+    def from_bundle(cls, bundle_scorer):
+        """Construit le scoreur à partir d'un ml.bundle.BundleScorer (sans scikit-learn)."""
+        return cls(bundle_scorer.vocabulary, bundle_scorer.stop_words,
+                   bundle_scorer.ngram_range, bundle_scorer.lowercase,
+                   bundle_scorer.manifest["token_pattern"], bundle_scorer.classes,
+                   bundle_scorer.class_log_prior, bundle_scorer.feature_log_prob_t.T)
+
+    def _chunks(self, text: str, max_chars=None):
+        """Tranches du texte coupées sur un blanc, pour ne jamais couper un token."""
+        end = len(text) if max_chars is None else min(len(text), max_chars)
+        pos = 0
+        while pos < end:
+            stop = min(pos + CHUNK_CHARS, end)
+            if stop < end:
+                # Recule jusqu'au dernier blanc de la tranche (s'il y en a un)
+                last = None
+                for match in _WHITESPACE.finditer(text, pos, stop):
+                    last = match.start()
+                if last is not None and last > pos:
+                    stop = last
+            chunk = text[pos:stop]
+            yield chunk.lower() if self.lowercase else chunk
+            pos = stop
+
+    def joint_log_likelihood(self, text: str, max_chars=None):
+        """Log-vraisemblance jointe par classe (n_classes,) d'un texte."""
+        lookup, stop_words = self.vocabulary.get, self.stop_words
+        min_n, max_n = self.min_n, self.max_n
+        jll = self.class_log_prior.copy()
+        carry = []   # (max_n - 1) derniers tokens de la tranche précédente
+
+        for chunk in self._chunks(text, max_chars):
+            tokens = [t for t in self.token_re.findall(chunk) if t not in stop_words]
+            if not tokens:
+                continue
+            indices = [i for i in map(lookup, tokens) if i is not None] if min_n == 1 else []
+            window = carry + tokens
+            for n in range(max(min_n, 2), max_n + 1):
+                # Seuls les n-grammes qui se terminent dans cette tranche sont nouveaux
+                first = max(len(carry) - n + 1, 0)
+                grams = map(" ".join, zip(*(window[first + k:] for k in range(n))))
+                indices.extend(i for i in map(lookup, grams) if i is not None)
+            if indices:
+                jll += self.feature_log_prob_t[indices].sum(axis=0)
+            carry = window[len(window) - (max_n - 1):] if max_n > 1 else []
+        return jll
+
+    def predict_proba_one(self, text: str, max_chars=None):
+        """Probabilités par classe (dans l'ordre de self.classes)."""
+        jll = self.joint_log_likelihood(text, max_chars)
+        probas = np.exp(jll - jll.max())
+        return probas / probas.sum()
+
+    def predict_one(self, text: str, max_chars=None) -> str:
+        return self.classes[int(self.joint_log_likelihood(text, max_chars).argmax())]
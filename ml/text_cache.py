@@ -0,0 +1,128 @@
+"""
+Module ML – Normalisation et tokenisation avec cache adressé par contenu
+TESE935
+
+`load_data_from_db`, le re-scoring en masse et les prédictions unitaires
+passent tous le texte `titre + " " + contenu` dans l'analyseur de
+CountVectorizer (minuscules, mots vides, regex, n-grammes). `CachedAnalyzer`
+remplace cet analyseur dans le pipeline : le résultat est mémorisé sous le
+hachage BLAKE2 du texte, dans un cache LRU borné en octets et partagé par
+l'entraînement et l'inférence d'un même processus. Un article inchangé
+n'est donc tokenisé qu'une fois.
+
+`stats()` donne le taux de succès et le volume de texte non re-tokenisé.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+ENTRY_OVERHEAD    = 200    # estimation du coût fixe d'une entrée (clé, chaîne, nœud LRU)
+TOKEN_SEPARATOR   = "\n"   # absent des tokens produits par le token_pattern par défaut
+
+# Les tokens sont stockés joints en une seule chaîne : ~10 fois moins de
+# mémoire qu'un tuple de chaînes, et split() reste bien plus rapide que
+# l'analyseur (regex, mots vides, n-grammes).
+_cache = OrderedDict()     # (config, empreinte) -> (tokens joints, taille estimée)
+_cache_lock = threading.Lock()
+_max_bytes = DEFAULT_MAX_BYTES
+_stats = {"hits": 0, "misses": 0, "bytes_saved": 0, "cached_bytes": 0}
+
+
+def article_text(title: str, content: str) -> str:
+    """Texte d'une news tel que vu par le modèle (entraînement et prédiction)."""
+    return title + " " + content
+
+
+def configure(max_bytes: int) -> None:
+    """Fixe la taille maximale du cache en octets (0 désactive le cache)."""
+    global _max_bytes
+    with _cache_lock:
+        _max_bytes = max(0, int(max_bytes))
+        _evict()
+
+
+def clear() -> None:
+    """Vide le cache et remet les statistiques à zéro."""
+    with _cache_lock:
+        _cache.clear()
+        for key in _stats:
+            _stats[key] = 0
+
+
+def stats() -> dict:
+    """Statistiques du cache : succès, échecs, taux, octets économisés, taille."""
+    with _cache_lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(
+            _stats,
+            entries=len(_cache),
+            max_bytes=_max_bytes,
+            hit_rate=_stats["hits"] / lookups if lookups else None,
+        )
+
+
+def _evict() -> None:
+    """Retire les entrées les plus anciennes au-delà de _max_bytes (verrou tenu)."""
+    while _cache and _stats["cached_bytes"] > _max_bytes:
+        _, (_, size) = _cache.popitem(last=False)
+        _stats["cached_bytes"] -= size
+
+
+class CachedAnalyzer:
+    """
+    Analyseur pour `CountVectorizer(analyzer=CachedAnalyzer(...))`, équivalent
+    à `CountVectorizer(ngram_range=..., stop_words=...).build_analyzer()`.
+    Picklable : seule la configuration est sauvegardée avec le modèle.
+    Avec `use_cache=False` (entraînement à mémoire bornée), le cache n'est ni
+    lu ni rempli ; un modèle rechargé utilise toujours le cache.
+    """
+
+    def __init__(self, ngram_range=(1, 2), stop_words="english", use_cache=True):
+        self.ngram_range = tuple(ngram_range)
+        self.stop_words = stop_words
+        self.use_cache = use_cache
+        self._analyze = None
+
+    def __getstate__(self):
+        return {"ngram_range": self.ngram_range, "stop_words": self.stop_words}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _base_analyzer(self):
+        if self._analyze is None:
+            from sklearn.feature_extraction.text import CountVectorizer
+            self._analyze = CountVectorizer(
+                ngram_range=self.ngram_range, stop_words=self.stop_words
+            ).build_analyzer()
+        return self._analyze
+
+    def __call__(self, text: str):
+        if not self.use_cache:
+            return self._base_analyzer()(text)
+        raw = text.encode("utf-8", "surrogatepass")
+        key = (self.ngram_range, self.stop_words, hashlib.blake2b(raw, digest_size=16).digest())
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry is not None:
+                _cache.move_to_end(key)
+                _stats["hits"] += 1
+                _stats["bytes_saved"] += len(raw)
+                joined = entry[0]
+            else:
+                _stats["misses"] += 1
+                joined = None
+        if joined is not None:
+            return joined.split(TOKEN_SEPARATOR) if joined else []
+
+        tokens = self._base_analyzer()(text)
+        joined = TOKEN_SEPARATOR.join(tokens)
+        size = ENTRY_OVERHEAD + len(joined) * (1 if joined.isascii() else 4)
+        with _cache_lock:
+            if size <= _max_bytes and key not in _cache:
+                _cache[key] = (joined, size)
+                _stats["cached_bytes"] += size
+                _evict()
+        return tokens
@@ -1,62 +1,298 @@
 """
-Module ML – Entraînement et prédiction
+Module ML – Entraînement
 Utilise CountVectorizer + MultinomialNB (scikit-learn)
 TESE935
+
+scikit-learn n'est importé qu'au premier entraînement : importer ce module
+(ou `app`) reste léger. Les fonctions de prédiction vivent dans
+`ml.predictor` et sont réexportées ici pour compatibilité.
 """
 
 import sqlite3
 import pickle
 import os
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
+from ml.predictor import load_model, predict_news, predict_batch, predict_proba_batch  # noqa: F401
+from ml.text_cache import CachedAnalyzer, article_text
 
 logger = logging.getLogger(__name__)
 
+EVALUATION_MODES = ("full", "sample", "skip")
+EVAL_BATCH_SIZE  = 256
+
+# Paramètres du vectoriseur, partagés par les deux modes d'entraînement.
+# La tokenisation passe par CachedAnalyzer (cache partagé avec la prédiction),
+# sauf en mode mémoire bornée : le cache (FAKENEWS_TOKEN_CACHE_MB) n'est pas
+# compté dans memory_limit_mb, il n'y est donc ni lu ni rempli.
+NGRAM_RANGE  = (1, 2)
+STOP_WORDS   = "english"
+MAX_FEATURES = 5000
+
+# Mode mémoire bornée : coût approximatif d'un terme suivi pendant le comptage
+# (chaîne + entrée de dict + compteur) et part du plafond allouée au vocabulaire
+VOCAB_BYTES_PER_TERM = 160
+VOCAB_MEMORY_SHARE   = 0.5
+STREAM_CHUNK_SIZE    = 2000
+
+
+def _news_paths(db_path) -> list:
+    """Un chemin de base ou une liste de shards (voir sharding.py) → liste de chemins."""
+    return [db_path] if isinstance(db_path, str) else list(db_path)
 
-def load_data_from_db(db_path: str):
+
+def load_data_from_db(db_path):
     """
     Charge les news dont le label humain est 'real' ou 'fake'.
+    `db_path` peut être une liste de shards, alors lus en parallèle.
     Retourne (texts, labels).
     """
-    conn = sqlite3.connect(db_path)
+    paths = _news_paths(db_path)
+    if len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            parts = list(pool.map(load_data_from_db, paths))
+        return ([text for texts, _ in parts for text in texts],
+                [label for _, labels in parts for label in labels])
+
+    conn = sqlite3.connect(paths[0])
     rows = conn.execute(
         "SELECT title, content, label FROM news WHERE label IN ('real', 'fake')"
     ).fetchall()
     conn.close()
 
-    texts  = [row[0] + " " + row[1] for row in rows]
+    texts  = [article_text(row[0], row[1]) for row in rows]
     labels = [row[2] for row in rows]
     return texts, labels
 
 
-def train_model(db_path: str, model_path: str) -> None:
+def record_training_run(db_path: str, run: dict) -> None:
     """
-    Entraîne un pipeline CountVectorizer → MultinomialNB
-    sur les données de la base et sauvegarde le modèle.
+    Ajoute une ligne dans training_runs à partir du dict retourné par train_model.
+    La table est créée par les migrations (migrations.py, v3 et v5).
     """
-    texts, labels = load_data_from_db(db_path)
-    n = len(texts)
-    n_classes = len(set(labels))
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO training_runs (duration_s, n_samples, evaluation, n_eval,"
+        " accuracy, precision, recall, model_bytes, peak_rss_bytes)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (run["duration_s"], run["n_samples"], run["evaluation"], run["n_eval"],
+         run["accuracy"], run["precision"], run["recall"], run["model_bytes"],
+         run.get("peak_rss_bytes"))
+    )
+    conn.commit()
+    conn.close()
+
+
+def _current_rss():
+    """Mémoire résidente du processus en octets (None hors Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@contextmanager
+def track_peak_rss(interval: float = 0.05):
+    """
+    Échantillonne la RSS toutes les `interval` secondes pendant le bloc.
+    Produit un dict dont la clé "peak" contient le pic observé (ou None).
+    """
+    result = {"peak": _current_rss()}
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(interval):
+            rss = _current_rss()
+            if rss is not None and (result["peak"] is None or rss > result["peak"]):
+                result["peak"] = rss
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield result
+    finally:
+        stop.set()
+        sampler.join()
+        rss = _current_rss()
+        if rss is not None and (result["peak"] is None or rss > result["peak"]):
+            result["peak"] = rss
+
+
+def iter_labelled_chunks(db_path, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Parcourt les news 'real' / 'fake' par lots de (id, texte, label), sans tout
+    charger. Une liste de shards est parcourue shard par shard.
+    """
+    for path in _news_paths(db_path):
+        conn = sqlite3.connect(path)
+        try:
+            cursor = conn.execute(
+                "SELECT id, title, content, label FROM news WHERE label IN ('real', 'fake')"
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [(row[0], article_text(row[1], row[2]), row[3]) for row in rows]
+        finally:
+            conn.close()
+
+
+_LABELS = {"fake": "fake", "real": "real"}
+
+
+def _is_holdout(news_id: int) -> bool:
+    """Jeu de test stable du mode streaming : une news sur cinq, selon son id."""
+    return news_id % 5 == 0
+
+
+def build_pruned_vocabulary(db_path, max_terms: int, min_df=1, max_df=1.0,
+                            max_features: int = MAX_FEATURES,
+                            chunk_size: int = STREAM_CHUNK_SIZE) -> dict:
+    """
+    Compte la fréquence documentaire des n-grammes en un passage sur la base,
+    sans jamais suivre plus de `max_terms` termes : au-delà, les termes les
+    plus rares sont élagués (seuil croissant). Applique ensuite min_df / max_df
+    puis garde les `max_features` termes les plus fréquents.
+    Retourne {terme: indice} au format de CountVectorizer.vocabulary_.
+    """
+    analyze = CachedAnalyzer(NGRAM_RANGE, STOP_WORDS, use_cache=False)
+    df, n_docs, floor = {}, 0, 0
+    for chunk in iter_labelled_chunks(db_path, chunk_size):
+        for _, text, _ in chunk:
+            n_docs += 1
+            for term in set(analyze(text)):
+                df[term] = df.get(term, 0) + 1
+        while len(df) > max_terms:
+            floor += 1
+            df = {term: count for term, count in df.items() if count > floor}
+
+    min_count = min_df if isinstance(min_df, int) else min_df * n_docs
+    max_count = max_df if isinstance(max_df, int) else max_df * n_docs
+    kept = [(count, term) for term, count in df.items() if min_count <= count <= max_count]
+    kept.sort(key=lambda ct: (-ct[0], ct[1]))
+    selected = sorted(term for _, term in kept[:max_features])
+    if floor:
+        logger.info("Vocabulaire élagué pendant le comptage (df > %d, %d termes suivis)",
+                    floor, max_terms)
+    return {term: i for i, term in enumerate(selected)}
 
-    if n < 4:
-        logger.warning("Pas assez de données pour entraîner (min 4). Skipped.")
-        return
 
-    if n_classes < 2:
-        logger.warning("Il faut au moins 1 news 'real' ET 1 news 'fake'. Skipped.")
-        return
+def _fit_memory_bounded(db_path, evaluation, eval_sample_size, eval_time_budget,
+                        memory_limit_mb, min_df, max_df, chunk_size):
+    """
+    Entraînement en deux passages sur la base, par lots : vocabulaire élagué
+    borné par `memory_limit_mb`, puis MultinomialNB.partial_fit sur des
+    matrices creuses int32 (plus un passage d'évaluation en mode "full").
+    Retourne (pipeline, y_true, y_pred).
+    """
+    import numpy as np
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+
+    max_terms = max(
+        MAX_FEATURES,
+        int(memory_limit_mb * 1024 * 1024 * VOCAB_MEMORY_SHARE / VOCAB_BYTES_PER_TERM)
+    )
+    vocabulary = build_pruned_vocabulary(
+        db_path, max_terms, min_df=min_df, max_df=max_df, chunk_size=chunk_size
+    )
+    vectorizer = CountVectorizer(
+        analyzer=CachedAnalyzer(NGRAM_RANGE, STOP_WORDS, use_cache=False),
+        vocabulary=vocabulary, dtype=np.int32
+    )
+    classifier = MultinomialNB(alpha=1.0)
+
+    # Seules les news réellement évaluées sont exclues de l'entraînement :
+    #   - "full"   : toutes les news du jeu de test (_is_holdout), évaluées
+    #                ensuite par un troisième passage, lot par lot ;
+    #   - "sample" : les `eval_sample_size` premières, gardées en mémoire.
+    sample = []
+    for chunk in iter_labelled_chunks(db_path, chunk_size):
+        texts, labels = [], []
+        for news_id, text, label in chunk:
+            if evaluation != "skip" and _is_holdout(news_id):
+                if evaluation == "full":
+                    continue
+                if len(sample) < eval_sample_size:
+                    sample.append((text, label))
+                    continue
+            texts.append(text)
+            labels.append(label)
+        if texts:
+            classifier.partial_fit(vectorizer.transform(texts), labels, classes=["fake", "real"])
+
+    pipeline = Pipeline([("vectorizer", vectorizer), ("classifier", classifier)])
+
+    if evaluation == "full":
+        batches = ([(text, label) for news_id, text, label in chunk if _is_holdout(news_id)]
+                   for chunk in iter_labelled_chunks(db_path, chunk_size))
+    else:
+        batches = [sample]
+    y_true, y_pred = _evaluate_batches(pipeline, batches, eval_time_budget)
+    return pipeline, y_true, y_pred
+
+
+def _evaluate_batches(pipeline, batches, eval_time_budget):
+    """
+    Prédit des lots de (texte, label) par paquets de EVAL_BATCH_SIZE, sans
+    les garder en mémoire ; s'arrête une fois `eval_time_budget` dépassé.
+    Retourne (y_true, y_pred).
+    """
+    deadline = time.perf_counter() + eval_time_budget if eval_time_budget else None
+    y_true, y_pred = [], []
+    for batch in batches:
+        for i in range(0, len(batch), EVAL_BATCH_SIZE):
+            texts, labels = zip(*batch[i:i + EVAL_BATCH_SIZE])
+            # Labels partagés : 8 octets par exemple évalué, pas une chaîne chacun
+            y_pred.extend(_LABELS[label] for label in pipeline.predict(texts))
+            y_true.extend(_LABELS[label] for label in labels)
+            if deadline is not None and time.perf_counter() > deadline:
+                return y_true, y_pred
+    return y_true, y_pred
+
+
+def count_labels(db_path) -> dict:
+    """Nombre de news par label humain 'real' / 'fake' (sommé sur une liste de shards)."""
+    counts = {}
+    for path in _news_paths(db_path):
+        conn = sqlite3.connect(path)
+        rows = conn.execute(
+            "SELECT label, COUNT(*) FROM news WHERE label IN ('real', 'fake') GROUP BY label"
+        ).fetchall()
+        conn.close()
+        for label, n in rows:
+            counts[label] = counts.get(label, 0) + n
+    return counts
+
+
+def _fit_in_memory(texts, labels, n_classes, evaluation, eval_sample_size,
+                   eval_time_budget, min_df, max_df):
+    """
+    Entraînement classique sur le jeu chargé en mémoire.
+    Retourne (pipeline, y_true, y_pred, mode d'évaluation effectif).
+    """
+    import numpy as np
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    from sklearn.model_selection import train_test_split
 
     # Création du pipeline scikit-learn
     pipeline = Pipeline([
         ("vectorizer", CountVectorizer(
-            ngram_range=(1, 2),   # unigrams + bigrams
-            stop_words="english",
-            max_features=5000
+            # unigrams + bigrams, mots vides retirés, tokens mis en cache
+            analyzer=CachedAnalyzer(NGRAM_RANGE, STOP_WORDS),
+            max_features=MAX_FEATURES,
+            min_df=min_df,
+            max_df=max_df,
+            dtype=np.int32             # comptes compacts (int64 par défaut)
         )),
         ("classifier", MultinomialNB(alpha=1.0))  # alpha = lissage de Laplace
     ])
@@ -64,44 +300,131 @@ def train_model(db_path: str, model_path: str) -> None:
     # --- Split adaptatif ---
     # Avec peu de données, 20% peut donner moins d'exemples que le nb de classes.
     # On s'assure d'avoir au moins n_classes exemples dans le test set.
+    n = len(texts)
     test_size = max(n_classes, int(n * 0.2))
+    if evaluation == "sample":
+        test_size = max(n_classes, min(test_size, eval_sample_size))
 
+    if evaluation == "skip":
+        pipeline.fit(texts, labels)
+        return pipeline, [], [], "skip"
     if test_size >= n:
         # Trop peu de données : on entraîne sur tout sans évaluation
         logger.warning("Données insuffisantes pour splitter — entraînement sur tout le jeu.")
         pipeline.fit(texts, labels)
-    else:
-        X_train, X_test, y_train, y_test = train_test_split(
-            texts, labels,
-            test_size=test_size,
-            random_state=42,
-            stratify=labels
-        )
-        pipeline.fit(X_train, y_train)
+        return pipeline, [], [], "skip"
 
-        # Évaluation
-        y_pred = pipeline.predict(X_test)
-        acc = accuracy_score(y_test, y_pred)
-        logger.info("Accuracy sur le jeu de test : %.2f%%", acc * 100)
-        logger.info("\n%s", classification_report(y_test, y_pred, zero_division=0))
+    X_train, X_test, y_train, y_test = train_test_split(
+        texts, labels,
+        test_size=test_size,
+        random_state=42,
+        stratify=labels
+    )
+    pipeline.fit(X_train, y_train)
 
-    # Sauvegarde
-    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
-    with open(model_path, "wb") as f:
-        pickle.dump(pipeline, f)
+    # Évaluation par lots, interrompue si le budget de temps est dépassé
+    deadline = time.perf_counter() + eval_time_budget if eval_time_budget else None
+    y_pred = []
+    for i in range(0, len(X_test), EVAL_BATCH_SIZE):
+        y_pred.extend(pipeline.predict(X_test[i:i + EVAL_BATCH_SIZE]))
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+    return pipeline, y_test[:len(y_pred)], y_pred, evaluation
 
-    logger.info("Modèle sauvegardé dans %s (%d exemples)", model_path, n)
 
-
-def predict_news(text: str, model_path: str) -> str:
+def train_model(db_path: str, model_path: str, evaluation: str = "full",
+                eval_sample_size: int = 500, eval_time_budget: float = None,
+                record_run: bool = True, memory_limit_mb: float = None,
+                min_df=1, max_df=1.0, chunk_size: int = STREAM_CHUNK_SIZE,
+                shards: list = None):
     """
-    Charge le modèle depuis le disque et retourne 'real' ou 'fake'.
+    Entraîne un pipeline CountVectorizer → MultinomialNB
+    sur les données de la base et sauvegarde le modèle.
+
+    `evaluation` :
+      - "full"   : jeu de test de 20 % évalué en entier,
+      - "sample" : jeu de test limité à `eval_sample_size` exemples,
+      - "skip"   : pas d'évaluation, entraînement sur tout le jeu.
+    `eval_time_budget` (secondes) arrête l'évaluation entre deux lots une fois
+    le budget dépassé ; les métriques portent alors sur les exemples évalués.
+
+    Avec `memory_limit_mb`, la base est lue par lots de `chunk_size` en deux
+    passages (vocabulaire élagué dont la taille dépend du plafond, puis
+    partial_fit) au lieu d'être chargée en entier. `min_df` / `max_df` ont
+    le sens de CountVectorizer dans les deux modes.
+
+    Avec `shards` (liste de fichiers, voir sharding.py), les news sont lues
+    dans ces fichiers (en parallèle pour l'entraînement en mémoire) ;
+    training_runs reste dans `db_path`.
+
+    Retourne le dict de mesures (enregistré dans training_runs si `record_run`),
+    ou None si l'entraînement a été ignoré.
     """
-    if not os.path.exists(model_path):
-        return "unknown"
+    if evaluation not in EVALUATION_MODES:
+        raise ValueError(f"evaluation doit être parmi {EVALUATION_MODES}, reçu {evaluation!r}")
+
+    source = shards or db_path
+    started = time.perf_counter()
+    with track_peak_rss() as rss:
+        if memory_limit_mb:
+            counts = count_labels(source)
+            n, n_classes = sum(counts.values()), len(counts)
+        else:
+            texts, labels = load_data_from_db(source)
+            n, n_classes = len(texts), len(set(labels))
+
+        if n < 4:
+            logger.warning("Pas assez de données pour entraîner (min 4). Skipped.")
+            return None
+
+        if n_classes < 2:
+            logger.warning("Il faut au moins 1 news 'real' ET 1 news 'fake'. Skipped.")
+            return None
+
+        # Imports lourds différés : seul le processus qui entraîne les paie
+        from sklearn.metrics import accuracy_score, precision_score, recall_score
+
+        if memory_limit_mb:
+            pipeline, y_true, y_pred = _fit_memory_bounded(
+                source, evaluation, eval_sample_size, eval_time_budget,
+                memory_limit_mb, min_df, max_df, chunk_size
+            )
+            effective = evaluation if y_pred else "skip"
+        else:
+            pipeline, y_true, y_pred, effective = _fit_in_memory(
+                texts, labels, n_classes, evaluation, eval_sample_size,
+                eval_time_budget, min_df, max_df
+            )
+
+        run = {
+            "n_samples": n, "evaluation": effective, "n_eval": len(y_pred),
+            "accuracy": None, "precision": None, "recall": None,
+        }
+        if y_pred:
+            run["accuracy"]  = float(accuracy_score(y_true, y_pred))
+            run["precision"] = float(precision_score(y_true, y_pred, average="macro", zero_division=0))
+            run["recall"]    = float(recall_score(y_true, y_pred, average="macro", zero_division=0))
+            logger.info(
+                "Évaluation (%s, %d exemples) : accuracy %.2f%%, précision %.2f, rappel %.2f",
+                effective, run["n_eval"], run["accuracy"] * 100, run["precision"], run["recall"]
+            )
+
+        # Sauvegarde atomique : les lecteurs concurrents ne voient jamais un fichier partiel
+        os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+        tmp_path = model_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(pipeline, f)
+        os.replace(tmp_path, model_path)
 
-    with open(model_path, "rb") as f:
-        pipeline = pickle.load(f)
+    run["model_bytes"]    = os.path.getsize(model_path)
+    run["duration_s"]     = time.perf_counter() - started
+    run["peak_rss_bytes"] = rss["peak"]
+    if memory_limit_mb and rss["peak"] and rss["peak"] > memory_limit_mb * 1024 * 1024:
+        logger.warning("Pic mémoire %.0f Mo au-dessus du plafond de %.0f Mo",
+                       rss["peak"] / 1024 ** 2, memory_limit_mb)
+    if record_run:
+        record_training_run(db_path, run)
 
-    prediction = pipeline.predict([text])[0]
-    return prediction
+    logger.info("Modèle sauvegardé dans %s (%d exemples, pic RSS %s Mo)", model_path, n,
+                f"{rss['peak'] / 1024 ** 2:.0f}" if rss["peak"] else "?")
+    return run
@@ -0,0 +1,243 @@
+"""
+prediction_log.py
+=================
+Journal d'audit des prédictions – TESE935
+
+Chaque prédiction (re-scoring en masse ou /predict/<id>) est ajoutée à la
+table `prediction_log` : id de la news, version du modèle, label, probabilité,
+latence. La table est en ajout seul (un trigger interdit UPDATE) et compacte :
+  - label codé en entier (LABEL_CODES),
+  - version du modèle = entier de la table `model_versions` (empreinte SHA-1
+    du fichier modèle → id),
+  - horodatage en secondes Unix et latence en microsecondes (INTEGER).
+
+Les écritures sont regroupées en mémoire et envoyées par lots de FLUSH_SIZE,
+à chaque `flush()` et à l'arrêt. Le thread lancé par `start_maintenance`
+écrit en plus les lignes en attente toutes les FLUSH_INTERVAL secondes (un
+serveur calme ou sans entraînement ne les garde donc pas en mémoire), et
+purge l'ancien historique toutes les PRUNE_INTERVAL secondes : SQLite
+n'ayant pas de partitions, `prune()` supprime sur l'index de l'horodatage.
+
+Comparer deux modèles sans re-scorer : `diff_model_versions(db, a, b)`.
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LABEL_CODES = {"fake": 0, "real": 1}
+LABEL_NAMES = {code: label for label, code in LABEL_CODES.items()}
+
+FLUSH_SIZE     = 500
+FLUSH_INTERVAL = 5        # secondes : âge maximal d'une ligne en mémoire
+PRUNE_INTERVAL = 3600     # secondes entre deux purges
+RETENTION_DAYS = 30
+SQLITE_TIMEOUT = 10
+
+# Lignes en attente d'écriture : db_path -> [(ts, news_id, version, label, proba, latency_us)]
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+# Versions déjà résolues : (db_path, empreinte) -> id
+_model_versions = {}
+
+# Threads de maintenance : db_path -> Event d'arrêt (un seul par base et par processus)
+_maintenance = {}
+_maintenance_lock = threading.Lock()
+
+
+def create_tables(conn) -> None:
+    """Crée les tables du journal (utilisé par la migration 6)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS model_versions (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            fingerprint TEXT NOT NULL UNIQUE,
+            created_at  INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS prediction_log (
+            ts            INTEGER NOT NULL,
+            news_id       INTEGER NOT NULL,
+            model_version INTEGER NOT NULL,
+            label         INTEGER NOT NULL,
+            probability   REAL,
+            latency_us    INTEGER
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_prediction_log_ts ON prediction_log(ts)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_prediction_log_version"
+        " ON prediction_log(model_version, news_id)"
+    )
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS prediction_log_append_only
+        BEFORE UPDATE ON prediction_log
+        BEGIN
+            SELECT RAISE(ABORT, 'prediction_log est en ajout seul');
+        END
+    """)
+
+
+def get_model_version(db_path: str, fingerprint: str) -> int:
+    """Id entier de la version de modèle `fingerprint` (créé au premier usage)."""
+    key = (db_path, fingerprint)
+    version = _model_versions.get(key)
+    if version is not None:
+        return version
+
+    conn = sqlite3.connect(db_path, timeout=SQLITE_TIMEOUT)
+    conn.execute(
+        "INSERT OR IGNORE INTO model_versions (fingerprint, created_at) VALUES (?, ?)",
+        (fingerprint, int(time.time()))
+    )
+    conn.commit()
+    version = conn.execute(
+        "SELECT id FROM model_versions WHERE fingerprint=?", (fingerprint,)
+    ).fetchone()[0]
+    conn.close()
+    _model_versions[key] = version
+    return version
+
+
+def record(db_path: str, model_version: int, news_ids: list, predictions: list,
+           latency_s: float) -> None:
+    """
+    Met en file les prédictions d'un lot. `predictions` contient des
+    (label, probabilité) ; la latence du lot est répartie sur ses lignes.
+    Les labels hors LABEL_CODES ('unknown') ne sont pas journalisés.
+    """
+    if not news_ids:
+        return
+    ts = int(time.time())
+    latency_us = int(latency_s * 1_000_000 / len(news_ids))
+    rows = [
+        (ts, news_id, model_version, LABEL_CODES[label], proba, latency_us)
+        for news_id, (label, proba) in zip(news_ids, predictions)
+        if label in LABEL_CODES
+    ]
+    with _buffers_lock:
+        buffer = _buffers.setdefault(db_path, [])
+        buffer.extend(rows)
+        full = len(buffer) >= FLUSH_SIZE
+    if full:
+        flush(db_path)
+
+
+def flush(db_path: str = None) -> int:
+    """
+    Écrit les lignes en attente (d'une base, ou de toutes) en une transaction
+    par base. En cas de verrou, les lignes sont remises en file.
+    Retourne le nombre de lignes écrites.
+    """
+    with _buffers_lock:
+        paths = [db_path] if db_path is not None else list(_buffers)
+        pending = {path: _buffers.pop(path, []) for path in paths}
+
+    written = 0
+    for path, rows in pending.items():
+        if not rows:
+            continue
+        if not os.path.exists(path):
+            # Base supprimée entre-temps (ex. base temporaire) : ne pas la recréer
+            logger.warning("Base %s absente : %d prédictions non journalisées", path, len(rows))
+            continue
+        try:
+            conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT)
+            try:
+                conn.executemany(
+                    "INSERT INTO prediction_log (ts, news_id, model_version, label,"
+                    " probability, latency_us) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            written += len(rows)
+        except sqlite3.OperationalError as exc:
+            logger.warning("Journal des prédictions non écrit (%s), nouvel essai plus tard", exc)
+            with _buffers_lock:
+                _buffers[path] = rows + _buffers.get(path, [])
+    return written
+
+
+def prune(db_path: str, retention_days: float = RETENTION_DAYS, now: float = None) -> int:
+    """Supprime les entrées plus anciennes que `retention_days`. Retourne le nombre supprimé."""
+    cutoff = int((now if now is not None else time.time()) - retention_days * 86400)
+    conn = sqlite3.connect(db_path, timeout=SQLITE_TIMEOUT)
+    deleted = conn.execute("DELETE FROM prediction_log WHERE ts < ?", (cutoff,)).rowcount
+    conn.commit()
+    conn.close()
+    return deleted
+
+
+def start_maintenance(db_path: str, retention_days: float = RETENTION_DAYS,
+                      flush_interval: float = FLUSH_INTERVAL,
+                      prune_interval: float = PRUNE_INTERVAL) -> threading.Event:
+    """
+    Lance, une fois par base et par processus, le thread daemon qui appelle
+    `flush(db_path)` toutes les `flush_interval` secondes et `prune(db_path)`
+    toutes les `prune_interval` secondes, indépendamment des entraînements.
+    Retourne l'Event qui l'arrête.
+    """
+    with _maintenance_lock:
+        stop = _maintenance.get(db_path)
+        if stop is not None and not stop.is_set():
+            return stop
+        stop = _maintenance[db_path] = threading.Event()
+
+    def run():
+        next_prune = time.monotonic()
+        while not stop.wait(flush_interval):
+            try:
+                flush(db_path)
+                if time.monotonic() >= next_prune and os.path.exists(db_path):
+                    deleted = prune(db_path, retention_days)
+                    if deleted:
+                        logger.info("Journal des prédictions : %d entrées purgées", deleted)
+                    next_prune = time.monotonic() + prune_interval
+            except sqlite3.Error as exc:
+                logger.warning("Maintenance du journal des prédictions : %s", exc)
+
+    threading.Thread(target=run, name="prediction-log", daemon=True).start()
+    return stop
+
+
+def diff_model_versions(db_path: str, version_a: int, version_b: int) -> dict:
+    """
+    Compare la dernière prédiction de chaque news sous deux versions de modèle.
+    Retourne {"common": n, "agreement": taux, "disagreements": [(news_id, label_a, label_b)]}.
+    """
+    conn = sqlite3.connect(db_path, timeout=SQLITE_TIMEOUT)
+    rows = conn.execute("""
+        WITH latest AS (
+            SELECT news_id, model_version, label, MAX(ts) AS ts
+            FROM prediction_log
+            WHERE model_version IN (?, ?)
+            GROUP BY model_version, news_id
+        )
+        SELECT a.news_id, a.label, b.label
+        FROM latest a JOIN latest b ON a.news_id = b.news_id
+        WHERE a.model_version = ? AND b.model_version = ?
+        ORDER BY a.news_id
+    """, (version_a, version_b, version_a, version_b)).fetchall()
+    conn.close()
+
+    disagreements = [
+        (news_id, LABEL_NAMES[label_a], LABEL_NAMES[label_b])
+        for news_id, label_a, label_b in rows if label_a != label_b
+    ]
+    return {
+        "common":        len(rows),
+        "agreement":     1 - len(disagreements) / len(rows) if rows else None,
+        "disagreements": disagreements,
+    }
+
+
+# Les lignes encore en mémoire à l'arrêt du processus sont écrites
+atexit.register(flush)
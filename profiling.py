@@ -0,0 +1,152 @@
+"""
+profiling.py
+============
+Profilage à la demande des requêtes lentes – TESE935
+
+Quand une requête est profilée (FAKENEWS_PROFILE=1, ou en-tête
+`X-Profile: 1` d'un administrateur, voir app.py), un cProfile tourne pendant
+son traitement. Si elle dépasse le seuil de latence (ou si le profil a été
+demandé par en-tête), le profil est écrit dans le dossier des profils :
+
+    <horodatage>-<id>.prof    stats cProfile (lisible par pstats / snakeviz)
+    <horodatage>-<id>.json    route, méthode, chemin, code HTTP, durée
+
+cProfile ne suit que le thread courant : les fonctions exécutées dans le
+pool de prédiction passent par `wrap`, qui les profile dans leur thread et
+rattache le résultat au profil de la requête.
+
+Seuls les MAX_PROFILES profils les plus récents sont conservés.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILES = 200
+
+_local = threading.local()
+
+
+class Capture:
+    """Profil d'une requête : profileur du thread de la requête + profils des workers."""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.extra = []
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+
+def start():
+    """Démarre le profilage de la requête courante ; None si un profileur est déjà actif."""
+    capture = Capture()
+    try:
+        capture.profiler.enable()
+    except ValueError:
+        # Python ≥ 3.12 : un seul profileur actif à la fois dans le processus
+        return None
+    _local.capture = capture
+    return capture
+
+
+def stop(capture) -> float:
+    """Arrête le profilage et retourne la durée de la requête en secondes."""
+    capture.profiler.disable()
+    _local.capture = None
+    return time.perf_counter() - capture.started
+
+
+def current():
+    """Profil de la requête en cours dans ce thread, ou None."""
+    return getattr(_local, "capture", None)
+
+
+def wrap(fn):
+    """
+    Si la requête courante est profilée, retourne une version de `fn` qui se
+    profile dans le thread où elle s'exécute (pool de prédiction).
+    """
+    capture = current()
+    if capture is None:
+        return fn
+
+    def profiled(*args, **kwargs):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            with capture.lock:
+                capture.extra.append(profiler)
+
+    return profiled
+
+
+def save(capture, profile_dir: str, metadata: dict) -> str:
+    """Écrit le profil et ses métadonnées ; retourne l'identifiant du profil."""
+    os.makedirs(profile_dir, exist_ok=True)
+    profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+    stats = pstats.Stats(capture.profiler)
+    with capture.lock:
+        for profiler in capture.extra:
+            stats.add(profiler)
+    stats.dump_stats(os.path.join(profile_dir, profile_id + ".prof"))
+    with open(os.path.join(profile_dir, profile_id + ".json"), "w", encoding="utf-8") as f:
+        json.dump(dict(metadata, id=profile_id), f)
+    _prune(profile_dir)
+    return profile_id
+
+
+def _prune(profile_dir: str) -> None:
+    """Supprime les profils les plus anciens au-delà de MAX_PROFILES."""
+    ids = sorted(name[:-5] for name in os.listdir(profile_dir) if name.endswith(".json"))
+    for profile_id in ids[:-MAX_PROFILES]:
+        for ext in (".json", ".prof"):
+            try:
+                os.unlink(os.path.join(profile_dir, profile_id + ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(profile_dir: str, recent: int = 100) -> list:
+    """Métadonnées des `recent` derniers profils, de la requête la plus lente à la plus rapide."""
+    if not os.path.isdir(profile_dir):
+        return []
+    names = sorted((n for n in os.listdir(profile_dir) if n.endswith(".json")), reverse=True)
+    profiles = []
+    for name in names[:recent]:
+        try:
+            with open(os.path.join(profile_dir, name), encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    profiles.sort(key=lambda p: p.get("duration_ms", 0), reverse=True)
+    return profiles
+
+
+def profile_path(profile_dir: str, profile_id: str):
+    """Chemin du fichier .prof de `profile_id`, ou None s'il n'existe pas (id validé)."""
+    if not profile_id.replace("-", "").isalnum():
+        return None
+    path = os.path.join(profile_dir, profile_id + ".prof")
+    return path if os.path.exists(path) else None
+
+
+def report(prof_path: str, sort: str = "cumulative", limit: int = 40) -> str:
+    """Résumé texte d'un profil (fonctions les plus coûteuses)."""
+    out = io.StringIO()
+    stats = pstats.Stats(prof_path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
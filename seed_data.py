@@ -5,13 +5,26 @@ Peuple automatiquement la base de données avec :
   - Des vraies news (real)
   - Des fausses news générées automatiquement par mélange (fake)
 
+Génère aussi, pour les tests de charge, des corpus synthétiques volumineux
+(millions d'articles, déterministes) vers SQLite ou JSONL.
+
 TESE935 - À lancer UNE FOIS avant app.py, ou appelé automatiquement au démarrage.
+
+Lancement :
+    python seed_data.py                                   # jeu de démonstration
+    python seed_data.py --synthetic 1000000               # corpus synthétique → news.db
+    python seed_data.py --synthetic 1000000 --jsonl corpus.jsonl
 """
 
+import argparse
+import json
 import sqlite3
 import random
 import os
 
+import sharding
+from migrations import touch_data_version
+
 # Pool de vraies news de base
 REAL_NEWS = [
     {
@@ -106,54 +119,192 @@ def generate_fake_from_real(news_pool: list, seed: int = 42) -> dict:
     }
 
 
-def seed_database(db_path: str, force: bool = False) -> int:
+def _write_batches(db_path: str, batches, n_shards: int = 1, strategy: str = "hash",
+                   window: float = sharding.DEFAULT_WINDOW) -> int:
+    """
+    Insère des lots de (title, content, source, label) dans `db_path`, ou,
+    si `n_shards` > 1, dans ses shards (même répartition et mêmes ids que
+    app.insert_rows). Une transaction par lot et par fichier.
+    Retourne le nombre de lignes insérées.
+    """
+    paths = [db_path] if n_shards <= 1 else sharding.shard_paths(db_path, n_shards)
+    conns = [sqlite3.connect(path) for path in paths]
+    inserted = 0
+    try:
+        for conn in conns:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        for batch in batches:
+            if n_shards <= 1:
+                groups = {0: batch}
+            else:
+                groups = sharding.group_by_shard(batch, lambda row: sharding.pick_shard(
+                    row[0], row[1], n_shards, strategy, window))
+            for shard, group in groups.items():
+                conn = conns[shard]
+                if n_shards <= 1:
+                    conn.executemany(
+                        "INSERT INTO news (title, content, source, label) VALUES (?, ?, ?, ?)",
+                        group
+                    )
+                else:
+                    sharding.insert_rows(conn, shard, n_shards, group)
+                touch_data_version(conn)
+                conn.commit()
+            inserted += len(batch)
+    finally:
+        for conn in conns:
+            conn.close()
+    return inserted
+
+
+def seed_database(db_path: str, force: bool = False, n_shards: int = 1,
+                  strategy: str = "hash", window: float = sharding.DEFAULT_WINDOW) -> int:
     """
     Insère les données dans la base si elle est vide (ou si force=True).
+    Avec `n_shards` > 1, les news vont dans les shards de `db_path`.
     Retourne le nombre de news insérées.
     """
-    conn = sqlite3.connect(db_path)
-
     # Vérifier si la base est déjà peuplée
-    count = conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
-    if count >= 10 and not force:
+    paths = [db_path] if n_shards <= 1 else sharding.shard_paths(db_path, n_shards)
+    count = 0
+    for path in paths:
+        conn = sqlite3.connect(path)
+        count += conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
         conn.close()
+    if count >= 10 and not force:
         return 0
 
-    inserted = 0
-
-    # 1. Insérer les vraies news
-    for news in REAL_NEWS:
-        conn.execute(
-            "INSERT INTO news (title, content, source, label) VALUES (?, ?, ?, ?)",
-            (news["title"], news["content"], news["source"], "real")
-        )
-        inserted += 1
-
-    # 2. Insérer les fausses news écrites à la main
-    for news in HANDCRAFTED_FAKE:
-        conn.execute(
-            "INSERT INTO news (title, content, source, label) VALUES (?, ?, ?, ?)",
-            (news["title"], news["content"], news["source"], "fake")
-        )
-        inserted += 1
-
-    # 3. Générer automatiquement 6 fausses news par mélange de vraies (seeds différents)
+    # 1. Vraies news, 2. fausses news écrites à la main,
+    # 3. 6 fausses news générées par mélange de vraies (seeds différents)
+    rows = [(news["title"], news["content"], news["source"], "real") for news in REAL_NEWS]
+    rows += [(news["title"], news["content"], news["source"], "fake") for news in HANDCRAFTED_FAKE]
     for seed in range(6):
         fake = generate_fake_from_real(REAL_NEWS, seed=seed * 7 + 42)
-        conn.execute(
-            "INSERT INTO news (title, content, source, label) VALUES (?, ?, ?, ?)",
-            (fake["title"], fake["content"], fake["source"], "fake")
-        )
-        inserted += 1
-
-    conn.commit()
-    conn.close()
-    return inserted
+        rows.append((fake["title"], fake["content"], fake["source"], "fake"))
+
+    return _write_batches(db_path, [rows], n_shards, strategy, window)
+
+
+# ---------------------------------------------------------------------------
+# Corpus synthétique volumineux (tests de charge)
+# ---------------------------------------------------------------------------
+
+SYNTHETIC_FAKE_SOURCE = "https://auto-generated-fake.test"
+
+
+def _word_pool(news_pool: list) -> list:
+    """Mots distincts (ordre stable) des titres et contenus d'un pool de news."""
+    words = []
+    for news in news_pool:
+        words.extend((news["title"] + " " + news["content"]).split())
+    return sorted(set(words))
+
+
+def _sample_texts(rng, is_fake, real_pool, fake_pool, length_range):
+    """
+    Tire un texte par ligne de `is_fake` : mots réels uniquement pour les
+    real, mélange moitié réel / moitié faux pour les fake.
+    """
+    size = len(is_fake)
+    lo, hi = length_range
+    lengths = rng.integers(lo, hi + 1, size=size)
+    real_idx = rng.integers(0, len(real_pool), size=(size, hi))
+    fake_idx = rng.integers(0, len(fake_pool), size=(size, hi))
+    from_fake = (rng.random((size, hi)) < 0.5) & is_fake[:, None]
+    words = real_pool[real_idx]
+    words[from_fake] = fake_pool[fake_idx][from_fake]
+    return [" ".join(row[:n]) for row, n in zip(words.tolist(), lengths.tolist())]
+
+
+def generate_synthetic_batches(n: int, seed: int = 42, batch_size: int = 10_000,
+                               fake_ratio: float = 0.5,
+                               title_words: tuple = (5, 10),
+                               content_words: tuple = (20, 60)):
+    """
+    Génère `n` news synthétiques par lots de `batch_size`, tirés avec NumPy.
+    Chaque lot est une liste de tuples (title, content, source, label).
+
+    Déterministe : le lot i est tiré avec la graine (seed, i), donc un même
+    (seed, batch_size) redonne exactement le même corpus.
+    """
+    import numpy as np
+
+    real_pool = np.array(_word_pool(REAL_NEWS), dtype=object)
+    fake_pool = np.array(_word_pool(HANDCRAFTED_FAKE), dtype=object)
+    real_sources = np.array([news["source"] for news in REAL_NEWS], dtype=object)
+
+    for batch_index, start in enumerate(range(0, n, batch_size)):
+        size = min(batch_size, n - start)
+        rng = np.random.default_rng([seed, batch_index])
+
+        is_fake = rng.random(size) < fake_ratio
+        titles = _sample_texts(rng, is_fake, real_pool, fake_pool, title_words)
+        contents = _sample_texts(rng, is_fake, real_pool, fake_pool, content_words)
+        sources = np.where(
+            is_fake, SYNTHETIC_FAKE_SOURCE,
+            real_sources[rng.integers(0, len(real_sources), size=size)]
+        ).tolist()
+        labels = np.where(is_fake, "fake", "real").tolist()
+
+        yield list(zip(titles, contents, sources, labels))
+
+
+def write_synthetic_sqlite(db_path: str, n: int, n_shards: int = 1, strategy: str = "hash",
+                           window: float = sharding.DEFAULT_WINDOW, **kwargs) -> int:
+    """
+    Insère `n` news synthétiques dans la table news (qui doit exister), ou
+    dans les shards de `db_path` si `n_shards` > 1, un executemany et un
+    commit par lot. Retourne le nombre de lignes insérées.
+    """
+    return _write_batches(db_path, generate_synthetic_batches(n, **kwargs),
+                          n_shards, strategy, window)
+
+
+def write_synthetic_jsonl(path: str, n: int, **kwargs) -> int:
+    """Écrit `n` news synthétiques, une par ligne JSON. Retourne le nombre écrit."""
+    # Un seul encodeur : json.dumps(..., ensure_ascii=False) en recrée un à chaque appel
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in generate_synthetic_batches(n, **kwargs):
+            f.write("".join(
+                encode({"title": t, "content": c, "source": s, "label": l}) + "\n"
+                for t, c, s, l in batch
+            ))
+            written += len(batch)
+    return written
 
 
 if __name__ == "__main__":
-    # Permet aussi de lancer le script directement : python seed_data.py
-    from app import DB_PATH, init_db
-    init_db()
-    n = seed_database(DB_PATH, force=True)
-    print(f"✅ {n} news insérées dans la base.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Peuplement de la base de news")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Nombre de news synthétiques à générer")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--fake-ratio", type=float, default=0.5)
+    parser.add_argument("--jsonl", default=None,
+                        help="Écrire le corpus synthétique dans ce fichier JSONL plutôt qu'en base")
+    parser.add_argument("--db", default=None, help="Base SQLite cible (défaut : news.db)")
+    args = parser.parse_args()
+
+    options = {"seed": args.seed, "batch_size": args.batch_size, "fake_ratio": args.fake_ratio}
+
+    if args.synthetic and args.jsonl:
+        n = write_synthetic_jsonl(args.jsonl, args.synthetic, **options)
+        print(f"✅ {n} news synthétiques écrites dans {args.jsonl}.")
+    else:
+        # Permet aussi de lancer le script directement : python seed_data.py
+        import app
+        if args.db:
+            app.DB_PATH = args.db
+        app.init_db()
+        # Mode shardé (FAKENEWS_SHARDS) : écritures réparties comme par l'application
+        shards = {"n_shards": max(app.SHARD_COUNT, 1), "strategy": app.SHARD_STRATEGY,
+                  "window": app.SHARD_WINDOW}
+        if args.synthetic:
+            n = write_synthetic_sqlite(app.DB_PATH, args.synthetic, **shards, **options)
+            print(f"✅ {n} news synthétiques insérées dans {app.DB_PATH}.")
+        else:
+            n = seed_database(app.DB_PATH, force=True, **shards)
+            print(f"✅ {n} news insérées dans la base.")
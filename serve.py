@@ -0,0 +1,93 @@
+"""
+serve.py
+========
+Mode de service "production" de l'application – TESE935
+
+Remplace `app.run()` (serveur de développement Flask, mono-requête) par :
+  - un serveur WSGI multi-threads (waitress si installé, sinon le serveur
+    threadé de Werkzeug),
+  - un modèle préchargé, validé et chauffé avant la première requête
+    (app.warm_up), avec les sondes /healthz (vivacité) et /readyz
+    (disponibilité) pour le répartiteur de charge,
+  - le thread d'entraînement périodique, lancé une seule fois par processus,
+    après le préchargement.
+
+Les prédictions sklearn sont exécutées dans le pool borné de `app`
+(FAKENEWS_PREDICT_WORKERS threads) ; SQLite est ouvert en mode WAL.
+
+Lancement :
+    python serve.py --threads 8 --predict-workers 2
+    FAKENEWS_THREADS=8 python serve.py
+
+Multi-processus (sans entraînement dans les workers) :
+    gunicorn -w 4 --threads 4 "serve:create_app()"
+"""
+
+import argparse
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_app(start_training: bool = False, interval_seconds: float = None,
+               background: bool = False):
+    """
+    Initialise la base, précharge le modèle et retourne l'application WSGI.
+    Le thread d'entraînement n'est lancé que si `start_training` est vrai ;
+    sans `interval_seconds`, il suit FAKENEWS_TRAIN_MIN_INTERVAL.
+    Avec `background`, le préchargement continue après le retour : /readyz
+    répond 503 tant qu'il n'est pas terminé.
+    """
+    import app as app_module
+
+    if interval_seconds is None:
+        interval_seconds = app_module.TRAIN_MIN_INTERVAL
+    app_module.start_up(start_training=start_training,
+                        interval_seconds=interval_seconds, background=background)
+    return app_module.app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur WSGI du FakeNews Detector")
+    parser.add_argument("--host", default=os.environ.get("FAKENEWS_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("FAKENEWS_PORT", "5000")))
+    parser.add_argument("--threads", type=int,
+                        default=int(os.environ.get("FAKENEWS_THREADS", "8")),
+                        help="Nombre de threads du serveur HTTP")
+    parser.add_argument("--predict-workers", type=int, default=None,
+                        help="Taille du pool de prédiction (FAKENEWS_PREDICT_WORKERS)")
+    parser.add_argument("--train-interval", type=float, default=None,
+                        help="Intervalle d'entraînement en secondes"
+                             " (défaut : FAKENEWS_TRAIN_MIN_INTERVAL)")
+    parser.add_argument("--no-training", action="store_true",
+                        help="Ne pas lancer le thread d'entraînement")
+    args = parser.parse_args()
+
+    # Doit être positionné avant l'import de `app`, qui crée le pool au chargement
+    if args.predict_workers is not None:
+        os.environ["FAKENEWS_PREDICT_WORKERS"] = str(args.predict_workers)
+
+    # Le serveur écoute pendant le préchargement : /healthz répond, /readyz attend
+    application = create_app(
+        start_training=not args.no_training, interval_seconds=args.train_interval,
+        background=True,
+    )
+
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+
+    if serve is not None:
+        logger.info("waitress sur %s:%d (%d threads)", args.host, args.port, args.threads)
+        serve(application, host=args.host, port=args.port, threads=args.threads)
+    else:
+        # Le serveur Werkzeug crée un thread par requête : pas de borne sur --threads
+        from werkzeug.serving import run_simple
+        logger.info("waitress absent — serveur Werkzeug threadé sur %s:%d", args.host, args.port)
+        run_simple(args.host, args.port, application, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
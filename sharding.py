@@ -0,0 +1,173 @@
+"""
+sharding.py
+===========
+Répartition de la table news sur plusieurs fichiers SQLite – TESE935
+
+Avec un seul `news.db`, toute écriture (ajout, mise à jour des prédictions)
+prend l'unique verrou d'écriture de SQLite. En mode shardé (FAKENEWS_SHARDS=N),
+la table `news` est répartie sur N fichiers `<base>.shard<i>.db` ayant le même
+schéma (voir migrations.py) ; la base principale garde les tables annexes
+(training_runs, prediction_log, model_versions).
+
+Une news est placée :
+  - "hash" : selon le hachage de son texte (répartition uniforme),
+  - "time" : selon la fenêtre de temps de son insertion (`window` secondes),
+    les news d'une même période partagent un fichier.
+
+Quelle que soit la stratégie, l'id d'une news du shard i vérifie
+`id % N == i` (voir INSERT_SQL) : les ids restent uniques entre shards et
+`shard_of_id` retrouve le fichier sans table de routage.
+
+Les lectures et le re-scoring sont faits en parallèle sur les shards
+(`fan_out`), puis fusionnés (`merge_sorted`).
+
+Découper une base existante (les ids sont conservés) :
+    python sharding.py --db news.db --shards 4
+"""
+
+import argparse
+import hashlib
+import heapq
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ml.text_cache import article_text
+from migrations import migrate, touch_data_version
+
+SHARD_STRATEGIES = ("hash", "time")
+DEFAULT_WINDOW   = 86400          # stratégie "time" : une fenêtre par jour
+FAN_OUT_WORKERS  = 16
+SPLIT_CHUNK_SIZE = 5000
+
+# Le prochain id d'un shard est le plus grand id du shard + N (ou i + N pour
+# le premier) ; calculé dans la même instruction que l'insertion, donc sous
+# le verrou d'écriture du fichier. Paramètres : (i, N, title, content, source, label).
+INSERT_SQL = (
+    "INSERT INTO news (id, title, content, source, label)"
+    " VALUES ((SELECT COALESCE(MAX(id), ?) FROM news) + ?, ?, ?, ?, ?)"
+)
+
+_executor = ThreadPoolExecutor(max_workers=FAN_OUT_WORKERS, thread_name_prefix="shard")
+
+
+def shard_paths(db_path: str, n: int) -> list:
+    """Chemins des N fichiers shards à côté de `db_path` (news.db → news.shard0.db, ...)."""
+    root, ext = os.path.splitext(db_path)
+    return [f"{root}.shard{i}{ext or '.db'}" for i in range(n)]
+
+
+def shard_of_id(news_id: int, n: int) -> int:
+    """Indice du shard contenant la news `news_id`."""
+    return news_id % n
+
+
+def pick_shard(title: str, content: str, n: int, strategy: str = "hash",
+               window: float = DEFAULT_WINDOW, now: float = None) -> int:
+    """Indice du shard recevant une nouvelle news."""
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"strategy doit être parmi {SHARD_STRATEGIES}, reçu {strategy!r}")
+    if strategy == "time":
+        return int((time.time() if now is None else now) // window) % n
+    text = article_text(title, content).encode("utf-8", "surrogatepass")
+    return int.from_bytes(hashlib.blake2b(text, digest_size=8).digest(), "big") % n
+
+
+def insert_rows(conn, shard: int, n: int, rows: list) -> list:
+    """
+    Insère des (title, content, source, label) dans le shard `shard` ouvert
+    par `conn` et retourne leurs ids.
+    """
+    return [conn.execute(INSERT_SQL, (shard, n) + tuple(row)).lastrowid for row in rows]
+
+
+def group_by_shard(items: list, shard_of) -> dict:
+    """{indice de shard: [éléments]} selon la fonction `shard_of(élément)`."""
+    groups = {}
+    for item in items:
+        groups.setdefault(shard_of(item), []).append(item)
+    return groups
+
+
+def fan_out(fn, items: list) -> list:
+    """
+    Applique `fn` à chaque élément (un par shard) en parallèle et retourne les
+    résultats dans l'ordre. `fn` ne doit pas rappeler fan_out (pool partagé).
+    """
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    return list(_executor.map(fn, items))
+
+
+def merge_sorted(row_lists: list, order_by: str) -> list:
+    """
+    Fusionne des listes de lignes déjà triées par `order_by` ("colonne ASC|DESC",
+    comme dans la requête de chaque shard). NULL est placé comme par SQLite :
+    en tête en ASC, en fin en DESC.
+    """
+    column, direction = order_by.split()
+    descending = direction.upper() == "DESC"
+
+    def key(row):
+        value = row[column]
+        return (value is not None, value if value is not None else 0)
+
+    if len(row_lists) == 1:
+        return list(row_lists[0])
+    return list(heapq.merge(*row_lists, key=key, reverse=descending))
+
+
+def split_database(db_path: str, n: int, chunk_size: int = SPLIT_CHUNK_SIZE) -> list:
+    """
+    Copie les news de `db_path` dans N shards (news d'id k → shard k % N, ids
+    conservés). La base et les shards doivent être migrés. Retourne le nombre
+    de lignes copiées par shard ; la table d'origine n'est pas modifiée.
+    """
+    paths = shard_paths(db_path, n)
+    src = sqlite3.connect(db_path)
+    targets = [sqlite3.connect(path) for path in paths]
+    copied = [0] * n
+    try:
+        cursor = src.execute(
+            "SELECT id, title, content, source, label, predicted, created, confidence FROM news"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for shard, group in group_by_shard(rows, lambda row: row[0] % n).items():
+                targets[shard].executemany(
+                    "INSERT OR IGNORE INTO news (id, title, content, source, label,"
+                    " predicted, created, confidence) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    group
+                )
+                copied[shard] += len(group)
+        for conn in targets:
+            touch_data_version(conn)
+            conn.commit()
+    finally:
+        src.close()
+        for conn in targets:
+            conn.close()
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Découpe news.db en N shards")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "news.db"))
+    parser.add_argument("--shards", type=int, required=True)
+    args = parser.parse_args()
+
+    for path in [args.db] + shard_paths(args.db, args.shards):
+        conn = sqlite3.connect(path)
+        migrate(conn)
+        conn.close()
+    copied = split_database(args.db, args.shards)
+    print(f"{sum(copied)} news copiées : " + ", ".join(
+        f"shard{i}={count}" for i, count in enumerate(copied)))
+    print(f"Lancer l'application avec FAKENEWS_SHARDS={args.shards}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+tests/test_bundle.py
+====================
+Tests du bundle portable du modèle – TESE935
+
+Vérifie que :
+  - le scoreur du bundle produit les mêmes prédictions que predict_news
+  - les probabilités sont celles de pipeline.predict_proba
+  - la tokenisation reproduit celle de CountVectorizer
+  - charger le bundle n'importe pas scikit-learn
+
+Lancement :
+    python -m unittest tests/test_bundle.py -v   (sans pytest)
+    pytest tests/test_bundle.py -v               (avec pytest)
+"""
+
+import sys
+import os
+import json
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import unittest
+import zipfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.bundle import BUNDLE_VERSION, export_bundle, load_bundle
+from ml.predictor import load_model, predict_news
+from ml.trainer import train_model
+from tests.test_training import create_test_db
+
+EXTRA_TEXTS = [
+    "Breaking: the government hides alien technology in Area 51",
+    "Central bank raises interest rates by a quarter point",
+    "",
+    "Ünïcödé tëxt with accents, 中文 and emoji 🚀",
+    "the the the and of",          # que des mots vides
+]
+
+
+class TestBundle(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fd, cls.db_path = create_test_db()
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.model_path = os.path.join(cls.tmpdir, "model.pkl")
+        cls.bundle_path = os.path.join(cls.tmpdir, "model.bundle.zip")
+        train_model(cls.db_path, cls.model_path, evaluation="skip", record_run=False)
+        cls.manifest = export_bundle(cls.model_path, cls.bundle_path)
+        conn = sqlite3.connect(cls.db_path)
+        cls.texts = [row[0] for row in conn.execute("SELECT title || ' ' || content FROM news")]
+        conn.close()
+        cls.texts += EXTRA_TEXTS
+
+    @classmethod
+    def tearDownClass(cls):
+        os.close(cls.fd)
+        os.unlink(cls.db_path)
+        shutil.rmtree(cls.tmpdir)
+
+    def test_parity_with_predict_news(self):
+        """Même label que predict_news pour chaque texte."""
+        scorer = load_bundle(self.bundle_path)
+        expected = [predict_news(text, self.model_path) for text in self.texts]
+        self.assertEqual(scorer.predict(self.texts), expected)
+
+    def test_probabilities_match_pipeline(self):
+        scorer = load_bundle(self.bundle_path)
+        expected = load_model(self.model_path).predict_proba(self.texts)
+        np.testing.assert_allclose(scorer.predict_proba(self.texts), expected, rtol=1e-9, atol=1e-12)
+
+    def test_tokens_match_countvectorizer(self):
+        from sklearn.feature_extraction.text import CountVectorizer
+        analyze = CountVectorizer(ngram_range=(1, 2), stop_words="english").build_analyzer()
+        scorer = load_bundle(self.bundle_path)
+        for text in self.texts:
+            self.assertEqual(sorted(scorer.analyze(text)), sorted(analyze(text)))
+
+    def test_bundle_contents(self):
+        with zipfile.ZipFile(self.bundle_path) as zf:
+            names = set(zf.namelist())
+            manifest = json.loads(zf.read("manifest.json"))
+        self.assertEqual(names, {"manifest.json", "vocabulary.json", "stop_words.json",
+                                 "class_log_prior.npy", "feature_log_prob.npy"})
+        self.assertEqual(manifest["version"], BUNDLE_VERSION)
+        self.assertEqual(manifest["classes"], ["fake", "real"])
+        self.assertEqual(manifest["ngram_range"], [1, 2])
+
+    def test_rejects_newer_version(self):
+        path = os.path.join(self.tmpdir, "future.zip")
+        with zipfile.ZipFile(self.bundle_path) as src, zipfile.ZipFile(path, "w") as dst:
+            for name in src.namelist():
+                data = src.read(name)
+                if name == "manifest.json":
+                    manifest = json.loads(data)
+                    manifest["version"] = BUNDLE_VERSION + 1
+                    data = json.dumps(manifest)
+                dst.writestr(name, data)
+        with self.assertRaises(ValueError):
+            load_bundle(path)
+
+    def test_loader_does_not_import_sklearn(self):
+        """Le chargement et le scoring n'ont besoin que de NumPy."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = ("import sys; from ml.bundle import load_bundle; "
+                f"print(load_bundle({self.bundle_path!r}).predict(['test news'])[0], "
+                "'sklearn' in sys.modules)")
+        out = subprocess.run([sys.executable, "-c", code], cwd=root,
+                             capture_output=True, text=True, check=True).stdout.split()
+        self.assertIn(out[0], ("real", "fake"))
+        self.assertEqual(out[1], "False")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -13,7 +13,9 @@ Lancement :
 
 import sys
 import os
+import json
 import random
+import sqlite3
 import string
 import tempfile
 import unittest
@@ -21,7 +23,9 @@ import unittest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import app as app_module
+import prediction_log
 from app import app
+from seed_data import generate_synthetic_batches, write_synthetic_sqlite, write_synthetic_jsonl
 
 
 # ──────────────────────────────────────────────────────────────
@@ -119,6 +123,7 @@ def make_client():
 
 
 def teardown_client(fd, db_path, original_db):
+    prediction_log.flush(db_path)
     app_module.DB_PATH = original_db
     os.close(fd)
     os.unlink(db_path)
@@ -187,6 +192,63 @@ class TestFakeNewsGenerator(unittest.TestCase):
             self.assertEqual(response.status_code, 200)
 
 
+# ──────────────────────────────────────────────────────────────
+# Tests du générateur de corpus synthétique (volume)
+# ──────────────────────────────────────────────────────────────
+
+class TestSyntheticCorpus(unittest.TestCase):
+
+    def test_generates_requested_count(self):
+        """Le générateur doit produire exactement n news, réparties en lots."""
+        batches = list(generate_synthetic_batches(2500, batch_size=1000))
+        self.assertEqual([len(b) for b in batches], [1000, 1000, 500])
+
+    def test_same_seed_is_reproducible(self):
+        """Une même graine doit redonner exactement le même corpus."""
+        a = [row for b in generate_synthetic_batches(300, seed=7, batch_size=100) for row in b]
+        b = [row for b in generate_synthetic_batches(300, seed=7, batch_size=100) for row in b]
+        c = [row for b in generate_synthetic_batches(300, seed=8, batch_size=100) for row in b]
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    def test_rows_are_valid(self):
+        """Chaque news doit avoir titre, contenu non vides et un label real/fake."""
+        for title, content, source, label in next(generate_synthetic_batches(200)):
+            self.assertTrue(title and content and source)
+            self.assertIn(label, ("real", "fake"))
+
+    def test_write_to_sqlite(self):
+        """L'écriture en base doit insérer toutes les news synthétiques."""
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        original_db = app_module.DB_PATH
+        try:
+            app_module.DB_PATH = db_path
+            app_module.init_db()
+            inserted = write_synthetic_sqlite(db_path, 1500, batch_size=500)
+            self.assertEqual(inserted, 1500)
+            conn = sqlite3.connect(db_path)
+            count = conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
+            conn.close()
+            self.assertEqual(count, 4 + 1500)   # 4 exemples de init_db
+        finally:
+            app_module.DB_PATH = original_db
+            os.close(fd)
+            os.unlink(db_path)
+
+    def test_write_to_jsonl(self):
+        """L'écriture JSONL doit produire une ligne JSON valide par news."""
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        try:
+            self.assertEqual(write_synthetic_jsonl(path, 50), 50)
+            with open(path, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f]
+            self.assertEqual(len(rows), 50)
+            self.assertEqual(set(rows[0]), {"title", "content", "source", "label"})
+        finally:
+            os.unlink(path)
+
+
 # ──────────────────────────────────────────────────────────────
 # Fuzz Tests
 # ──────────────────────────────────────────────────────────────
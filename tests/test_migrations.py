@@ -0,0 +1,166 @@
+"""
+tests/test_migrations.py
+========================
+Tests des migrations de schéma et des index SQLite – TESE935
+
+Vérifie que :
+  - une base neuve est créée à la dernière version du schéma
+  - une base existante (schéma d'origine) est migrée sans perte
+  - les requêtes fréquentes utilisent bien les index (EXPLAIN QUERY PLAN)
+
+Lancement :
+    python -m unittest tests/test_migrations.py -v   (sans pytest)
+    pytest tests/test_migrations.py -v               (avec pytest)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import (migrate, get_schema_version, touch_data_version,
+                        MIGRATIONS, SCHEMA_VERSION)
+
+
+def query_plan(conn, query, params=()):
+    """Retourne le plan d'exécution de `query` sous forme d'une seule chaîne."""
+    rows = conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        self.conn = sqlite3.connect(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        os.close(self.fd)
+        os.unlink(self.db_path)
+
+    def test_fresh_db_reaches_latest_version(self):
+        """Une base vide doit être amenée à SCHEMA_VERSION."""
+        applied = migrate(self.conn)
+        self.assertEqual(applied, list(range(1, SCHEMA_VERSION + 1)))
+        self.assertEqual(get_schema_version(self.conn), SCHEMA_VERSION)
+
+    def test_migrate_is_idempotent(self):
+        """Relancer migrate ne doit rien réappliquer."""
+        migrate(self.conn)
+        self.assertEqual(migrate(self.conn), [])
+
+    def test_published_migrations_are_frozen(self):
+        """La v3 crée training_runs sans peak_rss_bytes ; c'est la v5 qui l'ajoute."""
+        columns = lambda: [row[1] for row in self.conn.execute("PRAGMA table_info(training_runs)")]
+        for version, _, apply in MIGRATIONS[:3]:
+            apply(self.conn)
+        self.assertNotIn("peak_rss_bytes", columns())
+        self.conn.execute("PRAGMA user_version = 3")
+        self.assertIn(5, migrate(self.conn))
+        self.assertIn("peak_rss_bytes", columns())
+
+    def test_data_version_bumped_once_per_transaction(self):
+        """Pas de trigger par ligne : touch_data_version incrémente une fois par écriture."""
+        migrate(self.conn)
+        version = lambda: self.conn.execute("SELECT version FROM data_version").fetchone()[0]
+        triggers = self.conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name LIKE 'news_data_version_%'"
+        ).fetchone()[0]
+        self.assertEqual(triggers, 0)
+        self.conn.executemany("INSERT INTO news (title, content) VALUES (?, 'c')",
+                              [(str(i),) for i in range(100)])
+        self.conn.execute("UPDATE news SET predicted = 'real'")
+        touch_data_version(self.conn)
+        self.conn.commit()
+        self.assertEqual(version(), 1)
+
+    def test_legacy_db_is_migrated_without_data_loss(self):
+        """Une base au schéma d'origine doit gagner les colonnes/index en gardant ses lignes."""
+        self.conn.execute("""
+            CREATE TABLE news (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL, content TEXT NOT NULL, source TEXT,
+                label TEXT NOT NULL DEFAULT 'unknown', predicted TEXT DEFAULT NULL,
+                created DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.conn.execute(
+            "INSERT INTO news (title, content, label) VALUES ('Titre', 'Contenu', 'real')"
+        )
+        self.conn.commit()
+
+        migrate(self.conn)
+
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(news)")]
+        self.assertIn("confidence", columns)
+        count = self.conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
+        self.assertEqual(count, 1)
+        indexes = {row[1] for row in self.conn.execute("PRAGMA index_list(news)")}
+        self.assertTrue({"idx_news_label", "idx_news_created", "idx_news_unscored",
+                         "idx_news_confidence"} <= indexes)
+
+
+class TestQueryPlans(unittest.TestCase):
+
+    def setUp(self):
+        self.fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        self.conn = sqlite3.connect(self.db_path)
+        migrate(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        os.close(self.fd)
+        os.unlink(self.db_path)
+
+    def test_training_query_scans_labelled_table(self):
+        """
+        Table entièrement annotée, statistiques à jour : le jeu d'entraînement est
+        lu par un parcours de table, le comptage par label via l'index couvrant.
+        """
+        self.conn.executemany("INSERT INTO news (title, content, label) VALUES ('t', 'c', ?)",
+                              [("real" if i % 2 else "fake",) for i in range(200)])
+        self.conn.execute("ANALYZE news")
+        plan = query_plan(self.conn,
+            "SELECT title, content, label FROM news WHERE label IN ('real', 'fake')")
+        self.assertIn("SCAN news", plan)
+        self.assertNotIn("idx_news_label", plan)
+        plan = query_plan(self.conn,
+            "SELECT label, COUNT(*) FROM news WHERE label IN ('real', 'fake') GROUP BY label")
+        self.assertIn("COVERING INDEX idx_news_label", plan)
+
+    def test_migration_collects_statistics(self):
+        """Une base existante (v8) gagne les statistiques de news avec la v9."""
+        self.conn.executemany("INSERT INTO news (title, content, label) VALUES ('t', 'c', ?)",
+                              [("real",), ("fake",)])
+        self.conn.execute("DELETE FROM sqlite_stat1")
+        self.conn.execute("PRAGMA user_version = 8")
+        self.conn.commit()
+        self.assertEqual(migrate(self.conn), [9])
+        stats = self.conn.execute(
+            "SELECT idx FROM sqlite_stat1 WHERE tbl = 'news'").fetchall()
+        self.assertIn(("idx_news_label",), stats)
+
+    def test_homepage_query_uses_created_index(self):
+        """La liste triée par date ne doit pas nécessiter de tri temporaire."""
+        plan = query_plan(self.conn, "SELECT * FROM news ORDER BY created DESC")
+        self.assertIn("idx_news_created", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_unscored_query_uses_partial_index(self):
+        """La recherche des news non prédites doit utiliser l'index partiel."""
+        plan = query_plan(self.conn, "SELECT id FROM news WHERE predicted IS NULL")
+        self.assertIn("idx_news_unscored", plan)
+
+    def test_confidence_filter_uses_index(self):
+        """Le filtre par confiance doit utiliser idx_news_confidence."""
+        plan = query_plan(self.conn,
+            "SELECT * FROM news WHERE confidence >= ? ORDER BY confidence DESC", (0.8,))
+        self.assertIn("idx_news_confidence", plan)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -13,13 +13,24 @@ Lancement :
 
 import sys
 import os
+import gzip
+import json
+import shutil
+import sqlite3
+import subprocess
 import unittest
 import tempfile
+import threading
+import time
+from unittest import mock
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import app as app_module
+import prediction_log
 from app import app
+from migrations import touch_data_version
+from ml.trainer import train_model
 
 
 def make_client():
@@ -34,6 +45,7 @@ def make_client():
 
 
 def teardown_client(fd, db_path, original_db):
+    prediction_log.flush(db_path)
     app_module.DB_PATH = original_db
     os.close(fd)
     os.unlink(db_path)
@@ -86,6 +98,16 @@ class TestNavigation(unittest.TestCase):
         self.assertIn("news_count", data)
         self.assertIsInstance(data["news_count"], int)
 
+    def test_sqlite_lock_returns_503(self):
+        """Un verrou SQLite non obtenu doit donner 503 (et non 500) et être compté."""
+        before = app_module._sqlite_lock_errors
+        with mock.patch.object(app_module, "get_connection",
+                               side_effect=sqlite3.OperationalError("database is locked")):
+            response = self.client.get("/status")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers.get("Retry-After"), "1")
+        self.assertEqual(app_module._sqlite_lock_errors, before + 1)
+
     def test_404_on_unknown_route(self):
         """Une route inexistante doit retourner 404."""
         response = self.client.get("/route-qui-nexiste-pas")
@@ -167,5 +189,482 @@ class TestAddNews(unittest.TestCase):
         self.assertEqual(after, before + 1)
 
 
+# ──────────────────────────────────────────────────────────────
+# 3. Cache et rendu conditionnel de la page d'accueil
+# ──────────────────────────────────────────────────────────────
+
+class TestIndexCache(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.fd, self.db_path, self.orig_db = make_client()
+
+    def tearDown(self):
+        teardown_client(self.fd, self.db_path, self.orig_db)
+
+    def test_homepage_has_etag_and_last_modified(self):
+        """La page d'accueil doit exposer ETag et Last-Modified."""
+        response = self.client.get("/")
+        self.assertIsNotNone(response.headers.get("ETag"))
+        self.assertIsNotNone(response.headers.get("Last-Modified"))
+
+    def test_homepage_returns_304_when_unchanged(self):
+        """Avec un ETag à jour, la page d'accueil doit retourner 304 sans corps."""
+        etag = self.client.get("/").headers["ETag"]
+        response = self.client.get("/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+
+    def test_etag_changes_after_insert(self):
+        """Une insertion doit invalider le cache (nouvel ETag)."""
+        etag = self.client.get("/").headers["ETag"]
+        app_module.insert_news("Cache invalidation test", "Contenu.", "", "real")
+        response = self.client.get("/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Cache invalidation test", response.data)
+
+    def test_write_from_other_process_invalidates(self):
+        """Une écriture d'un autre processus (autre worker, entraînement) invalide le cache."""
+        etag = self.client.get("/").headers["ETag"]
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO news (title, content, source, label) "
+                     "VALUES ('Written by another worker', 'c', '', 'real')")
+        touch_data_version(conn)
+        conn.commit()
+        conn.close()
+        response = self.client.get("/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Written by another worker", response.data)
+
+    def test_rescore_bumps_version_once(self):
+        """Re-scoring complet et ajout en lot : une incrémentation par transaction."""
+        version = app_module.read_data_version()[0]
+        app_module.insert_rows([("t", "c", "", "real")] * 20)
+        self.assertEqual(app_module.read_data_version()[0], version + 1)
+        with mock.patch.object(app_module, "run_prediction",
+                               side_effect=lambda fn, texts, *a: [("real", 0.9)] * len(texts)):
+            app_module._rescore(self.db_path)
+        self.assertEqual(app_module.read_data_version()[0], version + 2)
+
+    def test_homepage_gzip(self):
+        """Si le client accepte gzip, la page doit être compressée."""
+        response = self.client.get("/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers.get("Content-Encoding"), "gzip")
+        self.assertIn(b"FakeNews Detector", gzip.decompress(response.data))
+
+
+# ──────────────────────────────────────────────────────────────
+# 4. Confiance des prédictions
+# ──────────────────────────────────────────────────────────────
+
+class TestConfidence(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.fd, self.db_path, self.orig_db = make_client()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE news SET predicted='real', confidence=0.95 WHERE id=1")
+        conn.execute("UPDATE news SET predicted='fake', confidence=0.55 WHERE id=2")
+        conn.commit()
+        conn.close()
+        app_module.bump_data_version()
+
+    def tearDown(self):
+        teardown_client(self.fd, self.db_path, self.orig_db)
+
+    def test_update_predictions_fills_confidence(self):
+        """Le re-scoring en masse doit renseigner la colonne confidence."""
+        if not os.path.exists(app_module.MODEL_PATH):
+            self.skipTest("modèle absent")
+        app_module.update_predictions()
+        conn = sqlite3.connect(self.db_path)
+        missing = conn.execute(
+            "SELECT COUNT(*) FROM news WHERE confidence IS NULL"
+        ).fetchone()[0]
+        conn.close()
+        self.assertEqual(missing, 0)
+
+    def test_filter_by_min_confidence(self):
+        """Le filtre min_confidence doit exclure les prédictions peu sûres."""
+        rows = app_module.get_all_news(min_confidence=0.9)
+        self.assertEqual([row["id"] for row in rows], [1])
+
+    def test_sort_by_confidence(self):
+        """Le tri 'confidence' doit placer les prédictions les moins sûres en premier."""
+        rows = app_module.get_all_news(sort="confidence", min_confidence=0.0)
+        self.assertEqual([row["id"] for row in rows], [2, 1])
+
+    def test_homepage_with_confidence_filter(self):
+        """La page d'accueil filtrée doit répondre 200 et n'afficher que les lignes retenues."""
+        response = self.client.get("/?sort=-confidence&min_confidence=0.9")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Scientists discover water on Mars", response.data)
+        self.assertNotIn(b"Aliens landed in Paris", response.data)
+
+
+# ──────────────────────────────────────────────────────────────
+# 5. Planification des ré-entraînements
+# ──────────────────────────────────────────────────────────────
+
+class TestTrainingScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.fd, self.db_path, self.orig_db = make_client()
+        app_module._retrain_requested.clear()
+
+    def tearDown(self):
+        app_module._retrain_requested.clear()
+        teardown_client(self.fd, self.db_path, self.orig_db)
+
+    def decide(self, **kwargs):
+        params = dict(elapsed=60, new_rows=50, inflight=0, rps=0.0,
+                      has_model=True, min_interval=30)
+        params.update(kwargs)
+        return app_module.decide_retrain(**params)
+
+    def test_retrains_on_new_rows(self):
+        """Assez de nouvelles news annotées et un serveur calme : ré-entraînement."""
+        self.assertEqual(self.decide(), "new_rows")
+
+    def test_waits_without_new_rows(self):
+        """Sans nouvelle donnée annotée, inutile de ré-entraîner."""
+        self.assertIsNone(self.decide(new_rows=0, elapsed=10**6))
+
+    def test_respects_min_interval(self):
+        """Deux entraînements automatiques doivent être espacés d'au moins min_interval."""
+        self.assertIsNone(self.decide(elapsed=5))
+
+    def test_backs_off_when_busy(self):
+        """Sous charge, le ré-entraînement est reporté…"""
+        self.assertIsNone(self.decide(inflight=app_module.TRAIN_BUSY_INFLIGHT))
+        self.assertIsNone(self.decide(rps=app_module.TRAIN_BUSY_RPS))
+
+    def test_max_interval_overrides_load(self):
+        """…mais pas au-delà de TRAIN_MAX_INTERVAL."""
+        self.assertEqual(
+            self.decide(elapsed=app_module.TRAIN_MAX_INTERVAL, new_rows=1, rps=10**6),
+            "max_interval")
+
+    def test_initial_training_without_model(self):
+        """Sans modèle, on entraîne dès qu'il y a des données."""
+        self.assertEqual(self.decide(has_model=False, elapsed=0, new_rows=4), "initial")
+
+    def test_admin_forces_retrain(self):
+        """Une demande explicite passe avant toutes les autres règles."""
+        self.assertEqual(self.decide(forced=True, new_rows=0, elapsed=0), "admin")
+
+    def test_failed_cycle_is_retried(self):
+        """Un cycle en échec ne consomme pas les news annotées : il est retenté."""
+        class Stop(BaseException):
+            pass
+
+        cycle = mock.Mock(side_effect=[sqlite3.OperationalError("database is locked"), Stop()])
+        with mock.patch.object(app_module, "run_training_cycle", cycle), \
+             mock.patch.object(app_module, "TRAIN_CHECK_INTERVAL", 0.01), \
+             mock.patch.object(app_module, "MODEL_PATH", self.db_path + ".absent"):
+            with self.assertRaises(Stop):
+                app_module.training_thread(interval_seconds=0)
+        self.assertEqual(cycle.call_count, 2)
+
+    def test_admin_endpoint_schedules_retrain(self):
+        """POST /admin/retrain (local autorisé) doit répondre 202 et réveiller le thread."""
+        with mock.patch.object(app_module, "ADMIN_ALLOW_LOCAL", True):
+            response = self.client.post("/admin/retrain")
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(app_module._retrain_requested.is_set())
+
+    def test_admin_endpoint_requires_token(self):
+        """Avec un jeton configuré, un appel sans le bon jeton est refusé."""
+        with mock.patch.object(app_module, "ADMIN_TOKEN", "secret"):
+            self.assertEqual(self.client.post("/admin/retrain").status_code, 403)
+            response = self.client.post("/admin/retrain", headers={"X-Admin-Token": "secret"})
+            self.assertEqual(response.status_code, 202)
+
+    def test_admin_endpoint_closed_by_default(self):
+        """Sans jeton ni FAKENEWS_ADMIN_ALLOW_LOCAL, même un appel local est refusé."""
+        with mock.patch.object(app_module, "ADMIN_TOKEN", None), \
+             mock.patch.object(app_module, "ADMIN_ALLOW_LOCAL", False):
+            self.assertEqual(self.client.post("/admin/retrain").status_code, 403)
+        self.assertFalse(app_module._retrain_requested.is_set())
+
+    def test_admin_endpoint_rejects_get(self):
+        """La route n'accepte que POST."""
+        self.assertEqual(self.client.get("/admin/retrain").status_code, 405)
+
+
+
+# ──────────────────────────────────────────────────────────────
+# 6. Ingestion en masse (POST /api/news/bulk)
+# ──────────────────────────────────────────────────────────────
+
+class TestBulkIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.fd, self.db_path, self.orig_db = make_client()
+        self.orig_model = app_module.MODEL_PATH
+        self.tmpdir = tempfile.mkdtemp()
+        app_module.MODEL_PATH = os.path.join(self.tmpdir, "model.pkl")
+        train_model(self.db_path, app_module.MODEL_PATH, evaluation="skip", record_run=False)
+
+    def tearDown(self):
+        app_module.MODEL_PATH = self.orig_model
+        shutil.rmtree(self.tmpdir)
+        teardown_client(self.fd, self.db_path, self.orig_db)
+
+    def post(self, data, content_type):
+        return self.client.post("/api/news/bulk", data=data, content_type=content_type)
+
+    def predicted_count(self):
+        conn = sqlite3.connect(self.db_path)
+        n = conn.execute("SELECT COUNT(*) FROM news WHERE predicted IS NOT NULL").fetchone()[0]
+        conn.close()
+        return n
+
+    def test_json_array_inserts_and_scores(self):
+        """Les articles valides sont insérés et scorés, avec un résultat par article."""
+        items = [{"title": f"Bulk {i}", "content": "NASA confirms water on Mars",
+                  "label": "real"} for i in range(50)]
+        response = self.post(json.dumps(items), "application/json")
+        self.assertEqual(response.status_code, 201)
+        body = response.get_json()
+        self.assertEqual((body["created"], body["rejected"]), (50, 0))
+        self.assertEqual(len({item["id"] for item in body["items"]}), 50)
+        self.assertTrue(all(item["predicted"] in ("real", "fake") for item in body["items"]))
+        self.assertTrue(all(0.5 <= item["confidence"] <= 1 for item in body["items"]))
+        self.assertEqual(set(body["timing_ms"]), {"validate", "insert", "score", "total"})
+
+    def test_only_new_rows_are_scored(self):
+        """Les 4 news d'exemple ne sont pas re-scorées."""
+        self.post(json.dumps({"items": [{"title": "t", "content": "c"}]}), "application/json")
+        self.assertEqual(self.predicted_count(), 1)
+
+    def test_ndjson_with_invalid_items(self):
+        """NDJSON : une ligne invalide est rejetée seule, les autres sont insérées."""
+        lines = [
+            json.dumps({"title": "Good", "content": "Fine content", "label": "fake"}),
+            "{not json",
+            json.dumps({"title": "", "content": "missing title"}),
+            json.dumps({"title": "Bad label", "content": "x", "label": "INVALID"}),
+            json.dumps(["not", "an", "object"]),
+            "",
+            json.dumps({"title": "Also good", "content": "More content"}),
+        ]
+        response = self.post("\n".join(lines), "application/x-ndjson")
+        self.assertEqual(response.status_code, 201)
+        body = response.get_json()
+        self.assertEqual((body["created"], body["rejected"]), (2, 4))
+        statuses = [item["status"] for item in body["items"]]
+        self.assertEqual(statuses, ["created", "error", "error", "error", "error", "created"])
+        self.assertEqual(body["items"][5]["index"], 5)
+
+    def test_rejects_bad_payloads(self):
+        self.assertEqual(self.post("{broken", "application/json").status_code, 400)
+        self.assertEqual(self.post('{"items": 3}', "application/json").status_code, 400)
+        self.assertEqual(self.post("[]", "application/json").status_code, 400)
+        self.assertEqual(self.post("title=x", "application/x-www-form-urlencoded").status_code, 415)
+
+    def test_too_many_items(self):
+        """Au-delà de BULK_MAX_ITEMS : 413 et rien n'est inséré."""
+        items = [{"title": "t", "content": "c"}] * 3
+        with mock.patch.object(app_module, "BULK_MAX_ITEMS", 2):
+            response = self.post(json.dumps(items), "application/json")
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(app_module.count_news(), 4)
+
+    def test_lone_surrogate_is_rejected_per_item(self):
+        """Un surrogate isolé (JSON valide, UTF-8 invalide) ne rejette que son article."""
+        body = '[{"title": "a\\ud800", "content": "c"}, {"title": "ok", "content": "c"}]'
+        response = self.post(body, "application/json")
+        self.assertEqual(response.status_code, 201)
+        statuses = [item["status"] for item in response.get_json()["items"]]
+        self.assertEqual(statuses, ["error", "created"])
+
+    def test_json_body_size_is_capped(self):
+        """Un corps application/json au-delà de BULK_JSON_MAX_BYTES : 413, rien d'inséré."""
+        items = [{"title": "t", "content": "c" * 100}] * 5
+        with mock.patch.object(app_module, "BULK_JSON_MAX_BYTES", 200):
+            response = self.post(json.dumps(items), "application/json")
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(app_module.count_news(), 4)
+
+    def test_without_model(self):
+        """Sans modèle, les articles sont insérés sans prédiction."""
+        os.unlink(app_module.MODEL_PATH)
+        response = self.post(json.dumps([{"title": "t", "content": "c"}]), "application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.get_json()["items"][0]["predicted"])
+
+    def test_homepage_shows_bulk_items(self):
+        self.client.get("/")
+        self.post(json.dumps([{"title": "Bulk headline", "content": "c"}]), "application/json")
+        self.assertIn(b"Bulk headline", self.client.get("/").data)
+
+# ──────────────────────────────────────────────────────────────
+# 7. Démarrage : préchargement et sondes /healthz, /readyz
+# ──────────────────────────────────────────────────────────────
+
+class TestStartup(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.fd, self.db_path, self.orig_db = make_client()
+        self.tmpdir = tempfile.mkdtemp()
+        self.patches = [
+            mock.patch.object(app_module, "MODEL_PATH", os.path.join(self.tmpdir, "model.pkl")),
+            mock.patch.dict(app_module._startup_state),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        stop = prediction_log._maintenance.pop(self.db_path, None)
+        if stop is not None:
+            stop.set()
+        shutil.rmtree(self.tmpdir)
+        teardown_client(self.fd, self.db_path, self.orig_db)
+
+    def test_probes_before_warm_up(self):
+        """Avant warm_up : vivant mais pas prêt."""
+        app_module._set_startup(phase="starting", ready=False)
+        self.assertEqual(self.client.get("/healthz").status_code, 200)
+        response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+
+    def test_ready_without_model(self):
+        """Sans modèle, l'application est prête (prédictions 'unknown')."""
+        self.assertTrue(app_module.warm_up())
+        body = self.client.get("/readyz").get_json()
+        self.assertEqual((body["phase"], body["ready"], body["model"]), ("ready", True, None))
+        self.assertNotIn("model", body["timings_ms"])
+        self.assertTrue(self.client.get("/status").get_json()["ready"])
+
+    def test_warm_up_preloads_model(self):
+        """Le modèle est chargé, validé et chauffé avant la première requête."""
+        from ml import predictor
+        train_model(self.db_path, app_module.MODEL_PATH, evaluation="skip", record_run=False)
+        predictor._model_cache.pop(app_module.MODEL_PATH, None)
+        self.assertTrue(app_module.warm_up())
+        self.assertIn(app_module.MODEL_PATH, predictor._model_cache)
+        self.assertIn(app_module.MODEL_PATH, predictor._streaming_cache)
+        body = self.client.get("/readyz").get_json()
+        self.assertEqual(body["model"], app_module.model_fingerprint(app_module.MODEL_PATH))
+        self.assertIn("model", body["timings_ms"])
+
+    def test_invalid_model_is_not_ready(self):
+        """Un model.pkl illisible : /readyz reste à 503, /healthz à 200."""
+        with open(app_module.MODEL_PATH, "wb") as f:
+            f.write(b"not a pickle")
+        self.assertFalse(app_module.warm_up())
+        response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()["phase"], "failed")
+        self.assertIsNotNone(response.get_json()["error"])
+        self.assertEqual(self.client.get("/healthz").status_code, 200)
+
+    def test_readiness_recovers_with_new_model(self):
+        """Après un échec du modèle, un model.pkl corrigé remet /readyz à 200."""
+        with open(app_module.MODEL_PATH, "wb") as f:
+            f.write(b"not a pickle")
+        self.assertFalse(app_module.warm_up())
+        self.assertEqual(self.client.get("/readyz").status_code, 503)
+        train_model(self.db_path, app_module.MODEL_PATH, evaluation="skip", record_run=False)
+        response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["model"],
+                         app_module.model_fingerprint(app_module.MODEL_PATH))
+
+    def test_training_cycle_revalidates_model(self):
+        """run_training_cycle re-valide le modèle : prêt sans attendre la sonde."""
+        with open(app_module.MODEL_PATH, "wb") as f:
+            f.write(b"not a pickle")
+        self.assertFalse(app_module.warm_up())
+        app_module.run_training_cycle()
+        self.assertTrue(app_module._startup_state["ready"])
+        self.assertEqual(app_module._startup_state["model"],
+                         app_module.model_fingerprint(app_module.MODEL_PATH))
+
+    def test_invalid_replacement_is_not_ready(self):
+        """Un model.pkl remplacé par un fichier invalide fait passer /readyz à 503."""
+        train_model(self.db_path, app_module.MODEL_PATH, evaluation="skip", record_run=False)
+        self.assertTrue(app_module.warm_up())
+        with open(app_module.MODEL_PATH, "wb") as f:
+            f.write(b"not a pickle")
+        response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()["failed_step"], "model")
+
+    def test_database_failure_is_not_retried(self):
+        """Après un échec de la base, la sonde ne relance pas la validation du modèle."""
+        app_module._set_startup(phase="failed", ready=False, failed_step="database")
+        train_model(self.db_path, app_module.MODEL_PATH, evaluation="skip", record_run=False)
+        self.assertEqual(self.client.get("/readyz").status_code, 503)
+
+    def test_routes_wait_for_background_warm_up(self):
+        """Démarrage en arrière-plan : 503 hors sondes tant que la base n'est pas prête."""
+        release = threading.Event()
+        real_warm_up = app_module.warm_up
+
+        def slow_warm_up():
+            release.wait(5)
+            return real_warm_up()
+
+        with mock.patch.object(app_module, "_require_ready", threading.Event()), \
+             mock.patch.object(app_module, "warm_up", slow_warm_up):
+            app_module._set_startup(phase="starting", ready=False)
+            app_module.start_up(start_training=False, background=True)
+            response = self.client.get("/")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["Retry-After"], "1")
+            self.assertEqual(self.client.get("/healthz").status_code, 200)
+            release.set()
+            for _ in range(500):
+                if app_module._startup_state["ready"]:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(self.client.get("/").status_code, 200)
+
+    def test_concurrent_init_db_seeds_once(self):
+        """Plusieurs workers qui démarrent ensemble n'insèrent les exemples qu'une fois."""
+        db_path = os.path.join(self.tmpdir, "fresh.db")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = f"import app; app.DB_PATH = {db_path!r}; app.init_db()"
+        workers = [subprocess.Popen([sys.executable, "-c", code], cwd=root) for _ in range(6)]
+        self.assertEqual([worker.wait(timeout=60) for worker in workers], [0] * 6)
+        conn = sqlite3.connect(db_path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM news").fetchone()[0],
+                         len(app_module.DEMO_NEWS))
+        conn.close()
+
+    def test_validate_model_rejects_wrong_classes(self):
+        from sklearn.feature_extraction.text import CountVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+        from sklearn.pipeline import Pipeline
+        pipeline = Pipeline([("vectorizer", CountVectorizer()), ("classifier", MultinomialNB())])
+        pipeline.fit(["a cat", "a dog"], ["cat", "dog"])
+        with self.assertRaises(ValueError):
+            app_module.validate_model(pipeline)
+
+    def test_training_starts_after_warm_up(self):
+        """start_up ne lance le thread d'entraînement qu'une fois prêt."""
+        seen = []
+        started = mock.Mock(side_effect=lambda *a: seen.append(app_module._startup_state["ready"]))
+        with mock.patch.object(app_module, "training_thread", started):
+            app_module.start_up(start_training=True, interval_seconds=1)
+            for _ in range(100):
+                if seen:
+                    break
+                time.sleep(0.01)
+        self.assertEqual(seen, [True])
+
+    def test_serve_uses_configured_interval(self):
+        """serve.create_app sans intervalle suit FAKENEWS_TRAIN_MIN_INTERVAL."""
+        import serve
+        with mock.patch.object(app_module, "TRAIN_MIN_INTERVAL", 123.0), \
+             mock.patch.object(app_module, "start_up") as start_up:
+            serve.create_app(start_training=True)
+        start_up.assert_called_once_with(start_training=True, interval_seconds=123.0,
+                                         background=False)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,153 @@
+"""
+tests/test_prediction_log.py
+============================
+Tests du journal d'audit des prédictions – TESE935
+
+Vérifie que :
+  - les prédictions sont écrites par lots, avec labels et versions encodés en entiers
+  - la table est en ajout seul
+  - l'historique ancien est purgé
+  - le thread de maintenance écrit et purge sans flush ni entraînement
+  - deux versions de modèle peuvent être comparées sans re-scorer
+
+Lancement :
+    python -m unittest tests/test_prediction_log.py -v   (sans pytest)
+    pytest tests/test_prediction_log.py -v               (avec pytest)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+import prediction_log
+from migrations import migrate
+
+
+class TestPredictionLog(unittest.TestCase):
+
+    def setUp(self):
+        self.fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        conn = sqlite3.connect(self.db_path)
+        migrate(conn)
+        conn.close()
+
+    def tearDown(self):
+        prediction_log.flush(self.db_path)
+        os.close(self.fd)
+        os.unlink(self.db_path)
+
+    def rows(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT news_id, model_version, label, probability, latency_us FROM prediction_log"
+        ).fetchall()
+        conn.close()
+        return rows
+
+    def test_record_is_buffered_until_flush(self):
+        """Les prédictions restent en mémoire jusqu'au flush, puis sont écrites compactes."""
+        version = prediction_log.get_model_version(self.db_path, "abc")
+        prediction_log.record(self.db_path, version, [1, 2],
+                              [("real", 0.9), ("fake", 0.6)], latency_s=0.002)
+        self.assertEqual(self.rows(), [])
+        self.assertEqual(prediction_log.flush(self.db_path), 2)
+        self.assertEqual(self.rows(), [(1, version, 1, 0.9, 1000), (2, version, 0, 0.6, 1000)])
+
+    def test_unknown_labels_are_not_logged(self):
+        """Les prédictions 'unknown' (sans modèle) ne sont pas journalisées."""
+        prediction_log.record(self.db_path, 1, [1], [("unknown", None)], latency_s=0.0)
+        self.assertEqual(prediction_log.flush(self.db_path), 0)
+
+    def test_model_version_is_stable(self):
+        """Une même empreinte doit toujours donner le même id de version."""
+        a = prediction_log.get_model_version(self.db_path, "aaa")
+        b = prediction_log.get_model_version(self.db_path, "bbb")
+        self.assertNotEqual(a, b)
+        self.assertEqual(prediction_log.get_model_version(self.db_path, "aaa"), a)
+
+    def test_log_is_append_only(self):
+        """Toute modification d'une ligne du journal doit être refusée."""
+        prediction_log.record(self.db_path, 1, [1], [("real", 0.9)], latency_s=0.0)
+        prediction_log.flush(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        with self.assertRaises(sqlite3.IntegrityError):
+            conn.execute("UPDATE prediction_log SET label=0")
+        conn.close()
+
+    def test_prune_removes_old_entries(self):
+        """La purge doit supprimer les entrées plus vieilles que la rétention."""
+        prediction_log.record(self.db_path, 1, [1, 2], [("real", 0.9), ("fake", 0.8)], 0.0)
+        prediction_log.flush(self.db_path)
+        self.assertEqual(prediction_log.prune(self.db_path, retention_days=30), 0)
+        future = time.time() + 31 * 86400
+        self.assertEqual(prediction_log.prune(self.db_path, retention_days=30, now=future), 2)
+        self.assertEqual(self.rows(), [])
+
+    def test_maintenance_flushes_and_prunes(self):
+        """Sans flush explicite, les lignes sont écrites et l'historique ancien purgé."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO prediction_log (ts, news_id, model_version, label)"
+                     " VALUES (?, 9, 1, 1)", (int(time.time()) - 31 * 86400,))
+        conn.commit()
+        conn.close()
+        stop = prediction_log.start_maintenance(self.db_path, retention_days=30,
+                                                flush_interval=0.02)
+        try:
+            self.assertIs(prediction_log.start_maintenance(self.db_path), stop)
+            prediction_log.record(self.db_path, 1, [1], [("real", 0.9)], 0.0)
+            for _ in range(100):
+                if [row[0] for row in self.rows()] == [1]:
+                    break
+                time.sleep(0.02)
+        finally:
+            stop.set()
+        self.assertEqual([row[0] for row in self.rows()], [1])
+
+    def test_diff_model_versions(self):
+        """La comparaison de deux versions doit lister les désaccords."""
+        prediction_log.record(self.db_path, 1, [1, 2, 3],
+                              [("real", 0.9), ("fake", 0.8), ("real", 0.7)], 0.0)
+        prediction_log.record(self.db_path, 2, [1, 2],
+                              [("real", 0.9), ("real", 0.6)], 0.0)
+        prediction_log.flush(self.db_path)
+        diff = prediction_log.diff_model_versions(self.db_path, 1, 2)
+        self.assertEqual(diff["common"], 2)
+        self.assertEqual(diff["disagreements"], [(2, "fake", "real")])
+        self.assertAlmostEqual(diff["agreement"], 0.5)
+
+
+class TestPredictionLogIntegration(unittest.TestCase):
+
+    def setUp(self):
+        if not os.path.exists(app_module.MODEL_PATH):
+            self.skipTest("modèle absent")
+        self.fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        self.orig_db = app_module.DB_PATH
+        app_module.DB_PATH = self.db_path
+        app_module.init_db()
+
+    def tearDown(self):
+        prediction_log.flush(self.db_path)
+        app_module.DB_PATH = self.orig_db
+        os.close(self.fd)
+        os.unlink(self.db_path)
+
+    def test_update_predictions_is_logged(self):
+        """Le re-scoring en masse doit journaliser une ligne par news."""
+        app_module.update_predictions()
+        prediction_log.flush(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        logged = conn.execute("SELECT COUNT(*) FROM prediction_log").fetchone()[0]
+        news = conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
+        conn.close()
+        self.assertEqual(logged, news)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
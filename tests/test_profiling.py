@@ -0,0 +1,115 @@
+"""
+tests/test_profiling.py
+=======================
+Tests du profilage des requêtes lentes – TESE935
+
+Vérifie que :
+  - l'en-tête X-Profile: 1 (administrateur) enregistre un profil
+  - en mode FAKENEWS_PROFILE, seules les requêtes au-delà du seuil sont gardées
+  - le travail du pool de prédiction figure dans le profil de la requête
+  - la page /admin/profiles liste les requêtes et affiche un profil
+
+Lancement :
+    python -m unittest tests/test_profiling.py -v   (sans pytest)
+    pytest tests/test_profiling.py -v               (avec pytest)
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+import profiling
+from ml.trainer import train_model
+from tests.test_navigation import make_client, teardown_client
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.fd, self.db_path, self.orig_db = make_client()
+        self.tmpdir = tempfile.mkdtemp()
+        self.patches = [
+            mock.patch.object(app_module, "PROFILE_DIR", os.path.join(self.tmpdir, "profiles")),
+            mock.patch.object(app_module, "MODEL_PATH", os.path.join(self.tmpdir, "model.pkl")),
+            mock.patch.object(app_module, "ADMIN_ALLOW_LOCAL", True),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmpdir)
+        teardown_client(self.fd, self.db_path, self.orig_db)
+
+    def profiles(self):
+        return self.client.get("/admin/profiles?format=json").get_json()["profiles"]
+
+    def test_header_saves_profile(self):
+        """X-Profile: 1 enregistre le profil, quel que soit le seuil."""
+        response = self.client.get("/", headers={"X-Profile": "1"})
+        profile_id = response.headers.get("X-Profile-Id")
+        self.assertIsNotNone(profile_id)
+        self.assertTrue(os.path.exists(
+            os.path.join(app_module.PROFILE_DIR, profile_id + ".prof")))
+        [meta] = self.profiles()
+        self.assertEqual((meta["id"], meta["route"], meta["status"], meta["reason"]),
+                         (profile_id, "index", 200, "header"))
+
+    def test_no_profile_by_default(self):
+        response = self.client.get("/")
+        self.assertNotIn("X-Profile-Id", response.headers)
+        self.assertEqual(self.profiles(), [])
+
+    def test_threshold_mode(self):
+        """FAKENEWS_PROFILE=1 : seules les requêtes plus lentes que le seuil sont gardées."""
+        with mock.patch.object(app_module, "PROFILE_ENABLED", True):
+            with mock.patch.object(app_module, "PROFILE_THRESHOLD_MS", 10 ** 6):
+                self.assertNotIn("X-Profile-Id", self.client.get("/status").headers)
+            with mock.patch.object(app_module, "PROFILE_THRESHOLD_MS", 0):
+                self.assertIn("X-Profile-Id", self.client.get("/status").headers)
+        self.assertEqual([p["route"] for p in self.profiles()], ["status"])
+
+    def test_prediction_pool_is_profiled(self):
+        """Les fonctions exécutées dans le pool de prédiction apparaissent dans le profil."""
+        train_model(self.db_path, app_module.MODEL_PATH, evaluation="skip", record_run=False)
+        response = self.client.get("/predict/1", headers={"X-Profile": "1"})
+        profile_id = response.headers["X-Profile-Id"]
+        report = self.client.get(f"/admin/profiles/{profile_id}").get_data(as_text=True)
+        self.assertIn("predict_proba_batch", report)
+
+    def test_viewer(self):
+        profile_id = self.client.get("/", headers={"X-Profile": "1"}).headers["X-Profile-Id"]
+        page = self.client.get("/admin/profiles")
+        self.assertEqual(page.status_code, 200)
+        self.assertIn(profile_id.encode(), page.data)
+        download = self.client.get(f"/admin/profiles/{profile_id}?download=1")
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(self.client.get("/admin/profiles/..%2Fnews").status_code, 404)
+        self.assertEqual(self.client.get("/admin/profiles/0-00000000").status_code, 404)
+
+    def test_requires_admin(self):
+        """Avec un jeton admin, l'en-tête seul ne suffit pas et la liste est refusée."""
+        with mock.patch.object(app_module, "ADMIN_TOKEN", "secret"):
+            response = self.client.get("/", headers={"X-Profile": "1"})
+            self.assertNotIn("X-Profile-Id", response.headers)
+            self.assertEqual(self.client.get("/admin/profiles").status_code, 403)
+            response = self.client.get("/", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+            self.assertIn("X-Profile-Id", response.headers)
+
+    def test_keeps_most_recent_profiles(self):
+        with mock.patch.object(profiling, "MAX_PROFILES", 3):
+            for _ in range(5):
+                self.client.get("/status", headers={"X-Profile": "1"})
+        self.assertEqual(len(self.profiles()), 3)
+        self.assertEqual(len(os.listdir(app_module.PROFILE_DIR)), 6)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
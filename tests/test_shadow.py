@@ -0,0 +1,195 @@
+"""
+tests/test_shadow.py
+====================
+Tests de l'évaluation en ombre (shadow) des nouveaux modèles – TESE935
+
+Vérifie que :
+  - l'ancien modèle est conservé comme ombre et comparé en arrière-plan
+  - un nouveau modèle moins exact est retiré (rollback), puis la base re-scorée
+    et le bundle ré-exporté
+  - un nouveau modèle équivalent est promu
+  - seules les news créées après l'ouverture de l'essai comptent (pas le
+    jeu d'entraînement), et le re-scoring qui suit l'entraînement est ignoré
+
+Lancement :
+    python -m unittest tests/test_shadow.py -v   (sans pytest)
+    pytest tests/test_shadow.py -v               (avec pytest)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml import shadow
+from ml.predictor import model_fingerprint, predict_proba_batch
+from ml.trainer import train_model
+from tests.test_training import create_test_db
+
+
+def flip_labels(db_path):
+    """Inverse les labels humains : un modèle entraîné ensuite se trompe partout."""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "UPDATE news SET label = CASE label WHEN 'real' THEN 'fake' ELSE 'real' END"
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestShadow(unittest.TestCase):
+
+    def setUp(self):
+        self.fd, self.db_path = create_test_db()
+        tmpdir = tempfile.mkdtemp()
+        self.model_path = os.path.join(tmpdir, "model.pkl")
+        train_model(self.db_path, self.model_path, evaluation="skip", record_run=False)
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT id, title || ' ' || content FROM news").fetchall()
+        conn.close()
+        self.ids = [row[0] for row in rows]
+        self.texts = [row[1] for row in rows]
+
+    def tearDown(self):
+        shadow.cancel(self.model_path)
+        os.close(self.fd)
+        os.unlink(self.db_path)
+        for path in (self.model_path, shadow.shadow_path(self.model_path)):
+            if os.path.exists(path):
+                os.unlink(path)
+        os.rmdir(os.path.dirname(self.model_path))
+
+    def serve_all(self, fresh=True):
+        """
+        Simule des prédictions servies puis attend l'évaluation de fond.
+        Avec `fresh`, ce sont de nouvelles news (copies annotées des news
+        existantes) ajoutées après l'ouverture de l'essai.
+        """
+        ids, texts = self.ids, self.texts
+        if fresh:
+            conn = sqlite3.connect(self.db_path)
+            ids = [conn.execute("INSERT INTO news (title, content, label)"
+                                " SELECT title, content, label FROM news WHERE id = ?",
+                                (news_id,)).lastrowid for news_id in self.ids]
+            conn.commit()
+            conn.close()
+        preds = predict_proba_batch(texts, self.model_path)
+        shadow.submit(ids, texts, preds)
+        shadow.drain()
+
+    def test_snapshot_without_model(self):
+        """Sans modèle existant, aucune ombre ne doit être créée."""
+        self.assertFalse(shadow.snapshot(self.model_path + ".absent"))
+
+    def test_worse_model_is_rolled_back(self):
+        """Un nouveau modèle nettement moins exact doit être remplacé par l'ancien."""
+        good = model_fingerprint(self.model_path)
+        self.assertTrue(shadow.snapshot(self.model_path))
+        flip_labels(self.db_path)
+        train_model(self.db_path, self.model_path, evaluation="skip", record_run=False)
+        flip_labels(self.db_path)   # labels humains d'origine pour l'évaluation
+        on_rollback = mock.Mock()
+        shadow.start_trial(self.model_path, self.db_path, sample_rate=1.0, min_labelled=10,
+                           on_rollback=on_rollback)
+
+        self.serve_all()
+
+        status = shadow.status()
+        self.assertIsNone(status["active"])
+        self.assertEqual(status["last_decision"]["decision"], "rollback")
+        self.assertEqual(model_fingerprint(self.model_path), good)
+        on_rollback.assert_called_once_with()
+        self.assertFalse(os.path.exists(shadow.shadow_path(self.model_path)))
+
+    def test_equivalent_model_is_promoted(self):
+        """Un nouveau modèle aussi exact que l'ancien doit être conservé."""
+        self.assertTrue(shadow.snapshot(self.model_path))
+        train_model(self.db_path, self.model_path, evaluation="skip", record_run=False)
+        new = model_fingerprint(self.model_path)
+        shadow.start_trial(self.model_path, self.db_path, sample_rate=1.0, min_labelled=10)
+
+        self.serve_all()
+
+        last = shadow.status()["last_decision"]
+        self.assertEqual(last["decision"], "promote")
+        self.assertEqual(last["agreement"], 1.0)
+        self.assertEqual(model_fingerprint(self.model_path), new)
+
+    def test_trial_waits_for_enough_labels(self):
+        """Tant que min_labelled n'est pas atteint, l'essai reste ouvert."""
+        shadow.snapshot(self.model_path)
+        shadow.start_trial(self.model_path, self.db_path, sample_rate=1.0, min_labelled=1000)
+        self.serve_all()
+        active = shadow.status()["active"]
+        self.assertEqual(active["labelled"], 10)
+        self.assertEqual(shadow.conclude(force=True), "promote")
+
+    def test_training_rows_do_not_count(self):
+        """Les news existant à l'ouverture (jeu d'entraînement) ne comptent pas."""
+        shadow.snapshot(self.model_path)
+        shadow.start_trial(self.model_path, self.db_path, sample_rate=1.0, min_labelled=1)
+        self.serve_all(fresh=False)
+        active = shadow.status()["active"]
+        self.assertEqual((active["sampled"], active["labelled"]), (10, 0))
+
+
+class TestShadowTrainingCycle(unittest.TestCase):
+
+    def setUp(self):
+        from tests.test_navigation import make_client
+        import app as app_module
+        self.app = app_module
+        self.client, self.fd, self.db_path, self.orig_db = make_client()
+        self.tmpdir = tempfile.mkdtemp()
+        self.patches = [
+            mock.patch.object(app_module, "MODEL_PATH", os.path.join(self.tmpdir, "model.pkl")),
+            mock.patch.object(app_module, "SHADOW_ENABLED", True),
+            mock.patch.object(app_module, "SHADOW_SAMPLE_RATE", 1.0),
+            mock.patch.object(app_module, "SHADOW_MIN_LABELLED", 1),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        from tests.test_navigation import teardown_client
+        shadow.cancel(self.app.MODEL_PATH)
+        for patch in self.patches:
+            patch.stop()
+        for name in os.listdir(self.tmpdir):
+            os.unlink(os.path.join(self.tmpdir, name))
+        os.rmdir(self.tmpdir)
+        teardown_client(self.fd, self.db_path, self.orig_db)
+
+    def test_post_training_rescore_is_not_sampled(self):
+        """Le re-scoring de toute la base après l'entraînement n'alimente pas l'essai."""
+        self.app.run_training_cycle()
+        self.app.run_training_cycle()
+        shadow.drain()
+        active = shadow.status()["active"]
+        self.assertIsNotNone(active)
+        self.assertEqual((active["sampled"], active["labelled"]), (0, 0))
+        self.assertIs(shadow._trial["on_rollback"], self.app.restore_after_rollback)
+
+    def test_rollback_reexports_bundle(self):
+        """Après un rollback, le bundle des scoreurs repasse au modèle restauré."""
+        from ml.bundle import load_bundle
+        bundle_path = os.path.join(self.tmpdir, "model.bundle")
+        with mock.patch.object(self.app, "BUNDLE_PATH", bundle_path):
+            self.app.run_training_cycle()
+            old = model_fingerprint(self.app.MODEL_PATH)
+            self.app.insert_rows([("Extra headline", "more words for a new vocabulary", "", "fake")])
+            self.app.run_training_cycle()
+            self.assertNotEqual(load_bundle(bundle_path).manifest["source_model"], old)
+            with shadow._lock:     # le modèle en service s'est trompé, l'ombre non
+                shadow._trial.update(labelled=1, live_correct=0, shadow_correct=1)
+            self.assertEqual(shadow.conclude(), "rollback")
+        self.assertEqual(model_fingerprint(self.app.MODEL_PATH), old)
+        self.assertEqual(load_bundle(bundle_path).manifest["source_model"], old)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,217 @@
+"""
+tests/test_sharding.py
+======================
+Tests du stockage shardé de la table news – TESE935
+
+Vérifie que :
+  - chaque shard attribue des ids uniques vérifiant id % N == shard
+  - l'application lit, écrit et re-score les news réparties sur N fichiers
+  - l'entraînement lit ses données dans les shards
+  - une base existante est découpée sans changer les ids
+  - seed_data écrit dans les shards en mode shardé
+
+Lancement :
+    python -m unittest tests/test_sharding.py -v   (sans pytest)
+    pytest tests/test_sharding.py -v               (avec pytest)
+"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+import prediction_log
+import sharding
+from app import app
+from seed_data import seed_database, write_synthetic_sqlite
+from migrations import migrate
+from ml.trainer import count_labels, load_data_from_db, train_model
+
+N_SHARDS = 3
+
+
+def migrated(path):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.close()
+    return path
+
+
+# ──────────────────────────────────────────────────────────────
+# 1. Fonctions de sharding.py
+# ──────────────────────────────────────────────────────────────
+
+class TestShardingHelpers(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "news.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_shard_paths(self):
+        self.assertEqual(
+            [os.path.basename(p) for p in sharding.shard_paths(self.db_path, 2)],
+            ["news.shard0.db", "news.shard1.db"])
+
+    def test_pick_shard_is_stable(self):
+        """Stratégie hash : même texte, même shard ; time : même fenêtre, même shard."""
+        a = sharding.pick_shard("Titre", "Contenu", 8)
+        self.assertEqual(a, sharding.pick_shard("Titre", "Contenu", 8))
+        self.assertTrue(0 <= a < 8)
+        self.assertEqual(sharding.pick_shard("x", "y", 4, "time", window=100, now=250), 2)
+        with self.assertRaises(ValueError):
+            sharding.pick_shard("x", "y", 4, "round-robin")
+
+    def test_ids_encode_shard_under_concurrency(self):
+        """Insertions concurrentes : ids uniques et id % N == shard."""
+        path = migrated(sharding.shard_paths(self.db_path, N_SHARDS)[1])
+
+        def writer():
+            conn = sqlite3.connect(path, timeout=10)
+            for i in range(20):
+                sharding.insert_rows(conn, 1, N_SHARDS, [(f"t{i}", "c", "s", "real")])
+                conn.commit()
+            conn.close()
+
+        threads = [threading.Thread(target=writer) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        conn = sqlite3.connect(path)
+        ids = [row[0] for row in conn.execute("SELECT id FROM news")]
+        conn.close()
+        self.assertEqual(len(ids), 80)
+        self.assertEqual(len(set(ids)), 80)
+        self.assertTrue(all(i % N_SHARDS == 1 for i in ids))
+
+    def test_merge_sorted_matches_sqlite_order(self):
+        """NULL en tête en ASC, en fin en DESC, comme ORDER BY dans SQLite."""
+        a = [{"confidence": None}, {"confidence": 0.6}, {"confidence": 0.9}]
+        b = [{"confidence": None}, {"confidence": 0.7}]
+        merged = sharding.merge_sorted([a, b], "confidence ASC")
+        self.assertEqual([r["confidence"] for r in merged], [None, None, 0.6, 0.7, 0.9])
+        merged = sharding.merge_sorted([a[::-1], b[::-1]], "confidence DESC")
+        self.assertEqual([r["confidence"] for r in merged], [0.9, 0.7, 0.6, None, None])
+
+    def test_split_database_keeps_ids(self):
+        migrated(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany("INSERT INTO news (title, content, label) VALUES (?, ?, ?)",
+                         [(f"t{i}", "c", "real") for i in range(10)])
+        conn.commit()
+        conn.close()
+        for path in sharding.shard_paths(self.db_path, N_SHARDS):
+            migrated(path)
+        copied = sharding.split_database(self.db_path, N_SHARDS)
+        self.assertEqual(sum(copied), 10)
+        for shard, path in enumerate(sharding.shard_paths(self.db_path, N_SHARDS)):
+            conn = sqlite3.connect(path)
+            ids = [row[0] for row in conn.execute("SELECT id FROM news")]
+            # Les insertions suivantes continuent la séquence du shard
+            sharding.insert_rows(conn, shard, N_SHARDS, [("new", "c", "s", "fake")])
+            new_id = conn.execute("SELECT MAX(id) FROM news").fetchone()[0]
+            conn.close()
+            self.assertTrue(all(i % N_SHARDS == shard for i in ids + [new_id]))
+            self.assertNotIn(new_id, ids)
+
+
+# ──────────────────────────────────────────────────────────────
+# 2. Application en mode shardé
+# ──────────────────────────────────────────────────────────────
+
+class TestShardedApp(unittest.TestCase):
+
+    def setUp(self):
+        app.config["TESTING"] = True
+        self.tmpdir = tempfile.mkdtemp()
+        self.orig = (app_module.DB_PATH, app_module.MODEL_PATH, app_module.SHARD_COUNT)
+        app_module.DB_PATH = os.path.join(self.tmpdir, "news.db")
+        app_module.MODEL_PATH = os.path.join(self.tmpdir, "model", "model.pkl")
+        app_module.SHARD_COUNT = N_SHARDS
+        app_module.init_db()
+        for i in range(12):
+            app_module.insert_news(f"Sharded news {i}", f"content number {i} vaccine study",
+                                   "https://example.com", "real" if i % 2 else "fake")
+        self.client = app.test_client()
+
+    def tearDown(self):
+        prediction_log.flush(app_module.DB_PATH)
+        app_module.DB_PATH, app_module.MODEL_PATH, app_module.SHARD_COUNT = self.orig
+        app_module.bump_data_version()
+        shutil.rmtree(self.tmpdir)
+
+    def test_news_spread_over_shards(self):
+        """Les news sont réparties sur les shards et la base principale reste vide."""
+        counts = []
+        for shard, path in enumerate(app_module.news_db_paths()):
+            conn = sqlite3.connect(path)
+            ids = [row[0] for row in conn.execute("SELECT id FROM news")]
+            conn.close()
+            self.assertTrue(all(i % N_SHARDS == shard for i in ids))
+            counts.append(len(ids))
+        self.assertEqual(sum(counts), 16)   # 4 exemples + 12 ajoutées
+        self.assertGreater(sum(1 for c in counts if c), 1)
+        conn = sqlite3.connect(app_module.DB_PATH)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM news").fetchone()[0], 0)
+        conn.close()
+        self.assertEqual(self.client.get("/status").get_json()["news_count"], 16)
+
+    def test_index_merges_shards(self):
+        """La page d'accueil liste les news de tous les shards."""
+        rows = app_module.get_all_news()
+        self.assertEqual(len(rows), 16)
+        created = [row["created"] for row in rows]
+        self.assertEqual(created, sorted(created, reverse=True))
+        self.assertIn(b"Sharded news 11", self.client.get("/").data)
+
+    def test_train_and_rescore_shards(self):
+        """Entraînement sur les shards, puis re-scoring et prédiction unitaire."""
+        self.assertEqual(sum(count_labels(app_module.news_db_paths()).values()), 16)
+        texts, _ = load_data_from_db(app_module.news_db_paths())
+        self.assertEqual(len(texts), 16)
+
+        run = app_module.run_training_cycle("skip")
+        self.assertEqual(run["n_samples"], 16)
+        rows = app_module.get_all_news()
+        self.assertTrue(all(row["predicted"] in ("real", "fake") for row in rows))
+
+        news_id = rows[0]["id"]
+        response = self.client.get(f"/predict/{news_id}")
+        self.assertEqual(response.status_code, 302)
+
+    def test_seed_writers_fill_shards(self):
+        """seed_data écrit dans les shards (ids id % N == shard), pas dans la base principale."""
+        options = {"n_shards": N_SHARDS, "strategy": app_module.SHARD_STRATEGY}
+        self.assertEqual(write_synthetic_sqlite(app_module.DB_PATH, 100, batch_size=30,
+                                                **options), 100)
+        inserted = seed_database(app_module.DB_PATH, force=True, **options)
+        self.assertEqual(app_module.count_news(), 16 + 100 + inserted)
+        self.assertEqual(seed_database(app_module.DB_PATH, **options), 0)
+        for shard, path in enumerate(app_module.news_db_paths()):
+            conn = sqlite3.connect(path)
+            ids = [row[0] for row in conn.execute("SELECT id FROM news")]
+            conn.close()
+            self.assertTrue(all(i % N_SHARDS == shard for i in ids))
+        conn = sqlite3.connect(app_module.DB_PATH)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM news").fetchone()[0], 0)
+        conn.close()
+
+    def test_training_runs_stay_in_main_db(self):
+        train_model(app_module.DB_PATH, app_module.MODEL_PATH, evaluation="skip",
+                    shards=app_module.news_db_paths())
+        conn = sqlite3.connect(app_module.DB_PATH)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM training_runs").fetchone()[0], 1)
+        conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,120 @@
+"""
+tests/test_streaming.py
+=======================
+Tests du scoring en flux des articles longs – TESE935
+
+Vérifie que :
+  - le scoreur en flux donne les probabilités de pipeline.predict_proba
+  - le découpage en tranches ne change pas le résultat (n-grammes à cheval)
+  - predict_proba_batch score en flux les textes longs, avec le même résultat
+  - max_chars tronque le texte scoré
+  - la mémoire ne croît pas avec la longueur du texte
+
+Lancement :
+    python -m unittest tests/test_streaming.py -v   (sans pytest)
+    pytest tests/test_streaming.py -v               (avec pytest)
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml import predictor, streaming
+from ml.bundle import export_bundle, load_bundle
+from ml.predictor import get_streaming_scorer, load_model, predict_proba_batch
+from ml.streaming import StreamingScorer
+from ml.trainer import train_model
+from tests.test_bundle import EXTRA_TEXTS
+from tests.test_training import create_test_db
+
+
+def long_text(vocabulary, n_words, seed=0):
+    """Texte pseudo-aléatoire mêlant termes du vocabulaire, mots vides et inconnus."""
+    rng = np.random.default_rng(seed)
+    words = sorted(t for t in vocabulary if " " not in t) + ["the", "and", "Zorglub", "x"]
+    return " ".join(words[i] for i in rng.integers(len(words), size=n_words))
+
+
+class TestStreaming(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fd, cls.db_path = create_test_db()
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.model_path = os.path.join(cls.tmpdir, "model.pkl")
+        train_model(cls.db_path, cls.model_path, evaluation="skip", record_run=False)
+        cls.pipeline = load_model(cls.model_path)
+        vocabulary = cls.pipeline.named_steps["vectorizer"].vocabulary_
+        cls.texts = EXTRA_TEXTS + [long_text(vocabulary, n, seed=n) for n in (50, 3000)]
+
+    @classmethod
+    def tearDownClass(cls):
+        os.close(cls.fd)
+        os.unlink(cls.db_path)
+        shutil.rmtree(cls.tmpdir)
+
+    def test_probabilities_match_pipeline(self):
+        scorer = StreamingScorer.from_pipeline(self.pipeline)
+        expected = self.pipeline.predict_proba(self.texts)
+        got = np.array([scorer.predict_proba_one(text) for text in self.texts])
+        np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-12)
+
+    def test_small_chunks(self):
+        """Tranches de quelques caractères : bigrammes et tokens à cheval inchangés."""
+        scorer = StreamingScorer.from_pipeline(self.pipeline)
+        expected = [scorer.joint_log_likelihood(text) for text in self.texts]
+        with mock.patch.object(streaming, "CHUNK_CHARS", 37):
+            got = [scorer.joint_log_likelihood(text) for text in self.texts]
+        np.testing.assert_allclose(got, expected, rtol=1e-9)
+
+    def test_from_bundle(self):
+        bundle_path = os.path.join(self.tmpdir, "model.bundle.zip")
+        export_bundle(self.model_path, bundle_path)
+        scorer = StreamingScorer.from_bundle(load_bundle(bundle_path))
+        expected = self.pipeline.predict_proba(self.texts)
+        got = np.array([scorer.predict_proba_one(text) for text in self.texts])
+        np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-12)
+
+    def test_batch_streams_long_texts(self):
+        """Au-delà du seuil, predict_proba_batch passe par le scoreur en flux."""
+        expected = predict_proba_batch(self.texts, self.model_path, long_text_chars=10 ** 9)
+        with mock.patch.object(StreamingScorer, "predict_proba_one",
+                               autospec=True, side_effect=StreamingScorer.predict_proba_one) as spy:
+            got = predict_proba_batch(self.texts, self.model_path, long_text_chars=1000)
+        self.assertEqual(spy.call_count, sum(len(t) > 1000 for t in self.texts))
+        self.assertEqual([label for label, _ in got], [label for label, _ in expected])
+        np.testing.assert_allclose([c for _, c in got], [c for _, c in expected], rtol=1e-9)
+        self.assertIs(get_streaming_scorer(self.model_path),
+                      predictor._streaming_cache[self.model_path][1])
+
+    def test_max_chars_truncates(self):
+        text = self.texts[-1]
+        [truncated] = predict_proba_batch([text], self.model_path, max_chars=500)
+        [expected] = predict_proba_batch([text[:500]], self.model_path)
+        self.assertEqual(truncated[0], expected[0])
+        self.assertAlmostEqual(truncated[1], expected[1], places=9)
+
+    def test_constant_memory(self):
+        """Le pic mémoire du scoring ne dépend pas de la longueur de l'article."""
+        scorer = StreamingScorer.from_pipeline(self.pipeline)
+        vocabulary = self.pipeline.named_steps["vectorizer"].vocabulary_
+        peaks = []
+        for n_words in (20_000, 200_000):
+            text = long_text(vocabulary, n_words)
+            tracemalloc.start()
+            scorer.joint_log_likelihood(text)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.assertLess(peaks[1], 2 * peaks[0])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
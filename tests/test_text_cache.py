@@ -0,0 +1,114 @@
+"""
+tests/test_text_cache.py
+========================
+Tests du cache de tokenisation adressé par contenu – TESE935
+
+Vérifie que :
+  - CachedAnalyzer produit les mêmes tokens que l'analyseur de CountVectorizer
+  - un texte déjà vu n'est pas re-tokenisé (succès, octets économisés)
+  - le cache reste sous sa taille maximale (éviction LRU)
+  - le cache est partagé entre l'entraînement et la prédiction
+
+Lancement :
+    python -m unittest tests/test_text_cache.py -v   (sans pytest)
+    pytest tests/test_text_cache.py -v               (avec pytest)
+"""
+
+import sys
+import os
+import pickle
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml import text_cache
+from ml.text_cache import CachedAnalyzer
+from ml.predictor import predict_proba_batch
+from ml.trainer import train_model
+from tests.test_training import create_test_db
+
+
+class TestTextCache(unittest.TestCase):
+
+    def setUp(self):
+        text_cache.configure(text_cache.DEFAULT_MAX_BYTES)
+        text_cache.clear()
+
+    def tearDown(self):
+        text_cache.configure(text_cache.DEFAULT_MAX_BYTES)
+        text_cache.clear()
+
+    def test_same_tokens_as_countvectorizer(self):
+        from sklearn.feature_extraction.text import CountVectorizer
+        text = "The FDA granted emergency use authorization for the new COVID-19 vaccine."
+        expected = CountVectorizer(ngram_range=(1, 2), stop_words="english").build_analyzer()(text)
+        self.assertEqual(list(CachedAnalyzer((1, 2), "english")(text)), expected)
+
+    def test_hit_and_bytes_saved(self):
+        analyze = CachedAnalyzer()
+        text = "Aliens built the pyramids, says anonymous blogger"
+        first = analyze(text)
+        second = analyze(text)
+        self.assertEqual(first, second)
+        stats = text_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["bytes_saved"], len(text.encode("utf-8")))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_key_includes_analyzer_config(self):
+        text = "vaccine study published today"
+        unigrams = CachedAnalyzer((1, 1))(text)
+        bigrams = CachedAnalyzer((1, 2))(text)
+        self.assertNotEqual(unigrams, bigrams)
+        self.assertEqual(text_cache.stats()["hits"], 0)
+
+    def test_bounded_size(self):
+        text_cache.configure(4096)
+        analyze = CachedAnalyzer()
+        for i in range(200):
+            analyze(f"news number {i} about vaccine research and climate policy")
+        stats = text_cache.stats()
+        self.assertLessEqual(stats["cached_bytes"], 4096)
+        self.assertLess(stats["entries"], 200)
+        # La plus récente est toujours en cache
+        analyze("news number 199 about vaccine research and climate policy")
+        self.assertEqual(text_cache.stats()["hits"], 1)
+
+    def test_disabled(self):
+        text_cache.configure(0)
+        analyze = CachedAnalyzer()
+        analyze("same text")
+        analyze("same text")
+        self.assertEqual(text_cache.stats()["hits"], 0)
+        self.assertEqual(text_cache.stats()["entries"], 0)
+
+    def test_pickle_keeps_only_config(self):
+        analyze = CachedAnalyzer((1, 2), "english")
+        analyze("warm up the base analyzer")
+        clone = pickle.loads(pickle.dumps(analyze))
+        self.assertEqual(clone.ngram_range, (1, 2))
+        self.assertIsNone(clone._analyze)
+        self.assertEqual(clone("warm up the base analyzer"), analyze("warm up the base analyzer"))
+
+    def test_shared_between_training_and_prediction(self):
+        fd, db_path = create_test_db()
+        model_path = os.path.join(tempfile.mkdtemp(), "model.pkl")
+        try:
+            train_model(db_path, model_path, evaluation="skip", record_run=False)
+            conn = sqlite3.connect(db_path)
+            texts = [row[0] for row in conn.execute("SELECT title || ' ' || content FROM news")]
+            conn.close()
+            before = text_cache.stats()["hits"]
+            predict_proba_batch(texts, model_path)
+            self.assertEqual(text_cache.stats()["hits"] - before, len(texts))
+        finally:
+            os.close(fd)
+            os.unlink(db_path)
+            os.unlink(model_path)
+            os.rmdir(os.path.dirname(model_path))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
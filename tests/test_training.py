@@ -17,12 +17,15 @@ import sys
 import os
 import sqlite3
 import pickle
+import subprocess
 import tempfile
 import unittest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ml.trainer import train_model, predict_news, load_data_from_db
+from migrations import migrate
+from ml import text_cache
+from ml.trainer import build_pruned_vocabulary, train_model, predict_news, predict_batch, predict_proba_batch, load_model, load_data_from_db
 
 
 # ──────────────────────────────────────────────────────────────
@@ -30,7 +33,7 @@ from ml.trainer import train_model, predict_news, load_data_from_db
 # ──────────────────────────────────────────────────────────────
 
 def create_test_db():
-    """Crée une base SQLite temporaire avec des news d'entraînement."""
+    """Crée une base SQLite temporaire avec des news d'entraînement (schéma migré)."""
     fd, db_path = tempfile.mkstemp(suffix=".db")
     conn = sqlite3.connect(db_path)
     conn.execute("""
@@ -71,6 +74,7 @@ def create_test_db():
             (title, content, label)
         )
     conn.commit()
+    migrate(conn)
     conn.close()
     return fd, db_path
 
@@ -117,6 +121,96 @@ class TestTraining(unittest.TestCase):
             model = pickle.load(f)
         self.assertIsNotNone(model)
 
+    def test_train_records_run(self):
+        """Chaque entraînement doit être enregistré dans training_runs."""
+        run = train_model(self.db_path, self.model_path)
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT n_samples, evaluation, n_eval, accuracy, precision, recall, model_bytes"
+            " FROM training_runs"
+        ).fetchone()
+        conn.close()
+        self.assertEqual(row[0], 10)
+        self.assertEqual(row[1], "full")
+        self.assertGreater(row[2], 0)
+        self.assertIsNotNone(row[3])
+        self.assertEqual(row[6], os.path.getsize(self.model_path))
+        self.assertGreater(run["duration_s"], 0)
+
+    def test_train_skip_evaluation(self):
+        """En mode 'skip', aucune métrique ne doit être calculée."""
+        run = train_model(self.db_path, self.model_path, evaluation="skip")
+        self.assertEqual(run["n_eval"], 0)
+        self.assertIsNone(run["accuracy"])
+        self.assertTrue(os.path.exists(self.model_path))
+
+    def test_train_sample_evaluation_is_bounded(self):
+        """En mode 'sample', le jeu évalué ne doit pas dépasser l'échantillon demandé."""
+        run = train_model(self.db_path, self.model_path, evaluation="sample", eval_sample_size=2)
+        self.assertLessEqual(run["n_eval"], 2)
+
+    def test_train_rejects_unknown_evaluation(self):
+        """Un mode d'évaluation inconnu doit lever ValueError."""
+        with self.assertRaises(ValueError):
+            train_model(self.db_path, self.model_path, evaluation="sometimes")
+
+    def test_memory_bounded_training_creates_model(self):
+        """Le mode mémoire bornée doit produire un modèle utilisable."""
+        run = train_model(self.db_path, self.model_path, memory_limit_mb=64, chunk_size=3)
+        self.assertIsNotNone(run)
+        self.assertIn(predict_news("vaccine approved", self.model_path), ("real", "fake"))
+
+    def test_memory_bounded_sample_excludes_only_evaluated_rows(self):
+        """Mode "sample" : seules les news évaluées sont retirées de l'entraînement."""
+        run = train_model(self.db_path, self.model_path, evaluation="sample",
+                          eval_sample_size=1, memory_limit_mb=64, chunk_size=3)
+        trained = load_model(self.model_path).named_steps["classifier"].class_count_.sum()
+        self.assertEqual(run["n_eval"], 1)
+        self.assertEqual(trained, run["n_samples"] - run["n_eval"])
+
+    def test_memory_bounded_full_evaluates_whole_holdout(self):
+        """Mode "full" : tout le jeu de test (id % 5 == 0) est évalué, le reste entraîné."""
+        run = train_model(self.db_path, self.model_path, evaluation="full",
+                          memory_limit_mb=64, chunk_size=3)
+        trained = load_model(self.model_path).named_steps["classifier"].class_count_.sum()
+        self.assertEqual(run["n_eval"], 2)
+        self.assertEqual(trained, run["n_samples"] - 2)
+
+    def test_memory_bounded_training_bypasses_token_cache(self):
+        """Le cache de tokens (hors plafond mémoire) n'est pas rempli ; le modèle rechargé l'utilise."""
+        text_cache.clear()
+        train_model(self.db_path, self.model_path, evaluation="full",
+                    memory_limit_mb=64, chunk_size=3)
+        stats = text_cache.stats()
+        self.assertEqual((stats["entries"], stats["misses"]), (0, 0))
+        analyzer = load_model(self.model_path).named_steps["vectorizer"].analyzer
+        self.assertTrue(analyzer.use_cache)
+
+    def test_training_reports_peak_rss(self):
+        """Le pic de mémoire résidente doit être mesuré et historisé."""
+        run = train_model(self.db_path, self.model_path)
+        if run["peak_rss_bytes"] is None:
+            self.skipTest("mesure de RSS indisponible sur cette plateforme")
+        conn = sqlite3.connect(self.db_path)
+        stored = conn.execute("SELECT peak_rss_bytes FROM training_runs").fetchone()[0]
+        conn.close()
+        self.assertEqual(stored, run["peak_rss_bytes"])
+        self.assertGreater(stored, 0)
+
+    def test_pruned_vocabulary_respects_limits(self):
+        """Le vocabulaire élagué ne doit pas dépasser max_features et doit appliquer min_df."""
+        vocab = build_pruned_vocabulary(self.db_path, max_terms=20, max_features=10)
+        self.assertLessEqual(len(vocab), 10)
+        self.assertEqual(sorted(vocab.values()), list(range(len(vocab))))
+        self.assertEqual(build_pruned_vocabulary(self.db_path, max_terms=1000, min_df=11), {})
+
+    def test_model_uses_compact_counts(self):
+        """Le vectoriseur doit produire des comptes int32."""
+        train_model(self.db_path, self.model_path)
+        model = load_model(self.model_path)
+        X = model.named_steps["vectorizer"].transform(["vaccine approved by the FDA"])
+        self.assertEqual(X.dtype.name, "int32")
+
     def test_model_has_predict_method(self):
         """Le modèle chargé doit avoir une méthode predict."""
         train_model(self.db_path, self.model_path)
@@ -174,6 +268,57 @@ class TestPrediction(unittest.TestCase):
         result = predict_news("", self.model_path)
         self.assertIn(result, ("real", "fake"))
 
+    def test_predict_batch_matches_predict_news(self):
+        """La prédiction par lot doit donner les mêmes labels que predict_news."""
+        texts = ["Lizard reptilian moon conspiracy", "FDA approved vaccine WHO", ""]
+        expected = [predict_news(t, self.model_path) for t in texts]
+        self.assertEqual(predict_batch(texts, self.model_path), expected)
+
+    def test_predict_batch_without_model_returns_unknown(self):
+        """Sans modèle, chaque texte du lot doit être 'unknown'."""
+        result = predict_batch(["a", "b"], "/tmp/this_model_does_not_exist.pkl")
+        self.assertEqual(result, ["unknown", "unknown"])
+
+    def test_predict_proba_batch_returns_label_and_confidence(self):
+        """predict_proba_batch doit retourner (label, confiance) cohérent avec predict_news."""
+        texts = ["Lizard reptilian moon conspiracy", "FDA approved vaccine WHO"]
+        results = predict_proba_batch(texts, self.model_path)
+        self.assertEqual(len(results), 2)
+        for text, (label, confidence) in zip(texts, results):
+            self.assertEqual(label, predict_news(text, self.model_path))
+            self.assertGreaterEqual(confidence, 0.5)
+            self.assertLessEqual(confidence, 1.0)
+
+    def test_load_model_is_cached_until_file_changes(self):
+        """Le modèle ne doit être relu que si le fichier a changé."""
+        first = load_model(self.model_path)
+        self.assertIs(load_model(self.model_path), first)
+        os.utime(self.model_path, ns=(0, 0))
+        self.assertIsNot(load_model(self.model_path), first)
+
+
+# ──────────────────────────────────────────────────────────────
+# Imports paresseux
+# ──────────────────────────────────────────────────────────────
+
+class TestLazyImports(unittest.TestCase):
+
+    def _sklearn_loaded_after(self, module):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run(
+            [sys.executable, "-c", f"import sys, {module}; print('sklearn' in sys.modules)"],
+            cwd=root, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        return out == "True"
+
+    def test_app_import_does_not_load_sklearn(self):
+        """Importer l'application web ne doit pas charger scikit-learn."""
+        self.assertFalse(self._sklearn_loaded_after("app"))
+
+    def test_trainer_import_does_not_load_sklearn(self):
+        """Importer ml.trainer ne doit pas charger scikit-learn avant l'entraînement."""
+        self.assertFalse(self._sklearn_loaded_after("ml.trainer"))
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)